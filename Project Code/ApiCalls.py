@@ -1,6 +1,13 @@
-import json
+import os
+import threading
 import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from TokenManager import TokenManager
+from JsonStream import iter_json_array
+from Metrics import METRICS
+from RateLimiter import RateLimiter, get_retry_after, INTERACTIVE, BACKGROUND, PREFETCH
+from ReferenceData import ReferenceStore, LocationIndex, CityIndex, AirlineIndex
+from ResponseCache import ResponseCache, StaleWhileRevalidateCache, canonical_key, STALE, MISSING
 
 TEST_API_KEY = "test_api_key"
 TEST_API_SECRET = "test_api_secret"
@@ -9,11 +16,106 @@ PROD_API_KEY = "prod_api_key"
 PROD_API_SECRET = "prod_api_secret"
 
 ENV = "production"
-
+#with ENV = "local", the calls go to a MockAmadeus.py server at this address instead of amadeus. When the
+#AMADEUS_BASE_URL environment variable is set, the calls go to that address, whatever ENV is
+LOCAL_API_URL = "http://127.0.0.1:8800"
+API_BASE_URL = os.environ.get("AMADEUS_BASE_URL")
+
+#tokens are treated as expired this many seconds before they actually expire, to provide a buffer
+TOKEN_EXPIRY_BUFFER = 120
+#a new token is fetched in the background once the current one is this close to that point
+TOKEN_REFRESH_AHEAD = 300
+#set to a file path, i.e. r"file path of the token file", so that every process on this
+#machine shares one token instead of each fetching their own
+TOKEN_FILE = None
+
+#all the reference data (airport locations, city codes and airlines) is kept in this database
+REFERENCE_DATA_FILE = r"file path of the reference_data database"
+#the json files the reference data used to be kept in. They are only read once, to fill
+#the database when it is first created
 AIRPORT_LOCATIONS_FILE = r"file path of the airport_locations file"
 CITY_CODES_FILE = r"file path of the city_codes file"
-
-class ApiCaller:
+AIRLINES_FILE = r"file path of the airlines_dict file"
+
+#max number of kept-alive connections to the amadeus host
+POOL_SIZE = 10
+#(connect timeout, read timeout) in seconds, used for any endpoint not listed below
+DEFAULT_TIMEOUT = (3.05, 20)
+#the shopping endpoints can take a while to answer, the reference data ones should be quick
+ENDPOINT_TIMEOUTS = {
+    "/v1/security/oauth2/token": (3.05, 10),
+    "/v1/reference-data/locations": (3.05, 10),
+    "/v1/reference-data/airlines": (3.05, 10),
+    "/v2/shopping/flight-offers": (3.05, 60),
+    "/v1/shopping/flight-destinations": (3.05, 60)
+}
+
+#size in bytes of the pieces a streamed response is read in
+STREAM_CHUNK_SIZE = 16 * 1024
+
+#max number of flight-destinations calls (one per origin city) that can run at the same time
+MAX_IN_FLIGHT = 5
+
+#(requests per second, burst) allowed for each endpoint, set to match the quotas of your amadeus plan.
+#The endpoints that are not listed use DEFAULT_RATE
+DEFAULT_RATE = (10, 10)
+ENDPOINT_RATES = {
+    "/v2/shopping/flight-offers": (10, 1),
+    "/v1/shopping/flight-destinations": (10, 1)
+}
+#the number of requests in flight adapts between these, backing off on 429s and slow responses
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = POOL_SIZE
+#how many times a request that got a 429 is sent again, and how long to wait if the api doesn't say
+MAX_THROTTLED_RETRIES = 3
+DEFAULT_RETRY_AFTER = 1
+#when requests have to wait, the ones a user is waiting on go first. Not listed -> BACKGROUND
+ENDPOINT_PRIORITIES = {
+    "/v1/security/oauth2/token": INTERACTIVE,
+    "/v2/shopping/flight-offers": INTERACTIVE,
+    "/v1/shopping/flight-destinations": INTERACTIVE
+}
+
+#identical flight-offers searches made within this many seconds are answered from memory
+FLIGHT_OFFERS_CACHE_TTL = 300
+#limits on how many flight-offers responses are kept in memory, and how big they can be in total
+FLIGHT_OFFERS_CACHE_ENTRIES = 256
+FLIGHT_OFFERS_CACHE_BYTES = 64 * 1024 * 1024
+
+#a flight-destinations result younger than FRESH_FOR seconds is served as is. Until it is MAX_AGE seconds old
+#it is still served right away while a newer one is fetched in the background. After that it is fetched again
+FLIGHT_DESTINATIONS_FRESH_FOR = 30 * 60
+FLIGHT_DESTINATIONS_MAX_AGE = 6 * 60 * 60
+#(fresh for, max age) of the origins that should not use the thresholds above, i.e. "LON": (60 * 60, 12 * 60 * 60)
+FLIGHT_DESTINATIONS_ORIGIN_AGES = {}
+FLIGHT_DESTINATIONS_CACHE_ENTRIES = 512
+
+#newly learned airport locations are written to the airport locations file once this many are waiting,
+#or once the oldest has been waiting this many seconds (and when the program exits)
+LOCATION_FLUSH_EVERY = 25
+LOCATION_FLUSH_INTERVAL = 30
+#airport codes the location api could not resolve are not looked up again for this many seconds
+UNKNOWN_LOCATION_TTL = 24 * 60 * 60
+
+#what get_location returns for an airport it could not find the city & country of
+UNKNOWN_LOCATION = {"city_name": "Unknown", "country_name": "Unknown"}
+
+#the address of a running SearchDaemon.py, i.e. "http://127.0.0.1:8765". When it is set (here or with the
+#SEARCH_DAEMON_URL environment variable), the programs send their searches to the daemon instead of
+#calling the api themselves. Seconds to wait for the daemon to answer a search
+SEARCH_DAEMON_URL = os.environ.get("SEARCH_DAEMON_URL")
+SEARCH_DAEMON_TIMEOUT = 60
+
+#the reference data store and its indexes, shared by the whole process. The database is only opened when first used
+REFERENCE_STORE = ReferenceStore(REFERENCE_DATA_FILE, AIRPORT_LOCATIONS_FILE, CITY_CODES_FILE, AIRLINES_FILE)
+AIRPORT_LOCATION_INDEX = LocationIndex(REFERENCE_STORE, LOCATION_FLUSH_EVERY, LOCATION_FLUSH_INTERVAL, UNKNOWN_LOCATION_TTL)
+CITY_INDEX = CityIndex(REFERENCE_STORE)
+AIRLINE_INDEX = AirlineIndex(REFERENCE_STORE)
+
+#everything that does not depend on how the http requests are actually sent lives here, so that
+#ApiCaller and AsyncApiCaller (in AsyncApiCalls.py) build the same requests, handle tokens
+#the same way and read the responses the same way
+class BaseApiCaller:
     def __init__(self):
         if ENV == "test":
             self.api_key = TEST_API_KEY
@@ -23,15 +125,37 @@ class ApiCaller:
             self.api_key = PROD_API_KEY
             self.api_secret = PROD_API_SECRET
             self.base_url = "https://api.amadeus.com"
+        elif ENV == "local":
+            self.api_key = TEST_API_KEY
+            self.api_secret = TEST_API_SECRET
+            self.base_url = LOCAL_API_URL
+
+        if API_BASE_URL:
+            self.base_url = API_BASE_URL.rstrip("/")
 
-        self.token = ""
-        self.token_expires_at = 0
-        #fetching a token to start
-        self.__token_refresh()
+        #all the threads (and, with TOKEN_FILE, all the processes) share one token
+        self.token_manager = TokenManager(TOKEN_EXPIRY_BUFFER, TOKEN_REFRESH_AHEAD, TOKEN_FILE, self.base_url + " " + self.api_key)
 
-    def __token_refresh(self):
+        #repeated route & date searches are served from here instead of calling the api again
+        self.flight_offers_cache = ResponseCache(FLIGHT_OFFERS_CACHE_TTL, FLIGHT_OFFERS_CACHE_ENTRIES, FLIGHT_OFFERS_CACHE_BYTES)
+        #inspiration results change slowly, so they are served from here and refreshed in the background
+        self.flight_destinations_cache = StaleWhileRevalidateCache(
+            FLIGHT_DESTINATIONS_FRESH_FOR,
+            FLIGHT_DESTINATIONS_MAX_AGE,
+            FLIGHT_DESTINATIONS_CACHE_ENTRIES,
+            FLIGHT_DESTINATIONS_ORIGIN_AGES
+        )
+
+        #keeps the requests within the api's rate limits
+        self.rate_limiter = RateLimiter(DEFAULT_RATE, ENDPOINT_RATES, MAX_CONCURRENCY, MIN_CONCURRENCY, MAX_CONCURRENCY)
+
+        #the cache hits are already counted by the caches, they are only read when the metrics are exported.
+        #METRICS only holds the method weakly, so a caller that is no longer used can still be freed
+        METRICS.add_collector(self._collect_metrics)
+
+    #the endpoint, headers and form data of a request for a new token
+    def _token_request(self):
         token_endpoint = "/v1/security/oauth2/token"
-        url = self.base_url + token_endpoint
 
         token_headers = {
             "Content-Type": "application/x-www-form-urlencoded"
@@ -42,93 +166,95 @@ class ApiCaller:
             "client_secret": self.api_secret
         }
 
-        response = requests.post(url, headers = token_headers, data = token_data)
-        response_dict = response.json()
-        
-        self.token = response_dict.get("access_token")
-
-        #I am saying that it expires 2 mins earlier than it actually does to provide a buffer
-        expires_in = response_dict.get("expires_in") - 120
-        #time.time() gives current time in seconds
-        self.token_expires_at = time.time() + expires_in
+        return token_endpoint, token_headers, token_data
 
-    def __token_check(self):
-        if time.time() > self.token_expires_at:
-            self.__token_refresh()
+    #None if there is no token, in which case the request isn't sent at all, since it could only get a 401
+    def _auth_headers(self, token):
+        if token is None:
+            return None
 
-    def __get_headers(self):
-        self.__token_check()
         return {
-            "Authorization": "Bearer " + self.token
+            "Authorization": "Bearer " + token
         }
 
+    #---Metrics---
+
+    #records a request that got a response. sent & received are the sizes of the request & response bodies,
+    #received is None for a streamed response, whose size is recorded once it has been read.
+    #Only called when METRICS.enabled
+    def _record_response(self, endpoint, status_code, seconds, sent, received):
+        METRICS.observe("api_request_seconds", seconds, endpoint = endpoint)
+        METRICS.count("api_responses_total", endpoint = endpoint, status = str(status_code))
+        METRICS.count("api_sent_bytes_total", sent, endpoint = endpoint)
+
+        if received is not None:
+            METRICS.count("api_received_bytes_total", received, endpoint = endpoint)
+
+    #the hits & misses of the response caches, as (name, labels, value) samples
+    def _collect_metrics(self):
+        flight_offers = self.flight_offers_cache.stats()
+        flight_destinations = self.flight_destinations_cache.stats()
+
+        return [
+            ("cache_hits_total", {"cache": "flight_offers"}, flight_offers["hits"]),
+            ("cache_misses_total", {"cache": "flight_offers"}, flight_offers["misses"]),
+            ("cache_hits_total", {"cache": "flight_destinations"}, flight_destinations["fresh_hits"] + flight_destinations["stale_hits"]),
+            ("cache_misses_total", {"cache": "flight_destinations"}, flight_destinations["misses"])
+        ]
+
     #displays the error message upon a failed api call
-    def __display_error(self, response):
+    def _display_error(self, response):
         print("API call failed with status_code: ", response.status_code)
         print("Error message: ", response.text)
 
-    def __call_location_api(self, sub_type, keyword):
-        location_endpoint = f"/v1/reference-data/locations"
-
-        url = self.base_url + location_endpoint
-        headers = self.__get_headers()
-
-        #sub_type is city or airport, keyword is a spelling of a city name or an airport code
-        params = {
+    #sub_type is city or airport, keyword is a spelling of a city name or an airport code
+    def _location_params(self, sub_type, keyword):
+        return {
             "subType": sub_type,
             "keyword": keyword
         }
 
-        response = requests.get(url, headers = headers, params = params)
-
-        if response.status_code == 200:
-            return response.json()
-            
-        else:
-            self.__display_error(response)
-            return None
-
-    #get the name of the city & country that an airport is located in
-    def get_location(self, airport_code):
-        with open(AIRPORT_LOCATIONS_FILE, "r") as file:
-            airport_locations_dict = json.load(file)
-
-        city_country_dict = airport_locations_dict.get(airport_code)
-        
-        #if the given airport code is not already within the dictionary,
-        #search it up using the location api
-        if not city_country_dict:
-            response_dict = self.__call_location_api("AIRPORT", airport_code)
-
-            #call failed or call succeeded but the api could not find the associated country
-            #and city name for the given airport code i.e. data is []
-            if not response_dict or not response_dict.get("data"):
-                return {"city_name": "Unknown", "country_name": "Unknown"}
-
-            #call succeeded and returned valid data
-            city_name = response_dict.get("data")[0].get("address").get("cityName").lower()
-            country_name = response_dict.get("data")[0].get("address").get("countryName").lower()
-
-            #formatting location names
-            city_name = city_name.capitalize()
-            country_name = country_name.capitalize()
-
-            #create the entry for airport_code from the data returned by the api search
-            city_country_dict = {
-                "city_name": city_name,
-                "country_name": country_name
-            }
+    #returns the known city & country of an airport, or None if it has not been looked up before
+    def _known_location(self, airport_code):
+        #the api recently could not find this airport, no point asking again yet
+        if AIRPORT_LOCATION_INDEX.is_unknown(airport_code):
+            return dict(UNKNOWN_LOCATION)
+
+        return AIRPORT_LOCATION_INDEX.get(airport_code)
+
+    #builds the city & country of an airport out of a location api response and saves it
+    def _learn_location(self, airport_code, response_dict):
+        #call failed, the airport will be looked up again next time
+        if not response_dict:
+            return dict(UNKNOWN_LOCATION)
+
+        #call succeeded but the api could not find the associated country
+        #and city name for the given airport code i.e. data is []
+        if not response_dict.get("data"):
+            AIRPORT_LOCATION_INDEX.add_unknown(airport_code)
+            return dict(UNKNOWN_LOCATION)
+
+        #call succeeded and returned valid data
+        city_name = response_dict.get("data")[0].get("address").get("cityName").lower()
+        country_name = response_dict.get("data")[0].get("address").get("countryName").lower()
+
+        #formatting location names
+        city_name = city_name.capitalize()
+        country_name = country_name.capitalize()
+
+        #create the entry for airport_code from the data returned by the api search
+        city_country_dict = {
+            "city_name": city_name,
+            "country_name": country_name
+        }
 
-            #update the dictionary
-            airport_locations_dict[airport_code] = city_country_dict
-            with open(AIRPORT_LOCATIONS_FILE, "w") as file:
-                json.dump(airport_locations_dict, file, indent = 2)
+        #update the index, it gets written back to the file later along with other new locations
+        AIRPORT_LOCATION_INDEX.add(airport_code, city_country_dict)
 
         return city_country_dict
 
-    def get_city_code(self, city_name):
-        response_dict = self.__call_location_api("CITY", city_name)
-
+    #gets the city code out of a location api response and saves it
+    def _learn_city_code(self, city_name, response_dict):
         #call failed or call succeeded and no city names matched the search string
         if not response_dict or not response_dict.get("data"):
             print(f"Sorry, no matches found for {city_name}")
@@ -139,37 +265,29 @@ class ApiCaller:
         city_code = data[0].get("address").get("cityCode")
         city_name = data[0].get("address").get("cityName").lower()
 
-        #accessing the dictionary mapping city names to their codes
-        with open(CITY_CODES_FILE, "r") as file:
-            city_code_dict = json.load(file)
-
-        #updating the dictionary and writing it back to the file
-        city_code_dict[city_name] = city_code
-
-        with open(CITY_CODES_FILE, "w") as file:
-            json.dump(city_code_dict, file, indent = 2)
+        #adding the city to the known city names & codes
+        CITY_INDEX.add(city_name, city_code)
 
         return city_code
-    
-    def get_airline_data(self, joined_to_lookup, airlines_dict):
-        airline_data_endpoint = f"/v1/reference-data/airlines?airlineCodes={joined_to_lookup}"
 
-        url = self.base_url + airline_data_endpoint   
-        headers = self.__get_headers()
+    def _learn_airlines(self, response_dict, airlines_dict):
+        for airline in response_dict.get("data", []):
+            airlines_dict[airline.get("iataCode")] = airline.get("businessName")
 
-        response = requests.get(url, headers = headers)
+        return airlines_dict
 
-        #if api call successful
-        if response.status_code == 200:
-            response_dict = response.json()
+    def _airline_params(self, joined_to_lookup):
+        return {
+            "airlineCodes": joined_to_lookup
+        }
 
-            for airline in response_dict.get("data", []):
-                airlines_dict[airline.get("iataCode")] = airline.get("businessName")
+    #the request parameters of the flight-destinations call for a single origin city
+    def _cheapest_cities_params(self, input_dict, city_code):
+        #each origin gets its own copy of input_dict since the calls can run at the same time
+        origin_input_dict = dict(input_dict)
+        origin_input_dict["origin_city_code"] = city_code
 
-        else:
-            self.__display_error(response)
-
-        return airlines_dict
+        return self.format_cheapest_cities_body(origin_input_dict)
 
     def format_flight_offers_body(self, input_dict):
         #formatting the list of travelers
@@ -263,57 +381,359 @@ class ApiCaller:
 
         return body
 
-    def get_flight_offers(self, input_dict):
-        flight_offers_endpoint = "/v2/shopping/flight-offers"
+#creating an ApiCaller makes no network calls: the transport (and requests with it) is only set up
+#when the first call is made, and the first call that needs a token fetches it
+class ApiCaller(BaseApiCaller):
+    def __init__(self):
+        super().__init__()
+
+        #all calls go through one pooled transport so connections to the host get reused
+        self.transport = None
+        self.transport_lock = threading.Lock()
+        #refreshes stale flight-destinations results without making the user wait for them
+        self.refresh_executor = ThreadPoolExecutor(max_workers = 2)
+
+    def __get_transport(self):
+        if self.transport is None:
+            with self.transport_lock:
+                if self.transport is None:
+                    #imported here since importing requests takes a while, and most programs
+                    #that import this module ask the user for input before making any call
+                    from Transport import Transport
+                    self.transport = Transport(self.base_url, POOL_SIZE, DEFAULT_TIMEOUT, ENDPOINT_TIMEOUTS)
+
+        return self.transport
+
+    #sends a request through the transport, once the rate limiter allows it. A request that gets a 429
+    #is sent again after the wait the api asks for. Returns None if the request could not be completed
+    #at all (i.e. timed out, the connection failed or there is no access token)
+    def __send(self, method, endpoint, priority = None, **kwargs):
+        transport = self.__get_transport()
+
+        if priority is None:
+            priority = ENDPOINT_PRIORITIES.get(endpoint, BACKGROUND)
+
+        #no access token could be fetched (see _auth_headers)
+        if kwargs.get("headers", {}) is None:
+            print("API call failed: no access token")
+            return None
+
+        for attempt in range(MAX_THROTTLED_RETRIES + 1):
+            self.rate_limiter.acquire(endpoint, priority)
+            start = time.monotonic()
+
+            try:
+                response = transport.request(method, endpoint, **kwargs)
+            except transport.RequestException as error:
+                self.rate_limiter.failed(endpoint)
+                METRICS.count("api_request_errors_total", endpoint = endpoint)
+                print("API call failed: ", error)
+                return None
+
+            seconds = time.monotonic() - start
+
+            if METRICS.enabled:
+                body = response.request.body or b""
+                #the body of a streamed response hasn't been read yet
+                received = None if kwargs.get("stream") else len(response.content)
+                self._record_response(endpoint, response.status_code, seconds, len(body), received)
+
+            if response.status_code != 429:
+                self.rate_limiter.done(endpoint, seconds)
+                return response
+
+            #the connection of a streamed response is only given back to the pool once it is closed. The
+            #last response is kept open, it is returned for the caller to display
+            if attempt < MAX_THROTTLED_RETRIES:
+                response.close()
+
+            self.rate_limiter.throttled(endpoint, get_retry_after(response.headers, DEFAULT_RETRY_AFTER))
+
+        #still throttled after all the retries, the caller displays the error
+        return response
+
+    #makes the token request, only ever called by the token manager
+    def __fetch_token(self):
+        token_endpoint, token_headers, token_data = self._token_request()
+
+        response = self.__send("POST", token_endpoint, headers = token_headers, data = token_data)
+        if response is None:
+            METRICS.count("token_refreshes_total", outcome = "failed")
+            return None
+
+        if response.status_code != 200:
+            METRICS.count("token_refreshes_total", outcome = "failed")
+            self._display_error(response)
+            return None
+
+        METRICS.count("token_refreshes_total", outcome = "ok")
+        return response.json()
+
+    def __get_headers(self):
+        return self._auth_headers(self.token_manager.get_token(self.__fetch_token))
+
+    #sets up the transport and fetches a token now rather than on the first call, i.e. for a
+    #long running process that shouldn't make its first search wait on them
+    def warm_up(self):
+        self.__get_headers()
+
+    def __call_location_api(self, sub_type, keyword):
+        location_endpoint = "/v1/reference-data/locations"
 
-        url = self.base_url + flight_offers_endpoint
         headers = self.__get_headers()
+        params = self._location_params(sub_type, keyword)
+
+        response = self.__send("GET", location_endpoint, headers = headers, params = params)
+        if response is None:
+            return None
+
+        if response.status_code == 200:
+            return response.json()
+            
+        else:
+            self._display_error(response)
+            return None
+
+    #get the name of the city & country that an airport is located in
+    def get_location(self, airport_code):
+        city_country_dict = self._known_location(airport_code)
+        
+        #if the given airport code is not already within the dictionary,
+        #search it up using the location api
+        if not city_country_dict:
+            response_dict = self.__call_location_api("AIRPORT", airport_code)
+            city_country_dict = self._learn_location(airport_code, response_dict)
+
+        return city_country_dict
+
+    #gets the city & country of many airports at once. Each distinct airport code is only looked up once,
+    #and the ones that are not known yet are searched concurrently (at most max_in_flight at a time).
+    #Returns a dictionary mapping each airport code to its city & country
+    def get_locations(self, airport_codes, max_in_flight = MAX_IN_FLIGHT):
+        locations = dict()
+        to_lookup = []
+
+        for airport_code in set(airport_codes):
+            city_country_dict = self._known_location(airport_code)
+
+            if city_country_dict:
+                locations[airport_code] = city_country_dict
+            else:
+                to_lookup.append(airport_code)
+
+        if to_lookup:
+            num_workers = min(max_in_flight, len(to_lookup))
+            with ThreadPoolExecutor(max_workers = num_workers) as executor:
+                found = executor.map(self.get_location, to_lookup)
+
+                for airport_code, city_country_dict in zip(to_lookup, found):
+                    locations[airport_code] = city_country_dict
+
+        return locations
+
+    def get_city_code(self, city_name):
+        response_dict = self.__call_location_api("CITY", city_name)
+
+        return self._learn_city_code(city_name, response_dict)
+    
+    def get_airline_data(self, joined_to_lookup, airlines_dict):
+        airline_data_endpoint = "/v1/reference-data/airlines"
+
+        headers = self.__get_headers()
+        params = self._airline_params(joined_to_lookup)
+
+        response = self.__send("GET", airline_data_endpoint, headers = headers, params = params)
+
+        #if api call successful
+        if response is not None and response.status_code == 200:
+            airlines_dict = self._learn_airlines(response.json(), airlines_dict)
+
+        elif response is not None:
+            self._display_error(response)
+
+        return airlines_dict
+
+    #priority is the rate limiter priority of the call, i.e. PREFETCH for a search nobody is waiting on yet
+    def get_flight_offers(self, input_dict, priority = None):
+        flight_offers_endpoint = "/v2/shopping/flight-offers"
 
         #getting the body of the request, based on user input     
         request_body = self.format_flight_offers_body(input_dict)
 
+        #the same search was made recently
+        cache_key = canonical_key(request_body)
+        response_dict = self.flight_offers_cache.get(cache_key)
+        if response_dict is not None:
+            return response_dict
+
+        headers = self.__get_headers()
+
         #making the api call
-        response = requests.post(url, headers = headers, json = request_body)
+        response = self.__send("POST", flight_offers_endpoint, priority, headers = headers, json = request_body)
+        if response is None:
+            return None
 
         #if api call successful
         if response.status_code == 200:
             response_dict = response.json()
+            self.flight_offers_cache.put(cache_key, response_dict, len(response.content))
 
             return response_dict
 
         #call failed
         else:
-            self.__display_error(response)
+            self._display_error(response)
+            return None
+
+    #same search as get_flight_offers, except that the offers are returned one at a time, each one as
+    #soon as it has been received and decoded, instead of all at once when the whole response is in.
+    #Returns an iterator over the offers, or None if the call failed
+    def stream_flight_offers(self, input_dict):
+        flight_offers_endpoint = "/v2/shopping/flight-offers"
+
+        request_body = self.format_flight_offers_body(input_dict)
+
+        #the same search was made recently
+        cache_key = canonical_key(request_body)
+        response_dict = self.flight_offers_cache.get(cache_key)
+        if response_dict is not None:
+            return iter(response_dict.get("data") or [])
+
+        headers = self.__get_headers()
+
+        response = self.__send("POST", flight_offers_endpoint, headers = headers, json = request_body, stream = True)
+        if response is None:
             return None
 
-    def get_cheapest_cities(self, input_dict, origin_city_codes):
+        if response.status_code != 200:
+            self._display_error(response)
+            response.close()
+            return None
+
+        return self.__iter_flight_offers(response, cache_key)
+
+    #decodes the offers of a streamed response as its chunks come in. If every offer gets read, the
+    #search is cached like get_flight_offers does. The connection is given back once the caller stops
+    def __iter_flight_offers(self, response, cache_key):
+        offers = []
+        num_bytes = 0
+
+        def chunks():
+            nonlocal num_bytes
+            for chunk in response.iter_content(chunk_size = STREAM_CHUNK_SIZE):
+                num_bytes += len(chunk)
+                yield chunk
+
+        try:
+            for offer in iter_json_array(chunks(), "data"):
+                offers.append(offer)
+                yield offer
+
+            self.flight_offers_cache.put(cache_key, {"data": offers}, num_bytes)
+
+        except (ValueError, self.__get_transport().RequestException) as error:
+            print("Could not read the flight offers: ", error)
+
+        finally:
+            METRICS.count("api_received_bytes_total", num_bytes, endpoint = "/v2/shopping/flight-offers")
+            response.close()
+
+    #makes the flight-destinations call for a single origin city. Returns None if the call failed
+    def __fetch_cheapest_cities(self, city_code, request_body, priority = INTERACTIVE):
         cheapest_cities_endpoint = "/v1/shopping/flight-destinations"
 
-        url = self.base_url + cheapest_cities_endpoint
         headers = self.__get_headers()
 
-        response_dict_list = []
-        for city_code in origin_city_codes:
-            #note that this changes input_dict in each iteration. This is fine since input_dict
-            #will not be used after the execution of this function
-            input_dict["origin_city_code"] = city_code
+        response = self.__send("GET", cheapest_cities_endpoint, priority, headers = headers, params = request_body)
+        if response is None:
+            return None
 
-            #getting the body of the request, based on user input
-            request_body = self.format_cheapest_cities_body(input_dict)
+        #if api call successful
+        if response.status_code == 200:
+            try:
+                return response.json()
+            except ValueError:
+                print(f"Could not read the results for {city_code}")
+                return None
 
-            response = requests.get(url, headers = headers, params = request_body)
+        else:
+            self._display_error(response)
+            return None
 
-            #if api call successful
-            if response.status_code == 200:
-                response_dict = response.json()
+    #runs in the background to replace a stale flight-destinations result
+    def __refresh_cheapest_cities(self, city_code, request_body, cache_key):
+        try:
+            #nobody is waiting on this one, so it gives way to the other requests
+            response_dict = self.__fetch_cheapest_cities(city_code, request_body, BACKGROUND)
+            if response_dict is not None:
+                self.flight_destinations_cache.put(cache_key, response_dict)
+        finally:
+            self.flight_destinations_cache.end_refresh(cache_key)
+
+    #gets the flight-destinations results for a single origin city, from the cache when possible
+    def __get_cheapest_cities_from(self, input_dict, city_code):
+        #getting the body of the request, based on user input
+        request_body = self._cheapest_cities_params(input_dict, city_code)
+
+        cache_key = canonical_key(request_body)
+        state, response_dict = self.flight_destinations_cache.lookup(cache_key, city_code)
+
+        #serving the stale result right away, and fetching a newer one for next time
+        if state == STALE and self.flight_destinations_cache.begin_refresh(cache_key):
+            self.refresh_executor.submit(self.__refresh_cheapest_cities, city_code, request_body, cache_key)
+
+        if state != MISSING:
+            return response_dict
 
-                response_dict_list.append(response_dict)
+        response_dict = self.__fetch_cheapest_cities(city_code, request_body)
+        if response_dict is not None:
+            self.flight_destinations_cache.put(cache_key, response_dict)
 
-            else:
-                self.__display_error(response)
-                response_dict_list = []
+        return response_dict
+
+    #searches every origin city concurrently (at most max_in_flight at a time). The results come back in
+    #the same order as origin_city_codes, and an origin whose call failed is simply left out
+    def get_cheapest_cities(self, input_dict, origin_city_codes, max_in_flight = MAX_IN_FLIGHT):
+        if not origin_city_codes:
+            return []
+
+        num_workers = min(max_in_flight, len(origin_city_codes))
+        with ThreadPoolExecutor(max_workers = num_workers) as executor:
+            responses = executor.map(lambda city_code: self.__get_cheapest_cities_from(input_dict, city_code), origin_city_codes)
+
+            response_dict_list = [response_dict for response_dict in responses if response_dict is not None]
 
         return response_dict_list
 
-#defining this here to be used across all other files
-API_CALLER = ApiCaller()
+    #fetches the flight-destinations results of a single origin city ahead of time, so the next search for
+    #them is answered from the cache, and marks them as warmed. Results cached less than refresh_after
+    #seconds ago are left alone. Returns (cache key, outcome), outcome being "warmed", "cached" (it was
+    #recent enough, or already being refreshed) or "failed"
+    def warm_cheapest_cities(self, input_dict, city_code, refresh_after = 0):
+        request_body = self._cheapest_cities_params(input_dict, city_code)
+        cache_key = canonical_key(request_body)
+
+        age = self.flight_destinations_cache.get_age(cache_key)
+        if age is not None and age < refresh_after:
+            return cache_key, "cached"
+
+        if not self.flight_destinations_cache.begin_refresh(cache_key):
+            return cache_key, "cached"
+
+        try:
+            response_dict = self.__fetch_cheapest_cities(city_code, request_body, PREFETCH)
+            if response_dict is None:
+                return cache_key, "failed"
+
+            self.flight_destinations_cache.put(cache_key, response_dict, warmed = True)
+            return cache_key, "warmed"
+        finally:
+            self.flight_destinations_cache.end_refresh(cache_key)
+
+#defining this here to be used across all other files. No token is fetched until the first call.
+#With a search daemon, API_CALLER hands the searches to it, and only calls the api itself if it can't be reached
+if SEARCH_DAEMON_URL:
+    from SearchClient import SearchClient
+    API_CALLER = SearchClient(SEARCH_DAEMON_URL, SEARCH_DAEMON_TIMEOUT, ApiCaller)
+else:
+    API_CALLER = ApiCaller()
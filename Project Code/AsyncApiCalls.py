@@ -0,0 +1,308 @@
+import asyncio
+import importlib.util
+import time
+from RateLimiter import get_retry_after
+from ResponseCache import canonical_key, STALE, MISSING
+from Metrics import METRICS
+from ApiCalls import BaseApiCaller, POOL_SIZE, DEFAULT_TIMEOUT, ENDPOINT_TIMEOUTS, MAX_IN_FLIGHT, MAX_THROTTLED_RETRIES, DEFAULT_RETRY_AFTER
+
+#httpx is only needed by the async client, so the rest of the project still works without it
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+#http/2 lets many requests share a single connection at the same time, but httpx only
+#supports it when the h2 package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+#the coroutine version of ApiCaller. Request bodies, token handling and response parsing all come
+#from BaseApiCaller, only the sending of the requests is different. Usage:
+#   async with AsyncApiCaller() as api_caller:
+#       flight_offers_dict = await api_caller.get_flight_offers(details)
+class AsyncApiCaller(BaseApiCaller):
+    def __init__(self, max_connections = POOL_SIZE, http2 = True):
+        if httpx is None:
+            raise ImportError("AsyncApiCaller requires httpx. Install it with: pip install httpx[http2]")
+
+        super().__init__()
+
+        #with http/2 each connection multiplexes many requests, so a handful of connections
+        #can carry thousands of concurrent searches
+        limits = httpx.Limits(max_connections = max_connections, max_keepalive_connections = max_connections)
+        self.client = httpx.AsyncClient(base_url = self.base_url, http2 = http2 and HTTP2_AVAILABLE, limits = limits)
+
+        #only one coroutine fetches a token at a time, the others wait for it to finish. The token itself
+        #is kept by self.token_manager (see BaseApiCaller). No token is fetched here since the constructor
+        #can't await, the first call gets it instead
+        self.token_lock = asyncio.Lock()
+
+        #background refreshes of stale flight-destinations results. Kept here so the tasks
+        #aren't garbage collected before they finish
+        self.refresh_tasks = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.client.aclose()
+
+    def __get_timeout(self, endpoint):
+        connect_timeout, read_timeout = ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+
+        #pool = None so that requests wait for a free connection instead of failing when many are queued
+        return httpx.Timeout(connect = connect_timeout, read = read_timeout, write = read_timeout, pool = None)
+
+    #sends a request once its endpoint's token bucket allows it (see RateLimiter). A request that gets a 429
+    #is sent again after the wait the api asks for. The number of requests in flight is limited by the
+    #callers' semaphores instead of the rate limiter's slots, which block the thread they run on.
+    #Returns None if the request could not be completed at all (i.e. timed out, the connection failed or
+    #there is no access token)
+    async def __send(self, method, endpoint, **kwargs):
+        #no access token could be fetched (see _auth_headers)
+        if kwargs.get("headers", {}) is None:
+            print("API call failed: no access token")
+            return None
+
+        bucket = self.rate_limiter.get_bucket(endpoint)
+
+        for attempt in range(MAX_THROTTLED_RETRIES + 1):
+            wait = bucket.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            start = time.monotonic()
+            try:
+                response = await self.client.request(method, endpoint, timeout = self.__get_timeout(endpoint), **kwargs)
+            except httpx.HTTPError as error:
+                METRICS.count("api_request_errors_total", endpoint = endpoint)
+                print("API call failed: ", error)
+                return None
+
+            if METRICS.enabled:
+                self._record_response(endpoint, response.status_code, time.monotonic() - start, len(response.request.content), len(response.content))
+
+            if response.status_code != 429:
+                return response
+
+            bucket.pause(get_retry_after(response.headers, DEFAULT_RETRY_AFTER))
+
+        #still throttled after all the retries, the caller displays the error
+        return response
+
+    async def __token_refresh(self):
+        token_endpoint, token_headers, token_data = self._token_request()
+
+        response = await self.__send("POST", token_endpoint, headers = token_headers, data = token_data)
+        self.token_manager.fetches += 1
+        if response is None:
+            METRICS.count("token_refreshes_total", outcome = "failed")
+            self.token_manager.record_failure()
+            return
+
+        if response.status_code != 200:
+            METRICS.count("token_refreshes_total", outcome = "failed")
+            self.token_manager.record_failure()
+            self._display_error(response)
+            return
+
+        METRICS.count("token_refreshes_total", outcome = "ok")
+        self.token_manager.store(response.json())
+
+    #same as TokenManager.get_token, with a coroutine fetching the token. needs_refresh is is_expired when
+    #the caller waits for the token, or is_due when it is fetched in the background. The shared token file
+    #is read but not locked, since waiting on the lock would block every other coroutine
+    async def __refresh_token(self, needs_refresh):
+        async with self.token_lock:
+            #checking again, since another coroutine (or process) may have refreshed it while this one
+            #waited, or its request may have failed, in which case no other request is made for a while
+            if self.token_manager.is_backing_off():
+                return
+
+            if needs_refresh():
+                self.token_manager.load_shared()
+
+            if needs_refresh():
+                await self.__token_refresh()
+
+    async def __get_headers(self):
+        if self.token_manager.is_expired():
+            if not self.token_manager.is_backing_off():
+                await self.__refresh_token(self.token_manager.is_expired)
+
+        elif self.token_manager.is_due() and not self.token_lock.locked() and not self.token_manager.is_backing_off():
+            task = asyncio.create_task(self.__refresh_token(self.token_manager.is_due))
+            self.refresh_tasks.add(task)
+            task.add_done_callback(self.refresh_tasks.discard)
+
+        return self._auth_headers(self.token_manager.get_valid_token())
+
+    async def __call_location_api(self, sub_type, keyword):
+        location_endpoint = "/v1/reference-data/locations"
+
+        headers = await self.__get_headers()
+        params = self._location_params(sub_type, keyword)
+
+        response = await self.__send("GET", location_endpoint, headers = headers, params = params)
+        if response is None:
+            return None
+
+        if response.status_code == 200:
+            return response.json()
+
+        else:
+            self._display_error(response)
+            return None
+
+    #get the name of the city & country that an airport is located in. The reference data store is
+    #read & written on a worker thread, since a write can wait up to BUSY_TIMEOUT seconds for another
+    #process, and that would hold up every other coroutine on the event loop
+    async def get_location(self, airport_code):
+        city_country_dict = await asyncio.to_thread(self._known_location, airport_code)
+
+        #if the given airport code is not already known, search it up using the location api
+        if not city_country_dict:
+            response_dict = await self.__call_location_api("AIRPORT", airport_code)
+            city_country_dict = await asyncio.to_thread(self._learn_location, airport_code, response_dict)
+
+        return city_country_dict
+
+    #same behaviour as ApiCaller.get_locations: each distinct airport code is looked up once, and
+    #the unknown ones are searched concurrently (at most max_in_flight at a time)
+    async def get_locations(self, airport_codes, max_in_flight = MAX_IN_FLIGHT):
+        airport_codes = list(set(airport_codes))
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def get_location_limited(airport_code):
+            async with semaphore:
+                return await self.get_location(airport_code)
+
+        found = await asyncio.gather(*[get_location_limited(airport_code) for airport_code in airport_codes])
+
+        return dict(zip(airport_codes, found))
+
+    async def get_city_code(self, city_name):
+        response_dict = await self.__call_location_api("CITY", city_name)
+
+        #saving the city code writes to the reference data store, see get_location
+        return await asyncio.to_thread(self._learn_city_code, city_name, response_dict)
+
+    async def get_airline_data(self, joined_to_lookup, airlines_dict):
+        airline_data_endpoint = "/v1/reference-data/airlines"
+
+        headers = await self.__get_headers()
+        params = self._airline_params(joined_to_lookup)
+
+        response = await self.__send("GET", airline_data_endpoint, headers = headers, params = params)
+
+        #if api call successful
+        if response is not None and response.status_code == 200:
+            airlines_dict = self._learn_airlines(response.json(), airlines_dict)
+
+        elif response is not None:
+            self._display_error(response)
+
+        return airlines_dict
+
+    async def get_flight_offers(self, input_dict):
+        flight_offers_endpoint = "/v2/shopping/flight-offers"
+
+        #getting the body of the request, based on user input
+        request_body = self.format_flight_offers_body(input_dict)
+
+        #the same search was made recently
+        cache_key = canonical_key(request_body)
+        response_dict = self.flight_offers_cache.get(cache_key)
+        if response_dict is not None:
+            return response_dict
+
+        headers = await self.__get_headers()
+
+        response = await self.__send("POST", flight_offers_endpoint, headers = headers, json = request_body)
+        if response is None:
+            return None
+
+        #if api call successful
+        if response.status_code == 200:
+            response_dict = response.json()
+            self.flight_offers_cache.put(cache_key, response_dict, len(response.content))
+
+            return response_dict
+
+        #call failed
+        else:
+            self._display_error(response)
+            return None
+
+    #makes the flight-destinations call for a single origin city. Returns None if the call failed
+    async def __fetch_cheapest_cities(self, city_code, request_body, semaphore):
+        cheapest_cities_endpoint = "/v1/shopping/flight-destinations"
+
+        headers = await self.__get_headers()
+
+        async with semaphore:
+            response = await self.__send("GET", cheapest_cities_endpoint, headers = headers, params = request_body)
+
+        if response is None:
+            return None
+
+        #if api call successful
+        if response.status_code == 200:
+            try:
+                return response.json()
+            except ValueError:
+                print(f"Could not read the results for {city_code}")
+                return None
+
+        else:
+            self._display_error(response)
+            return None
+
+    #runs in the background to replace a stale flight-destinations result
+    async def __refresh_cheapest_cities(self, city_code, request_body, cache_key, semaphore):
+        try:
+            response_dict = await self.__fetch_cheapest_cities(city_code, request_body, semaphore)
+            if response_dict is not None:
+                self.flight_destinations_cache.put(cache_key, response_dict)
+        finally:
+            self.flight_destinations_cache.end_refresh(cache_key)
+
+    #gets the flight-destinations results for a single origin city, from the cache when possible
+    async def __get_cheapest_cities_from(self, input_dict, city_code, semaphore):
+        #getting the body of the request, based on user input
+        request_body = self._cheapest_cities_params(input_dict, city_code)
+
+        cache_key = canonical_key(request_body)
+        state, response_dict = self.flight_destinations_cache.lookup(cache_key, city_code)
+
+        #serving the stale result right away, and fetching a newer one for next time
+        if state == STALE and self.flight_destinations_cache.begin_refresh(cache_key):
+            task = asyncio.create_task(self.__refresh_cheapest_cities(city_code, request_body, cache_key, semaphore))
+            self.refresh_tasks.add(task)
+            task.add_done_callback(self.refresh_tasks.discard)
+
+        if state != MISSING:
+            return response_dict
+
+        response_dict = await self.__fetch_cheapest_cities(city_code, request_body, semaphore)
+        if response_dict is not None:
+            self.flight_destinations_cache.put(cache_key, response_dict)
+
+        return response_dict
+
+    #same behaviour as ApiCaller.get_cheapest_cities: at most max_in_flight origins are searched at once,
+    #the results are in the order of origin_city_codes and failed origins are left out
+    async def get_cheapest_cities(self, input_dict, origin_city_codes, max_in_flight = MAX_IN_FLIGHT):
+        if not origin_city_codes:
+            return []
+
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        responses = await asyncio.gather(*[
+            self.__get_cheapest_cities_from(input_dict, city_code, semaphore) for city_code in origin_city_codes
+        ])
+
+        return [response_dict for response_dict in responses if response_dict is not None]
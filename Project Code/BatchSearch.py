@@ -0,0 +1,305 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import redirect_stdout
+from ApiCalls import API_CALLER, CITY_INDEX
+from FlightInspiration import MAX_CITIES
+from FlightModels import FlightOffer, TRAVELER_TYPES
+from FormattingData import get_flight_inspo_results, get_airline, get_carrier_codes
+from Metrics import METRICS
+from Validation import (validate_trip, validate_travelers, validate_airport, parse_date, parse_budget,
+                        parse_duration, validate_time_off, get_latest_departure_date)
+
+#runs searches without any prompts: the details of each search are read from a JSONL file (one json
+#object per line) and the results are written to another one, one line per search, as each search finishes.
+#
+#A flight search (like FlightSearch.py):
+#   {"id": "yul-lhr", "type": "flights", "trip": "rt", "travelers": {"ADULT": 2, "CHILD": 1},
+#    "origin_airport": "YUL", "destination_airport": "LHR", "departure_date": "2025-06-12",
+#    "return_date": "2025-06-20", "budget": 2500}
+#"return_date" is only needed for round-trips and "budget" is optional.
+#
+#A flight inspiration search (like FlightInspiration.py):
+#   {"id": "summer", "type": "inspiration", "budget": 600, "time_off": ["2025-08-12", "2025-08-24"],
+#    "duration": "8,10", "origin_cities": ["montreal", "toronto"]}
+#
+#Each result line has the search's "line" number & "id", a "status" ("ok", "invalid" if the details break
+#the same rules the programs enforce, or "failed" if the api calls did), the "error" or the "results", and
+#how long the search waited for a worker ("queued_ms") and took to run ("run_ms").
+#
+#Usage: python BatchSearch.py searches.jsonl [results.jsonl] [--workers N]
+#(- or no results file writes the results to the console)
+
+#how many searches run at the same time. The api calls they make are still paced by the rate limiter
+WORKERS = 8
+#how many searches are read ahead of the ones that are running, so a large file is never read all at once
+QUEUED_PER_WORKER = 2
+
+#the reason a search was not run or did not complete. Its message is written as the result's "error"
+class SearchFailed(Exception):
+    pass
+
+#---Flight search---
+
+#the details of a flight search, as format_flight_offers_body expects them
+def get_flight_details(spec):
+    details = dict()
+
+    details["trip"] = validate_trip(spec.get("trip", "rt"))
+    details["travelers"] = validate_travelers(spec.get("travelers") or {"ADULT": 1})
+
+    details["origin_airport"] = validate_airport(spec.get("origin_airport"))
+    details["destination_airport"] = validate_airport(spec.get("destination_airport"))
+
+    dt_departure_date = parse_date(spec.get("departure_date"))
+    details["departure_date"] = dt_departure_date.strftime("%Y-%m-%d")
+
+    if details.get("trip") == "rt":
+        dt_return_date = parse_date(spec.get("return_date"))
+        if dt_return_date < dt_departure_date:
+            raise ValueError("The return date cannot be before the departure date.")
+
+        details["return_date"] = dt_return_date.strftime("%Y-%m-%d")
+    else:
+        details["return_date"] = None
+
+    if spec.get("budget") is not None:
+        details["max_price"] = parse_budget(spec.get("budget"))
+
+    return details
+
+#a leg of a flight offer, with the name of its airline
+def get_leg_result(itinerary, carrier_code_dict):
+    first_segment = itinerary.segments[0]
+    last_segment = itinerary.segments[-1]
+
+    return {
+        "origin_airport": first_segment.departure_airport,
+        "destination_airport": last_segment.arrival_airport,
+        "departure": first_segment.departure_at.isoformat(),
+        "arrival": last_segment.arrival_at.isoformat(),
+        "duration_minutes": itinerary.get_minutes(),
+        "airline": carrier_code_dict.get(first_segment.carrier_code)
+    }
+
+def run_flight_search(spec):
+    details = get_flight_details(spec)
+
+    with METRICS.span("fetch", pipeline = "flight_offers"):
+        response_dict = API_CALLER.get_flight_offers(details)
+    if response_dict is None:
+        raise SearchFailed("The flight offers search failed.")
+
+    flights = [FlightOffer(offer_dict) for offer_dict in response_dict.get("data") or []]
+
+    #getting the names of all the airlines at once, instead of once per flight
+    with METRICS.span("enrich", pipeline = "flight_offers"):
+        carrier_code_dict = get_airline(get_carrier_codes(flights))
+
+    results = []
+    for flight in flights:
+        results.append({
+            "price": flight.get_price(),
+            "currency": flight.currency,
+            "round_trip": flight.is_round_trip(),
+            "travelers": {traveler_type: count for traveler_type, count in zip(TRAVELER_TYPES, flight.traveler_counts) if count > 0},
+            "legs": [get_leg_result(itinerary, carrier_code_dict) for itinerary in flight.itineraries]
+        })
+
+    return results
+
+#---Flight inspiration search---
+
+#the city code of every origin city, looked up in the known cities first, then with the airport & city
+#search api. A city that can't be found fails the search, since there is nobody to ask to re-enter it
+def get_origin_city_codes(city_names):
+    if isinstance(city_names, str):
+        city_names = [city_names]
+
+    if not city_names:
+        raise ValueError("Must enter at least one city name...")
+
+    if len(city_names) > MAX_CITIES:
+        raise ValueError(f"Sorry, you can only enter up to {MAX_CITIES} cities.")
+
+    city_code_list = []
+    for city_name in city_names:
+        city_name = str(city_name).strip().lower()
+
+        city_code = CITY_INDEX.get(city_name) or API_CALLER.get_city_code(city_name)
+        if not city_code:
+            raise SearchFailed(f"Could not find the city: {city_name}")
+
+        #the same city entered twice is only searched once
+        if city_code not in city_code_list:
+            city_code_list.append(city_code)
+
+    return city_code_list
+
+def run_inspiration_search(spec):
+    details = dict()
+
+    budget = parse_budget(spec.get("budget"))
+
+    time_off = spec.get("time_off")
+    if not isinstance(time_off, (list, tuple)) or len(time_off) != 2:
+        raise ValueError("Enter the window of time you have off as [from, to] (Ex: [\"2025-08-12\", \"2025-08-14\"])")
+
+    earliest, latest = validate_time_off(parse_date(time_off[0]), parse_date(time_off[1]))
+
+    duration, min_duration, max_duration = parse_duration(spec.get("duration"))
+    details["duration"] = duration
+
+    latest_departure_date = get_latest_departure_date(earliest, latest, min_duration)
+    #putting the departure dates in a format the api will understand
+    details["departure_date_range"] = ",".join([earliest.strftime("%Y-%m-%d"), latest_departure_date.strftime("%Y-%m-%d")])
+
+    origin_city_codes = get_origin_city_codes(spec.get("origin_cities"))
+
+    with METRICS.span("fetch", pipeline = "inspiration"):
+        flight_inspo_data_list = API_CALLER.get_cheapest_cities(details, origin_city_codes)
+    #get_cheapest_cities leaves out the origins whose calls failed
+    if len(flight_inspo_data_list) == 0:
+        raise SearchFailed("The flight inspiration search failed for every origin city.")
+
+    fully_sorted_list = get_flight_inspo_results(flight_inspo_data_list, (earliest, latest), (min_duration, max_duration))
+
+    results = []
+    for result in fully_sorted_list:
+        #leaving out the datetime versions of the dates, which are only used for sorting. The budget is
+        #included so each result can be used as the details of a flight search
+        result = {key: value for key, value in result.items() if not key.startswith("dt_")}
+        result["budget"] = budget
+        results.append(result)
+
+    return results
+
+#---Batch---
+
+SEARCH_TYPES = {
+    "flights": run_flight_search,
+    "inspiration": run_inspiration_search
+}
+
+#runs a single search and returns its result line (a dict). Never raises, so that one bad search
+#doesn't stop the batch
+def run_search(line_num, spec, queued_at):
+    started_at = time.perf_counter()
+    result = {"line": line_num, "id": None}
+
+    try:
+        #the line was not valid json
+        if isinstance(spec, ValueError):
+            raise spec
+
+        if not isinstance(spec, dict):
+            raise ValueError("Each line must be a json object.")
+
+        result["id"] = spec.get("id")
+
+        run = SEARCH_TYPES.get(spec.get("type"))
+        if run is None:
+            raise ValueError(f"\"type\" must be one of: {", ".join(SEARCH_TYPES)}")
+
+        result["results"] = run(spec)
+        result["status"] = "ok"
+
+    #the details break one of the rules (see Validation.py)
+    except ValueError as error:
+        result["status"] = "invalid"
+        result["error"] = str(error)
+
+    except SearchFailed as error:
+        result["status"] = "failed"
+        result["error"] = str(error)
+
+    except Exception as error:
+        result["status"] = "failed"
+        result["error"] = f"{type(error).__name__}: {error}"
+
+    finished_at = time.perf_counter()
+    result["queued_ms"] = round((started_at - queued_at) * 1000, 1)
+    result["run_ms"] = round((finished_at - started_at) * 1000, 1)
+
+    return result
+
+#yields (line number, search details) for every line of the file that isn't blank. A line that isn't
+#valid json is passed on as a ValueError, so it gets an "invalid" result like any other bad search
+def read_specs(lines):
+    for line_num, line in enumerate(lines, start = 1):
+        if not line.strip():
+            continue
+
+        try:
+            yield line_num, json.loads(line)
+        except ValueError as error:
+            yield line_num, ValueError(f"Not valid json: {error}")
+
+def write_result(output, result):
+    output.write(json.dumps(result, ensure_ascii = False) + "\n")
+    #each result is written out as soon as its search finishes
+    output.flush()
+
+#runs every search in lines (the lines of a JSONL file) on workers threads and writes each result to output
+#as soon as it is ready, in the order they finish. Returns a count of the results by status
+def run_batch(lines, output, workers = WORKERS):
+    counts = {"ok": 0, "invalid": 0, "failed": 0}
+    max_queued = workers * (1 + QUEUED_PER_WORKER)
+
+    def finish(futures):
+        for future in futures:
+            result = future.result()
+            counts[result.get("status")] += 1
+            write_result(output, result)
+
+    with ThreadPoolExecutor(max_workers = workers) as executor:
+        pending = set()
+
+        for line_num, spec in read_specs(lines):
+            #waiting for some of the searches to finish before reading any further
+            if len(pending) >= max_queued:
+                done, pending = wait(pending, return_when = FIRST_COMPLETED)
+                finish(done)
+
+            pending.add(executor.submit(run_search, line_num, spec, time.perf_counter()))
+
+        while pending:
+            done, pending = wait(pending, return_when = FIRST_COMPLETED)
+            finish(done)
+
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description = "Runs flight & flight inspiration searches from a JSONL file.")
+    parser.add_argument("searches", help = "JSONL file with one search per line (- to read from the console)")
+    parser.add_argument("results", nargs = "?", default = "-", help = "JSONL file to write the results to (default: the console)")
+    parser.add_argument("--workers", type = int, default = WORKERS, help = f"searches to run at the same time (default: {WORKERS})")
+    args = parser.parse_args()
+
+    if args.workers <= 0:
+        parser.error("--workers must be greater than 0")
+
+    started_at = time.perf_counter()
+
+    input_file = sys.stdin if args.searches == "-" else open(args.searches, "r", encoding = "utf-8")
+    output_file = sys.stdout if args.results == "-" else open(args.results, "w", encoding = "utf-8")
+
+    try:
+        #anything the api calls print (i.e. error messages) goes to stderr, so only results end up in output_file
+        with redirect_stdout(sys.stderr):
+            counts = run_batch(input_file, output_file, args.workers)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    seconds = time.perf_counter() - started_at
+    total = sum(counts.values())
+    print(f"{total} searches in {seconds:.1f}s ({counts["ok"]} ok, {counts["invalid"]} invalid, {counts["failed"]} failed)", file = sys.stderr)
+
+#---Main---
+if __name__ == "__main__":
+    main()
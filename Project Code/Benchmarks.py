@@ -0,0 +1,652 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timedelta
+from FuzzyMatch import CityMatcher, min_distance
+from FlightModels import FlightOffer
+from FormattingData import format_leg
+from JsonStream import iter_json_array
+
+#same ratio as FlightInspiration.SIMILARITY_RATIO
+SIMILARITY_RATIO = 0.65
+
+#the folder the programs are in, so the benchmarks can be run from anywhere
+PROJECT_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+#the first thing each program asks the user
+FIRST_PROMPTS = {
+    "FlightInspiration.py": "First up, what's your budget?: $",
+    "FlightSearch.py": "Type 'rt' if you're looking for a round-trip flight or 'ow' if you're looking for a one-way flight: "
+}
+
+#the scales the hot path benchmarks run at: name -> (number of rows, offers or cities, min timed runs)
+SCALES = {
+    "small": (10**2, 20),
+    "medium": (10**4, 5),
+    "large": (10**6, 2)
+}
+#each hot path is run more times than its scale's min if that takes less than this many seconds, so that
+#one slow run (i.e. the machine being busy) matters less
+MIN_TIMING_SECONDS = 1
+MAX_RUNS = 1000
+DEFAULT_SCALES = ["small", "medium"]
+#the paths that work on flight offers stop at this many. A search returns at most 250 offers, and a
+#million of them would take gigabytes of memory
+MAX_OFFERS = 10**5
+#how many misspelled names did_you_mean looks up, whatever the number of cities
+NUM_LOOKUPS = 100
+
+#the results the hot path benchmarks are compared against. A time more than REGRESSION_TOLERANCE
+#(0.25 -> 25%) slower than its baseline is a regression. The baseline is only meaningful on the machine
+#it was saved on, so save a new one (--save-baseline) before comparing on another machine
+BASELINE_FILE = os.path.join(PROJECT_FOLDER, "benchmark_baseline.json")
+REGRESSION_TOLERANCE = 0.25
+
+#---Synthetic data---
+
+#a made up, pronounceable city name, i.e. "kalomer" or "tiva bon"
+def make_city_name(rng):
+    consonants = "bcdfghjklmnprstvwz"
+    vowels = "aeiou"
+
+    words = []
+    for x in range(1 if rng.random() < 0.8 else 2):
+        syllables = []
+        for y in range(rng.randint(1, 4)):
+            syllable = rng.choice(consonants) + rng.choice(vowels)
+            if rng.random() < 0.4:
+                syllable += rng.choice(consonants)
+            syllables.append(syllable)
+        words.append("".join(syllables))
+
+    return " ".join(words)
+
+#up to num_names distinct made up city names
+def make_city_names(num_names, rng):
+    names = dict()
+    #a few extra attempts, since some names come out the same
+    for x in range(num_names * 2):
+        names[make_city_name(rng)] = None
+        if len(names) == num_names:
+            break
+
+    return list(names)
+
+#the name with 1 to 3 random typos (a letter added, removed or replaced)
+def misspell(name, rng):
+    letters = list(name)
+
+    for x in range(rng.randint(1, 3)):
+        position = rng.randint(0, len(letters) - 1)
+        typo = rng.randint(0, 2)
+
+        if typo == 0:
+            letters.insert(position, rng.choice("abcdefghijklmnopqrstuvwxyz"))
+        elif typo == 1 and len(letters) > 1:
+            del letters[position]
+        else:
+            letters[position] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+
+    return "".join(letters)
+
+#a made up itinerary, in the format of the flight offers api
+def make_itinerary(origin, destination, departure, rng):
+    segments = []
+    airports = [origin] + ["".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for x in range(3)) for y in range(rng.randint(0, 2))] + [destination]
+
+    at = departure
+    for departure_airport, arrival_airport in zip(airports, airports[1:]):
+        arrival = at + timedelta(minutes = rng.randint(45, 600))
+        segments.append({
+            "departure": {"iataCode": departure_airport, "at": at.isoformat()},
+            "arrival": {"iataCode": arrival_airport, "at": arrival.isoformat()},
+            "carrierCode": rng.choice(["AC", "BA", "AF", "LH", "UA", "DL", "KL", "WS"]),
+            "number": str(rng.randint(1, 9999))
+        })
+        at = arrival + timedelta(minutes = rng.randint(40, 240))
+
+    #from the first departure to the last arrival
+    total_minutes = int((arrival - departure).total_seconds() // 60)
+    return {"duration": f"PT{total_minutes // 60}H{total_minutes % 60}M", "segments": segments}
+
+#a made up flight offer, in the format of the flight offers api
+def make_flight_offer(offer_id, rng):
+    departure = datetime(2030, 1, 1) + timedelta(days = rng.randint(0, 300), minutes = rng.randint(0, 1439))
+    itineraries = [make_itinerary("YUL", "LHR", departure, rng)]
+
+    #about 2 out of 3 offers are round-trips
+    if rng.random() < 0.66:
+        itineraries.append(make_itinerary("LHR", "YUL", departure + timedelta(days = rng.randint(3, 20)), rng))
+
+    travelers = ["ADULT"] * rng.randint(1, 3) + ["CHILD"] * rng.randint(0, 2)
+
+    return {
+        "type": "flight-offer",
+        "id": str(offer_id),
+        "itineraries": itineraries,
+        "price": {"currency": "CAD", "total": "0", "grandTotal": f"{rng.uniform(300, 3000):.2f}"},
+        "travelerPricings": [{"travelerId": str(i + 1), "travelerType": traveler_type} for i, traveler_type in enumerate(travelers)]
+    }
+
+#num_results flight inspiration results, as get_flight_inspo_results returns them before they are grouped
+def make_inspo_results(num_results, rng):
+    countries = [name.title() for name in make_city_names(max(num_results // 100, 1), rng)]
+    #a few results per city, so that the grouping has duplicates to remove
+    cities = [(name.title(), rng.choice(countries)) for name in make_city_names(max(num_results // 5, 1), rng)]
+
+    results = []
+    for x in range(num_results):
+        city_name, country_name = rng.choice(cities)
+        departure_date = datetime(2030, 1, 1) + timedelta(days = rng.randint(0, 3))
+
+        results.append({
+            "departure_date": departure_date.strftime("%Y-%m-%d"),
+            "return_date": (departure_date + timedelta(days = 6)).strftime("%Y-%m-%d"),
+            "origin_airport": rng.choice(["YUL", "YYZ"]),
+            "destination_airport": city_name[:3].upper(),
+            "destination_city_name": city_name,
+            "destination_country_name": country_name
+        })
+
+    return results
+
+#num_entries made up flight-destinations entries from 3 origins, in the format of the flight inspiration
+#api, and the city & country of all their airports
+def make_flight_destinations(num_entries, rng):
+    locations = {"YUL": {"city_name": "Montreal", "country_name": "Canada"}}
+    for x in range(max(num_entries // 5, 1)):
+        airport_code = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for y in range(3))
+        locations[airport_code] = {"city_name": make_city_name(rng).title(), "country_name": make_city_name(rng).title()}
+    airport_codes = list(locations)
+
+    flight_inspo_data_list = [{"data": []} for x in range(3)]
+    for x in range(num_entries):
+        departure_date = datetime(2030, 1, 1) + timedelta(days = rng.randint(0, 40))
+        #some trips are too long or end after the time off, and get filtered out
+        return_date = departure_date + timedelta(days = rng.randint(3, 12))
+
+        rng.choice(flight_inspo_data_list)["data"].append({
+            "type": "flight-destination",
+            "origin": "YUL",
+            "destination": rng.choice(airport_codes),
+            "departureDate": departure_date.strftime("%Y-%m-%d"),
+            "returnDate": return_date.strftime("%Y-%m-%d"),
+            "price": {"total": f"{rng.uniform(200, 1500):.2f}"}
+        })
+
+    return flight_inspo_data_list, locations
+
+#---Benchmarks---
+
+#how did_you_mean used to find suggestions: computing the distance to every single city
+def brute_force_suggestions(input_city, names):
+    suggestions = []
+    for city in names:
+        similarity = 1 - (min_distance(input_city, city) / max(len(input_city), len(city)))
+
+        if similarity >= SIMILARITY_RATIO:
+            suggestions.append(city)
+
+    return suggestions
+
+#times CityMatcher lookups of misspelled names among num_names made up city names, and checks
+#that the first num_checked lookups return exactly what the brute force search returns
+def benchmark_fuzzy_match(num_names = 50000, num_lookups = 1000, num_checked = 5, seed = 0):
+    rng = random.Random(seed)
+    names = make_city_names(num_names, rng)
+    misspellings = [misspell(rng.choice(names), rng) for x in range(num_lookups)]
+
+    start = time.perf_counter()
+    matcher = CityMatcher(names, SIMILARITY_RATIO)
+    build_time = time.perf_counter() - start
+
+    lookup_times = []
+    for misspelling in misspellings:
+        start = time.perf_counter()
+        matcher.suggestions(misspelling)
+        lookup_times.append(time.perf_counter() - start)
+
+    lookup_times.sort()
+
+    start = time.perf_counter()
+    for misspelling in misspellings[:num_checked]:
+        if matcher.suggestions(misspelling) != brute_force_suggestions(misspelling, names):
+            raise AssertionError(f"CityMatcher and the brute force search disagree on {misspelling!r}")
+    brute_force_time = (time.perf_counter() - start) / max(num_checked, 1)
+
+    print(f"Fuzzy matching among {len(names)} city names ({num_lookups} lookups)")
+    print(f"\tIndex built in: {build_time * 1000:.1f} ms")
+    print(f"\tMean lookup: {sum(lookup_times) / len(lookup_times) * 1000:.3f} ms")
+    print(f"\tMedian lookup: {lookup_times[len(lookup_times) // 2] * 1000:.3f} ms")
+    print(f"\t95th percentile lookup: {lookup_times[int(len(lookup_times) * 0.95)] * 1000:.3f} ms")
+    print(f"\tBrute force lookup (as before): {brute_force_time * 1000:.1f} ms")
+    print(f"\tSame suggestions as brute force for the {num_checked} lookups checked")
+
+#starts a program in a new python process, the same way a user would, and returns how many seconds
+#it takes until its first prompt shows up. The program is stopped right after
+def time_to_first_prompt(script, prompt):
+    prompt = prompt.encode("utf-8")
+    output = b""
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, script],
+        cwd = PROJECT_FOLDER,
+        stdin = subprocess.PIPE,
+        stdout = subprocess.PIPE,
+        stderr = subprocess.DEVNULL,
+        env = dict(os.environ, PYTHONIOENCODING = "utf-8")
+    )
+
+    try:
+        while not output.endswith(prompt):
+            byte = process.stdout.read(1)
+            if not byte:
+                raise RuntimeError(f"{script} exited before showing its first prompt")
+            output += byte
+
+        return time.perf_counter() - start
+    finally:
+        process.kill()
+        process.wait()
+
+#returns how many seconds it takes a new python process to import a module (including starting python)
+def time_to_import(module_name):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module_name}"], cwd = PROJECT_FOLDER, check = True)
+
+    return time.perf_counter() - start
+
+#times how long each program takes to start, from launching python to the first prompt being shown,
+#and how long importing each library module takes. Importing must not make any network calls, so
+#these times don't depend on the api at all
+def benchmark_startup(num_runs = 5):
+    print(f"Startup times (median of {num_runs} runs)")
+
+    for script, prompt in FIRST_PROMPTS.items():
+        times = sorted(time_to_first_prompt(script, prompt) for x in range(num_runs))
+        print(f"	{script} to first prompt: {times[num_runs // 2] * 1000:.1f} ms")
+
+    for module_name in ["ApiCalls", "FormattingData", "FlightInspiration", "FlightSearch"]:
+        times = sorted(time_to_import(module_name) for x in range(num_runs))
+        print(f"	import {module_name}: {times[num_runs // 2] * 1000:.1f} ms")
+
+#how format_flight_offers_data used to read a leg of an offer: walking the nested dictionaries again
+#for every field, and parsing the same dates once for the date and once more for the times
+def read_leg_from_dict(flight, index):
+    duration = flight.get("itineraries")[index].get("duration")[2:]
+    hours = duration[:duration.find("H")] if "H" in duration else 0
+    mins = duration[duration.find("H") + 1 : duration.find("M")] if "M" in duration else 0
+
+    air1 = flight.get("itineraries")[index].get("segments")[0].get("departure").get("iataCode")
+    air2 = flight.get("itineraries")[index].get("segments")[0].get("arrival").get("iataCode")
+
+    departure_at = datetime.fromisoformat(flight.get("itineraries")[index].get("segments")[0].get("departure").get("at"))
+    arrival_at = datetime.fromisoformat(flight.get("itineraries")[index].get("segments")[0].get("arrival").get("at"))
+    date = departure_at.strftime("%b %d, %Y")
+
+    departure_at = datetime.fromisoformat(flight.get("itineraries")[index].get("segments")[0].get("departure").get("at"))
+    arrival_at = datetime.fromisoformat(flight.get("itineraries")[index].get("segments")[0].get("arrival").get("at"))
+    departure_time = departure_at.strftime("%#I:%M %p").lstrip("0")
+    arrival_time = arrival_at.strftime("%#I:%M %p").lstrip("0")
+
+    flight.get("itineraries")[index].get("segments")[0].get("carrierCode")
+
+    return f"""{date}
+{air1} -> {air2}
+{hours} hr {mins} min
+{departure_time} - {arrival_time}"""
+
+#compares reading num_offers made up offers through the FlightOffer model with walking their
+#dictionaries the way format_flight_offers_data used to, and checks that both display the same legs.
+#Also compares the memory taken by the offers as FlightOffers and as decoded json
+def benchmark_flight_models(num_offers = 10000, seed = 0):
+    rng = random.Random(seed)
+    text = json.dumps({"meta": {"count": num_offers}, "data": [make_flight_offer(offer_id, rng) for offer_id in range(num_offers)]})
+    offer_dicts = json.loads(text)["data"]
+
+    #the garbage collector would otherwise go through all the offers in memory at random points of the
+    #timings below (timeit turns it off for the same reason)
+    gc.disable()
+
+    start = time.perf_counter()
+    dict_legs = [[read_leg_from_dict(flight, index) for index in range(len(flight.get("itineraries")))] for flight in offer_dicts]
+    dict_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    offers = [FlightOffer(offer_dict) for offer_dict in offer_dicts]
+    parse_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model_legs = [[format_leg(itinerary) for itinerary in offer.itineraries] for offer in offers]
+    format_time = time.perf_counter() - start
+
+    if dict_legs != model_legs:
+        raise AssertionError("The FlightOffer model and the dictionaries display different legs")
+
+    start = time.perf_counter()
+    sorted(offer_dicts, key = lambda flight: (float(flight.get("price").get("grandTotal")), flight.get("itineraries")[0].get("duration")))
+    dict_sort_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sorted(offers, key = lambda offer: (offer.get_price(), offer.itineraries[0].get_minutes()))
+    model_sort_time = time.perf_counter() - start
+
+    gc.enable()
+
+    del offer_dicts, offers
+
+    tracemalloc.start()
+    offer_dicts = json.loads(text)["data"]
+    dict_memory = tracemalloc.get_traced_memory()[0]
+    del offer_dicts
+    tracemalloc.stop()
+
+    #all the FlightOffers are kept in the list so the memory they take is counted, while their dictionaries
+    #are decoded one offer at a time, so the dictionaries of only one offer exist at any time
+    tracemalloc.start()
+    offers = [FlightOffer(offer_dict) for offer_dict in iter_json_array([text], "data")]
+    model_memory, model_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del offers
+
+    print(f"Flight offer model ({num_offers} offers)")
+    print(f"	Reading & formatting the legs from the dictionaries: {dict_time * 1000:.1f} ms")
+    print(f"	Parsing into FlightOffers: {parse_time * 1000:.1f} ms, then formatting the legs: {format_time * 1000:.1f} ms")
+    print(f"	Sorting by price & duration: {dict_sort_time * 1000:.1f} ms (dictionaries) vs {model_sort_time * 1000:.1f} ms (FlightOffers)")
+    print(f"	Memory: {dict_memory / 2**20:.1f} MB (dictionaries) vs {model_memory / 2**20:.1f} MB (FlightOffers, peak {model_peak / 2**20:.1f} MB while decoding)")
+    print(f"	Same legs displayed for all {num_offers} offers")
+
+#---Hot paths---
+
+#stands in for API_CALLER while the hot paths are timed, answering from made up data without any calls
+class StubApiCaller:
+    def __init__(self, locations):
+        self.locations = locations
+
+    def get_locations(self, airport_codes):
+        return {airport_code: self.locations.get(airport_code) for airport_code in airport_codes}
+
+    def get_airline_data(self, joined_to_lookup, airlines_dict):
+        for carrier_code in joined_to_lookup.split(", "):
+            airlines_dict[carrier_code] = f"{carrier_code} Airways"
+
+        return airlines_dict
+
+#runs the with block with the api calls of FormattingData answered by a StubApiCaller, every prompt
+#answered with "y", and the reference data (i.e. the airlines learned) kept in a throwaway store
+@contextmanager
+def stubbed_api():
+    import ApiCalls
+    import FormattingData
+
+    real_api_caller = FormattingData.API_CALLER
+    real_db_path = ApiCalls.REFERENCE_STORE.db_path
+    real_import_files = ApiCalls.REFERENCE_STORE.import_files
+
+    temp_folder = tempfile.TemporaryDirectory()
+    ApiCalls.REFERENCE_STORE.db_path = os.path.join(temp_folder.name, "reference_data.db")
+    ApiCalls.REFERENCE_STORE.import_files = (None, None, None)
+    FormattingData.API_CALLER = StubApiCaller(dict())
+    FormattingData.input = lambda prompt: "y"
+
+    try:
+        yield FormattingData.API_CALLER
+    finally:
+        #written to the throwaway store now, rather than to the real one when the program exits
+        ApiCalls.AIRLINE_INDEX.flush()
+
+        del FormattingData.input
+        FormattingData.API_CALLER = real_api_caller
+        ApiCalls.REFERENCE_STORE.db_path = real_db_path
+        ApiCalls.REFERENCE_STORE.import_files = real_import_files
+        temp_folder.cleanup()
+
+#each case builds its made up data for the given size (not timed) and returns (the function to time,
+#the number of items it goes through)
+
+def min_distance_case(size, rng, api):
+    names = make_city_names(min(size, 10**4), rng)
+    pairs = [(misspell(name, rng), rng.choice(names)) for name in (rng.choice(names) for x in range(size))]
+
+    return lambda: [min_distance(word1, word2) for word1, word2 in pairs], size
+
+def did_you_mean_case(size, rng, api):
+    from FlightInspiration import did_you_mean
+
+    names = make_city_names(size, rng)
+    city_dict = dict.fromkeys(names, "XXX")
+    misspellings = [misspell(rng.choice(names), rng) for x in range(NUM_LOOKUPS)]
+
+    #the matcher is built by the first call and kept for the next ones, like in the program
+    did_you_mean(misspellings[0], city_dict)
+
+    return lambda: [did_you_mean(misspelling, city_dict) for misspelling in misspellings], NUM_LOOKUPS
+
+def group_by_case(size, rng, api):
+    from FormattingData import group_by
+
+    results_list = make_inspo_results(size, rng)
+
+    return lambda: group_by("destination_city_name", group_by("destination_country_name", results_list)), size
+
+def format_flight_inspo_data_case(size, rng, api):
+    from FormattingData import format_flight_inspo_data
+
+    flight_inspo_data_list, api.locations = make_flight_destinations(size, rng)
+    time_off = (datetime(2030, 1, 1), datetime(2030, 2, 1))
+
+    def run():
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            format_flight_inspo_data(flight_inspo_data_list, time_off, (5, 9))
+
+    return run, size
+
+#size made up flight offers, read into FlightOffers
+def make_flight_offers(size, rng):
+    return [FlightOffer(make_flight_offer(offer_id, rng)) for offer_id in range(size)]
+
+def format_duration_case(size, rng, api):
+    from FormattingData import format_duration
+
+    itineraries = [offer.itineraries[0] for offer in make_flight_offers(size, rng)]
+
+    return lambda: [format_duration(itinerary) for itinerary in itineraries], size
+
+#format_leg is what used to be get_leg_info
+def format_leg_case(size, rng, api):
+    itineraries = [offer.itineraries[0] for offer in make_flight_offers(size, rng)]
+
+    return lambda: [format_leg(itinerary) for itinerary in itineraries], size
+
+def get_travelers_case(size, rng, api):
+    from FormattingData import get_travelers
+
+    offers = make_flight_offers(size, rng)
+
+    return lambda: [get_travelers(offer) for offer in offers], size
+
+def format_flight_offers_data_case(size, rng, api):
+    from FormattingData import format_flight_offers_data
+
+    offer_dicts = [make_flight_offer(offer_id, rng) for offer_id in range(size)]
+
+    def run():
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            format_flight_offers_data(offer_dicts, 8)
+
+    return run, size
+
+#name -> (case, largest size it runs at)
+HOT_PATHS = {
+    "min_distance": (min_distance_case, None),
+    "did_you_mean": (did_you_mean_case, None),
+    "group_by": (group_by_case, None),
+    "format_flight_inspo_data": (format_flight_inspo_data_case, None),
+    "format_duration": (format_duration_case, MAX_OFFERS),
+    "format_leg": (format_leg_case, MAX_OFFERS),
+    "get_travelers": (get_travelers_case, MAX_OFFERS),
+    "format_flight_offers_data": (format_flight_offers_data_case, MAX_OFFERS)
+}
+
+#the sorted durations of at least min_runs runs of the function (more if they take less than
+#MIN_TIMING_SECONDS), after one run that isn't counted (the first run pays for imports & caches).
+#The garbage collector is off while timing, like timeit does
+def time_runs(function, min_runs):
+    function()
+
+    times = []
+    gc.disable()
+    try:
+        while len(times) < MAX_RUNS and (len(times) < min_runs or sum(times) < MIN_TIMING_SECONDS):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    return sorted(times)
+
+#adds how much slower (or faster, if negative) the result is than the baseline's to the result, if the
+#baseline has one for the same key
+def compare_to_baseline(key, result, baseline):
+    baseline_result = baseline.get("results", dict()).get(key)
+    if baseline_result is None:
+        return
+
+    #the median run is compared: the fastest one depends too much on luck on a busy machine
+    result["baseline_median_s"] = baseline_result["median_s"]
+    result["change"] = round(result["median_s"] / baseline_result["median_s"] - 1, 4)
+
+#times the cpu-bound functions of the programs on made up data at each of the scales, with the api calls
+#stubbed out, and compares the times with the baseline file (if there is one). The data is the same on
+#every run (same seed), so the times of two runs can be compared. Returns the keys of the regressions
+def benchmark_hot_paths(scales = DEFAULT_SCALES, paths = HOT_PATHS, json_file = None, baseline_file = BASELINE_FILE, save_baseline = False, tolerance = REGRESSION_TOLERANCE, seed = 0):
+    results = dict()
+
+    print(f"Hot paths (scales: {", ".join(scales)})")
+    print(f"\t{"path":<28}{"size":>9}{"best":>12}{"median":>12}{"per item":>12}{"vs baseline":>14}")
+
+    baseline = None
+    if not save_baseline and baseline_file and os.path.exists(baseline_file):
+        with open(baseline_file, "r") as file:
+            baseline = json.load(file)
+
+    with stubbed_api() as api:
+        for name in paths:
+            case, max_size = HOT_PATHS[name]
+
+            for scale in scales:
+                size, min_runs = SCALES[scale]
+                if max_size is not None and size > max_size:
+                    continue
+
+                function, num_items = case(size, random.Random(seed), api)
+                times = time_runs(function, min_runs)
+                del function
+
+                result = {
+                    "path": name,
+                    "size": size,
+                    "runs": len(times),
+                    "best_s": times[0],
+                    "median_s": times[len(times) // 2],
+                    "per_item_us": times[len(times) // 2] / num_items * 10**6
+                }
+
+                key = f"{name}/{size}"
+                results[key] = result
+                if baseline is not None:
+                    compare_to_baseline(key, result, baseline)
+
+                change = result.get("change")
+                if change is None:
+                    compared = "-"
+                else:
+                    compared = f"{change * 100:+.0f}%" + (" !!" if change > tolerance else "")
+
+                print(f"\t{name:<28}{size:>9}{result["best_s"] * 1000:>10.2f}ms{result["median_s"] * 1000:>10.2f}ms{result["per_item_us"]:>10.2f}us{compared:>14}")
+
+    regressions = [key for key, result in results.items() if result.get("change", 0) > tolerance]
+
+    output = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "tolerance": tolerance,
+        "results": results,
+        "regressions": regressions
+    }
+
+    if baseline is not None:
+        if baseline.get("platform") != output["platform"] or baseline.get("python") != output["python"]:
+            print(f"\tThe baseline is from {baseline.get("platform")}, python {baseline.get("python")}, the comparison may not mean much")
+
+        if regressions:
+            print(f"\t{len(regressions)} slower than the baseline by more than {tolerance * 100:.0f}% (!!): {", ".join(regressions)}")
+        else:
+            print(f"\tNo regressions against the baseline ({tolerance * 100:.0f}% tolerance)")
+
+    if json_file:
+        with open(json_file, "w") as file:
+            json.dump(output, file, indent = 4)
+
+    if save_baseline:
+        output.pop("regressions")
+        with open(baseline_file, "w") as file:
+            json.dump(output, file, indent = 4)
+        print(f"\tSaved as the baseline: {baseline_file}")
+
+    return regressions
+
+BENCHMARKS = {
+    "fuzzy": benchmark_fuzzy_match,
+    "startup": benchmark_startup,
+    "models": benchmark_flight_models,
+    "hot": benchmark_hot_paths
+}
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmarks the programs.")
+    parser.add_argument("benchmarks", nargs = "*", help = f"benchmarks to run, out of {", ".join(BENCHMARKS)} (default: all of them)")
+    parser.add_argument("--scales", default = ",".join(DEFAULT_SCALES), help = f"hot path scales, out of {", ".join(SCALES)} (default: {",".join(DEFAULT_SCALES)})")
+    parser.add_argument("--paths", default = ",".join(HOT_PATHS), help = "hot paths to time (default: all of them)")
+    parser.add_argument("--json", help = "file to write the hot path results to, as json")
+    parser.add_argument("--baseline", default = BASELINE_FILE, help = "baseline file to compare the hot paths with (default: benchmark_baseline.json)")
+    parser.add_argument("--save-baseline", action = "store_true", help = "save the hot path results as the new baseline instead of comparing")
+    parser.add_argument("--tolerance", type = float, default = REGRESSION_TOLERANCE, help = f"slowdown that counts as a regression (default: {REGRESSION_TOLERANCE})")
+    args = parser.parse_args()
+
+    scales = args.scales.split(",")
+    paths = args.paths.split(",")
+    for names, known in ((args.benchmarks, BENCHMARKS), (scales, SCALES), (paths, HOT_PATHS)):
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            parser.error(f"unknown: {", ".join(unknown)} (choose from {", ".join(known)})")
+
+    regressions = []
+    for name in args.benchmarks or BENCHMARKS:
+        if name == "hot":
+            regressions = benchmark_hot_paths(scales, paths, args.json, args.baseline, args.save_baseline, args.tolerance)
+        else:
+            BENCHMARKS[name]()
+        print()
+
+    #so a script (i.e. before a release) can tell that something got slower
+    if regressions:
+        sys.exit(1)
+
+#---Main---
+#Usage: python Benchmarks.py [benchmark name ...] [--scales small,medium,large] [--json results.json] [--save-baseline]
+#(runs all of them if none are given)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from RateLimiter import TokenBucket
+
+#the origins to keep warm, as city codes (the values of city_codes.json), i.e. ["YMQ", "YTO", "LON"].
+#The search daemon only starts a warmer if there are some
+WARM_ORIGINS = []
+#the trip durations to warm, in the format the flight inspiration program sends them, i.e. "7" or "5,8"
+WARM_DURATIONS = ["7"]
+#rolling departure windows, as (days from today to the first departure date, number of days in the window)
+WARM_WINDOWS = [(7, 14), (21, 30)]
+#seconds between two warming runs, and how much each wait randomly varies (0.1 -> up to 10% either way),
+#so that the runs don't line up with other periodic traffic
+WARM_INTERVAL = 20 * 60
+WARM_JITTER = 0.1
+#max flight-destinations calls per second the warmer makes. They are also sent at PREFETCH priority,
+#so searches a user is waiting on always go first
+WARM_RATE = 0.5
+
+#fills the flight-destinations cache of an ApiCaller ahead of time with the results of the searches that
+#are made the most (every combination of origin, duration & departure window), on a schedule, so the
+#searches made at peak times are answered from the cache instead of waiting on the api.
+#
+#It keeps track of how many times each combination was warmed and how many times its warmed results were
+#then served to a search (see report()), to tell which ones are worth warming
+class CacheWarmer:
+    def __init__(self, api_caller, origins, durations, windows, interval, jitter, rate):
+        self.api_caller = api_caller
+        self.cache = api_caller.flight_destinations_cache
+
+        self.origins = list(origins)
+        self.durations = list(durations)
+        self.windows = list(windows)
+
+        self.interval = interval
+        self.jitter = jitter
+        #paces the warming calls, one at a time
+        self.bucket = TokenBucket(rate, 1)
+
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.lock = threading.Lock()
+        #cache key -> (label of its combination, time.monotonic() it was last warmed at), for the entries
+        #that could still be served
+        self.warmed_keys = dict()
+        #label -> how many times the combination was "warmed", "cached", "failed" & "served"
+        self.totals = dict()
+        self.runs = 0
+
+    #(label, origin, input_dict) of every combination to warm, in the format get_cheapest_cities takes.
+    #The departure windows are relative to today
+    def get_jobs(self):
+        todays_date = datetime.today()
+        jobs = []
+
+        for origin in self.origins:
+            for duration in self.durations:
+                for days_ahead, num_days in self.windows:
+                    earliest = todays_date + timedelta(days = days_ahead)
+                    latest = earliest + timedelta(days = num_days - 1)
+
+                    input_dict = {
+                        "duration": duration,
+                        "departure_date_range": ",".join([earliest.strftime("%Y-%m-%d"), latest.strftime("%Y-%m-%d")])
+                    }
+
+                    label = (origin, duration, f"+{days_ahead}d, {num_days}d")
+                    jobs.append((label, origin, input_dict))
+
+        return jobs
+
+    #must be called with self.lock held
+    def __count(self, label, outcome, amount = 1):
+        counts = self.totals.setdefault(label, {"warmed": 0, "cached": 0, "failed": 0, "served": 0})
+        counts[outcome] += amount
+
+    #adds up how many times the warmed entries were served since last time, and forgets the entries that
+    #are too old to be served anymore
+    def collect_served(self):
+        now = time.monotonic()
+
+        with self.lock:
+            for cache_key, (label, warmed_at) in list(self.warmed_keys.items()):
+                self.__count(label, "served", self.cache.take_warmed_served(cache_key))
+
+                max_age = self.cache.get_ages(label[0])[1]
+                if now - warmed_at >= max_age:
+                    del self.warmed_keys[cache_key]
+
+    #warms every combination once. An entry that would go stale before the next run is warmed again now,
+    #fresher ones are left alone
+    def run_once(self):
+        self.collect_served()
+
+        jobs = self.get_jobs()
+        #a different order every run, so a run cut short by the rate budget doesn't always skip the same ones
+        random.shuffle(jobs)
+
+        for label, origin, input_dict in jobs:
+            if self.stop_event.is_set():
+                return
+
+            fresh_for = self.cache.get_ages(origin)[0]
+            refresh_after = max(fresh_for - self.interval * (1 + self.jitter), 0)
+
+            cache_key, outcome = self.api_caller.warm_cheapest_cities(input_dict, origin, refresh_after)
+
+            with self.lock:
+                self.__count(label, outcome)
+                if outcome == "warmed":
+                    self.warmed_keys[cache_key] = (label, time.monotonic())
+
+            #only the calls that reached the api count against the rate budget
+            if outcome != "cached":
+                wait = self.bucket.reserve()
+                if wait > 0 and self.stop_event.wait(wait):
+                    return
+
+        with self.lock:
+            self.runs += 1
+
+    def __run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as error:
+                print("Cache warming run failed: ", error)
+
+            wait = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            self.stop_event.wait(wait)
+
+    #warms the cache right away, then every interval seconds (give or take the jitter) in the background
+    def start(self):
+        self.thread = threading.Thread(target = self.__run, daemon = True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    #what warming each combination achieved, the most served first
+    def report(self):
+        self.collect_served()
+
+        with self.lock:
+            combinations = []
+            for (origin, duration, window), counts in self.totals.items():
+                combinations.append({"origin": origin, "duration": duration, "window": window, **counts})
+
+            runs = self.runs
+
+        combinations.sort(key = lambda combination: (-combination["served"], combination["origin"]))
+
+        return {"runs": runs, "combinations": combinations}
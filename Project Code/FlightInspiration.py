@@ -1,117 +1,63 @@
-import json
-from datetime import datetime, timedelta
-from ApiCalls import API_CALLER
+from ApiCalls import API_CALLER, CITY_INDEX
 from FormattingData import format_flight_inspo_data, format_flight_offers_data
+from FuzzyMatch import CityMatcher
+from Metrics import METRICS
+from Prefetcher import Prefetcher
+from Validation import parse_date, parse_budget, parse_duration, validate_time_off, get_latest_departure_date
 
 #max number of cities the user can select to fly from
 MAX_CITIES = 5
 SIMILARITY_RATIO = 0.65
 #how many flights to display to the user at a time
 PER_PAGE = 8
-
-CITY_CODES_FILE = r"file path of the city_codes file"
+#while the user reads the flight options, the flights of the first PREFETCH_TOP_K options are searched in
+#the background so the one they pick shows up right away (0 turns this off). At most PREFETCH_QUOTA of
+#these searches are made per run, PREFETCH_MAX_IN_FLIGHT at a time
+PREFETCH_TOP_K = 3
+PREFETCH_QUOTA = 5
+PREFETCH_MAX_IN_FLIGHT = 2
 
 #getting a date and ensuring it was entered using the proper format (i.e. YYYY-MM-DD)
 def get_date(prompt):
-    input_date = input(prompt).strip()
+    input_date = input(prompt)
     while True:
         try:
-            date_object = datetime.strptime(input_date, "%Y-%m-%d")
-
-            todays_date = datetime.today()
-
-            if date_object > todays_date:
-                return date_object
-            else:
-                input_date = input("Please enter a date later than today's date: ").strip()
+            return parse_date(input_date)
 
-        #if the date that was entered cannot be parsed into the proper format (YYYY-MM-DD)
-        except ValueError:
-            input_date = input("Date must be entered in the following format -> YYYY-MM-DD: ").strip()
+        #the date is not in the proper format, or is not later than today's date
+        except ValueError as error:
+            input_date = input(f"{error}: ")
 
 def get_duration():
     while True:
-        dur_input = input("\nEnter the duration of your trip in days (Ex: 8) (Can be a range: Ex: 8,10): ").strip().split(",")
+        dur_input = input("\nEnter the duration of your trip in days (Ex: 8) (Can be a range: Ex: 8,10): ")
 
         try:
-            if len(dur_input) == 1:
-                #ensuring user entered a valid integer value
-                num = int(dur_input[0])
-                duration = str(num)
-
-                min_duration = max_duration = num
-
-                #the flight inspiration search api cannot accept trips longer than 15 days
-                if num == 0 or num > 15:
-                    print("Trip must be between 1 and 15 days.")
-                    continue
-
-            elif len(dur_input) == 2:
-                #ensuring user entered valid integer values
-                num1 = int(dur_input[0])
-                num2 = int(dur_input[1])
-
-                if num1 == 0 or num2 == 0 or num1 > 15 or num2 > 15:
-                    print("Trip must be between 1 and 15 days...")
-                    continue
-
-                min_duration = min(num1, num2)
-                max_duration = max(num1, num2)
-
-                #the user entered a range of the same number, i.e. 8,8
-                if min_duration == max_duration:
-                    duration = str(min_duration)
-                else:
-                    duration = f"{min_duration},{max_duration}"
-
             #duration is the formatted string to send to the api, min_duration & max_duration
             #are integers representing the bounds of the duration range for date comparison purposes
-            return duration, min_duration, max_duration
-
-        except ValueError:
-            print("Please enter valid number(s).")
-
-#calculating how many operations it takes to transform one string into another
-#using the levenshtein distance algorithm
-def min_distance(word1, word2):
-    matrix = []
-    #initializing a 2D matrix with number of rows correponding to number of letters in word1 + 1,
-    #and number of columns corresponding to number of letter in word2 + 1
-    for i in range(len(word1) + 1):
-        #float("inf") gives positive infinity. Acts as a placeholder since inf is not a valid entry
-        #in the computations
-        row = [float("inf")] * (len(word2) + 1)
-        matrix.append(row)
-
-    #initializing the first row and first column
-    for j in range(len(word2) + 1):
-        matrix[0][j] = j
-    for i in range(len(word1) + 1):
-        matrix[i][0] = i
-    
-    #performing the algorithm
-    for i in range(1, len(word1) + 1):
-        for j in range(1, len(word2) + 1):
-            #i - 1 and j - 1, since my ranges start at 1 but I want to start at the first letter of each word
-            if word1[i - 1] == word2[j - 1]:
-                matrix[i][j] = matrix[i - 1][j - 1]
-            else:
-                minimum = min(matrix[i - 1][j - 1], matrix[i - 1][j], matrix[i][j - 1])
-                matrix[i][j] = minimum + 1
+            return parse_duration(dur_input)
 
-    return matrix[len(word1)][len(word2)]
+        except ValueError as error:
+            print(error)
 
-#suggests alternate spellings for a city name, based on the entries in the city_dict
-def did_you_mean(input_city, city_dict):
-    suggestions = []
-    for city in city_dict:
-        #1 - (num_edits / num_possible_edits)
-        similarity = 1 - (min_distance(input_city, city) / max(len(input_city), len(city)))
+#the fuzzy matcher built from the city dictionary, and the dictionary it was built from. It is only
+#rebuilt if did_you_mean is given a different (or changed) dictionary
+city_matcher_cache = {"city_dict": None, "size": 0, "matcher": None}
 
-        if similarity >= SIMILARITY_RATIO:
-            suggestions.append(city)
+def get_city_matcher(city_dict):
+    if city_matcher_cache["city_dict"] is not city_dict or city_matcher_cache["size"] != len(city_dict):
+        city_matcher_cache["city_dict"] = city_dict
+        city_matcher_cache["size"] = len(city_dict)
+        city_matcher_cache["matcher"] = CityMatcher(city_dict, SIMILARITY_RATIO)
 
-    return suggestions
+    return city_matcher_cache["matcher"]
+
+#suggests alternate spellings for a city name, based on the entries in the city_dict.
+#A city is suggested if 1 - (num_edits / num_possible_edits) >= SIMILARITY_RATIO, where
+#num_edits is min_distance(input_city, city). The matcher only computes that for the cities
+#that could possibly be similar enough (see FuzzyMatch.py)
+def did_you_mean(input_city, city_dict):
+    return get_city_matcher(city_dict).suggestions(input_city)
 
 def lookup_city(city_name):
     verify = input(f"Please verify {city_name} is spelled correctly and type 'yes' if so. \nOtherwise, please re-enter your city: ").strip().lower()
@@ -220,6 +166,19 @@ def get_city_codes_to_search(city_dict):
         
     return city_code_list
 
+#the details of the flight search for one of the flight options. Hard-coding the trip & travelers
+#since just wanting to perform a general flight search
+def get_option_search_details(flight_entry, budget):
+    return {
+        "origin_airport": flight_entry.get("origin_airport"),
+        "destination_airport": flight_entry.get("destination_airport"),
+        "departure_date": flight_entry.get("departure_date"),
+        "return_date": flight_entry.get("return_date"),
+        "max_price": budget,
+        "trip": "rt",
+        "travelers": {"ADULT": 1}
+    }
+
 def user_interface():
     print("""\nHey fellow traveler👋 Dreaming of a getaway, but not sure where to go? 
 No worries - your travel inspo helper is here!
@@ -235,28 +194,23 @@ Now let's get you outta here!✈️\n""")
     budget = input("First up, what's your budget?: $")
     while True:
         try:
-            #ensuring user entered a valid float value, then rounding it to an int
-            budget = round(float(budget))
-
-            if budget <= 0:
-                budget = input("Please enter a number greater than 0 (Ex: 600): ")
-                continue
+            budget = parse_budget(budget)
             break
-        except ValueError:
-            #protect against user entering a string
-            budget = input("Please enter a number (Ex: 1200): ")
+        #not a number, or not greater than 0
+        except ValueError as error:
+            budget = input(f"{error}: ")
 
     #---Getting time-off window---
     print("\nEnter the window of time you have off (Ex: from: 2025-08-12 to: 2025-08-14)")
     while True:
         earliest = get_date("from: ")
         latest = get_date("to: ")
-        time_off = (earliest, latest)
 
-        if earliest <= latest:
+        try:
+            time_off = validate_time_off(earliest, latest)
             break
-        else:
-            print("Range must be in ascending order...")
+        except ValueError as error:
+            print(error)
 
 
     #---Getting duration & departure date range---
@@ -265,32 +219,32 @@ Now let's get you outta here!✈️\n""")
         details["duration"] = duration
         duration_range = (min_duration, max_duration)
 
-        #This formula is to reduce the number of results where the return dates will exceed
-        #the window of time off, but won't exclude any trip possibilities
-        #latest possible return date - minimum duration of trip + 1 because both travel days included
-        latest_departure_date = latest - timedelta(days = (min_duration - 1))
-        if latest_departure_date < earliest:
-            print("The duration of your trip cannot be longer than your window of time off.")
-        else:
+        try:
+            latest_departure_date = get_latest_departure_date(earliest, latest, min_duration)
             break
+        #the duration of the trip is longer than the window of time off
+        except ValueError as error:
+            print(error)
 
     #putting the departure dates in a format the api will understand
     departure_date_range = ",".join([earliest.strftime("%Y-%m-%d"), latest_departure_date.strftime("%Y-%m-%d")])
     details["departure_date_range"] = departure_date_range
 
     #---Getting departure city(ies)---
-    #getting dictionary mapping city names to city codes
-    with open(CITY_CODES_FILE, "r") as file:
-        city_dict = json.load(file)
-
-    origin_city_codes = get_city_codes_to_search(city_dict)
+    #getting the known city names & codes. Works like a dictionary mapping city names to city codes
+    origin_city_codes = get_city_codes_to_search(CITY_INDEX)
 
     print("Finding your dream destination...\n")
-    flight_inspo_data_list = API_CALLER.get_cheapest_cities(details, origin_city_codes)
+    with METRICS.span("fetch", pipeline = "inspiration"):
+        flight_inspo_data_list = API_CALLER.get_cheapest_cities(details, origin_city_codes)
     fully_sorted_list = format_flight_inspo_data(flight_inspo_data_list, time_off, duration_range)
 
     #only prompt user for next search if flight options were available
     if len(fully_sorted_list) > 0:
+        prefetcher = Prefetcher(PREFETCH_QUOTA, PREFETCH_MAX_IN_FLIGHT)
+        if PREFETCH_TOP_K > 0:
+            prefetcher.prefetch([get_option_search_details(entry, budget) for entry in fully_sorted_list[:PREFETCH_TOP_K]])
+
         while True:
             flight_num = input("Want more info about one of the options listed above and interested in similar alternatives?\nEnter the flight option number (Ex: 2). Otherwise, type 'done': ").strip()
             print()
@@ -306,25 +260,26 @@ Now let's get you outta here!✈️\n""")
                     continue
                 
                 #since the flight option numbers start at 1
-                selected_flight_entry = fully_sorted_list[flight_num - 1]
+                selected_flight_entry = get_option_search_details(fully_sorted_list[flight_num - 1], budget)
 
-                selected_flight_entry["max_price"] = budget
-                #hard-coding these fields since just wanting to perform a general flight search
-                selected_flight_entry["trip"] = "rt"
-                selected_flight_entry["travelers"] = {"ADULT": 1}
+                #the other prefetches are no longer needed. If this one was prefetched, it's already cached
+                prefetcher.choose(selected_flight_entry)
 
-                #call the flight offers search api
-                flight_offers_dict = API_CALLER.get_flight_offers(selected_flight_entry)
+                #call the flight offers search api. The offers are shown as they arrive
+                flight_offers = API_CALLER.stream_flight_offers(selected_flight_entry)
                 #if the call succeeded
-                if flight_offers_dict:
-                    format_flight_offers_data(flight_offers_dict, PER_PAGE)
+                if flight_offers is not None:
+                    format_flight_offers_data(flight_offers, PER_PAGE)
                 break
             else:
                 print("Please enter a valid number or type 'done'.\n")
 
+        prefetcher.close()
+
     else:
         print("Shoot! It looks like no flight destinations matched your search...\nBetter luck next time!")
 
 
 #---Main---
-user_interface()
+if __name__ == "__main__":
+    user_interface()
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+#the traveler types, in the order they are displayed in
+TRAVELER_TYPES = ("ADULT", "CHILD", "SENIOR", "SEATED_INFANT", "HELD_INFANT")
+
+#reads a duration of the form "PT8H10M" into (hours, minutes)
+def parse_duration(duration):
+    # remove "PT"
+    without_PT = duration[2:]
+
+    hours = 0
+    mins = 0
+
+    if 'H' in without_PT:
+        H_index = without_PT.find('H')
+        hours = int(without_PT[:H_index])
+    if 'M' in without_PT:
+        M_index = without_PT.find('M')
+        # if there was an 'H', take what's after it. Otherwise take from start.
+        if 'H' in without_PT:
+            mins = int(without_PT[H_index + 1 : M_index])
+        else:
+            mins = int(without_PT[:M_index])
+
+    return hours, mins
+
+#the classes below hold the parts of a flight offer from the flight offers api that are actually used,
+#read from the json in a single pass. Every date is parsed once, when the offer is read, instead of every
+#time it is displayed. __slots__ keeps each object small, since a search can return hundreds of offers
+
+class Segment:
+    __slots__ = ("departure_airport", "arrival_airport", "departure_at", "arrival_at", "carrier_code")
+
+    def __init__(self, segment_dict):
+        departure = segment_dict.get("departure")
+        arrival = segment_dict.get("arrival")
+
+        self.departure_airport = departure.get("iataCode")
+        self.arrival_airport = arrival.get("iataCode")
+        self.departure_at = datetime.fromisoformat(departure.get("at"))
+        self.arrival_at = datetime.fromisoformat(arrival.get("at"))
+        self.carrier_code = segment_dict.get("carrierCode")
+
+class Itinerary:
+    __slots__ = ("duration_hours", "duration_minutes", "segments")
+
+    def __init__(self, itinerary_dict):
+        self.duration_hours, self.duration_minutes = parse_duration(itinerary_dict.get("duration"))
+        self.segments = tuple(Segment(segment_dict) for segment_dict in itinerary_dict.get("segments"))
+
+    #total duration, i.e. to sort by
+    def get_minutes(self):
+        return self.duration_hours * 60 + self.duration_minutes
+
+class FlightOffer:
+    __slots__ = ("itineraries", "currency", "grand_total", "traveler_counts")
+
+    def __init__(self, offer_dict):
+        #the outbound itinerary, followed by the return one for round-trips
+        self.itineraries = tuple(Itinerary(itinerary_dict) for itinerary_dict in offer_dict.get("itineraries"))
+
+        price = offer_dict.get("price")
+        self.currency = price.get("currency")
+        #kept as the api gives it (a string, i.e. "546.10") so it is displayed exactly the same
+        self.grand_total = price.get("grandTotal")
+
+        #the number of travelers of each of the TRAVELER_TYPES, in the same order
+        counts = dict.fromkeys(TRAVELER_TYPES, 0)
+        for traveler in offer_dict.get("travelerPricings"):
+            traveler_type = traveler.get("travelerType")
+            if traveler_type in counts:
+                counts[traveler_type] += 1
+
+        self.traveler_counts = tuple(counts.values())
+
+    def is_round_trip(self):
+        return len(self.itineraries) == 2
+
+    #the price as a number, i.e. to sort or filter by
+    def get_price(self):
+        return float(self.grand_total)
+
+    #the carrier code of the first segment of each itinerary, which is the airline that gets displayed
+    def get_carrier_codes(self):
+        return [itinerary.segments[0].carrier_code for itinerary in self.itineraries]
@@ -1,6 +1,7 @@
-from datetime import datetime
 from ApiCalls import API_CALLER
-from FormattingData import format_flight_offers_data
+from FormattingData import format_flight_offers_data, format_price_calendar
+from PriceCalendar import get_price_calendar, get_cell_details
+from Validation import parse_date, parse_flexible_days, validate_travelers, MAX_FLEXIBLE_DAYS
 
 #how many flights to display to the user at a time
 PER_PAGE = 8
@@ -30,21 +31,14 @@ def get_integer_input(prompt, incl_0):
 
 #getting a date and ensuring it was entered using the proper format (i.e. YYYY-MM-DD)
 def get_date(prompt):
-    input_date = input(prompt).strip()
+    input_date = input(prompt)
     while True:
         try:
-            date_object = datetime.strptime(input_date, "%Y-%m-%d")
+            return parse_date(input_date)
 
-            todays_date = datetime.today()
-
-            if date_object > todays_date:
-                return date_object
-            else:
-                input_date = input("Please enter a date later than today's date: ").strip()
-
-        #if the date that was entered cannot be parsed into the proper format (YYYY-MM-DD)
-        except ValueError:
-            input_date = input("Date must be entered in the following format -> YYYY-MM-DD: ").strip()
+        #the date is not in the proper format, or is not later than today's date
+        except ValueError as error:
+            input_date = input(f"{error}: ")
 
 #getting and storing information for all the passengers
 def get_passenger_info():
@@ -89,21 +83,16 @@ def get_passenger_info():
                         #making sure user cannot have more of one type of passenger than the total number of passengers they selected
                         print(f"Please enter a number between 0 and {remaining}\n")
 
-        #the user enters 0 passengers
-        if remaining == num_passengers:
-            print("You cannot enter 0 for all passenger types. Please re-enter your info.\n")
-
-        #there are more held infants than adults
-        elif traveler_counts["ADULT"] < traveler_counts["HELD_INFANT"]:
-            print("The number of held infants must match the number of adults. Please re-enter your info.\n")
-
-        #there are infants, but no adults or seniors
-        elif (traveler_counts["ADULT"] == 0 and traveler_counts["SENIOR"] == 0) and (traveler_counts["SEATED_INFANT"] + traveler_counts["HELD_INFANT"]) > 0:
-            print("You must have at least one adult/senior to accompany infants. Please re-enter your info.\n")
+        #0 passengers, more held infants than adults, or infants without an adult or senior
+        try:
+            validate_travelers(traveler_counts)
+        except ValueError as error:
+            print(f"{error}\n")
+            continue
 
         #if the sum of each type of passenger does not equal the total number of passengers they specified,
         #give them the option to keep their new total or re-enter their travel info
-        elif remaining > 0:
+        if remaining > 0:
             print(f"\nHeads up! You said there were {num_passengers} passengers in total but you only accounted for {num_passengers - remaining} of them.")
             next_action = input("Would you like to continue or modify your traveler info? (enter: con/mod): ").strip().lower()
 
@@ -133,6 +122,47 @@ def get_flight_type():
     return trip
     
 
+def get_flexible_days():
+    days = input(f"\nAre your dates flexible? Enter how many days before & after them to compare prices for (0-{MAX_FLEXIBLE_DAYS}), or press enter to search your exact dates: ")
+    while True:
+        try:
+            return parse_flexible_days(days)
+        except ValueError as error:
+            days = input(f"{error}: ")
+
+#lets the user pick a cell of the calendar (the cheapest one by default) and shows its flights.
+#The cell's search was already made (and cached) when the calendar was built
+def show_calendar_flights(details, calendar, cheapest_cell):
+    cells = calendar.get("cells")
+
+    while True:
+        if details.get("trip") == "rt":
+            prompt = "Enter the departure & return dates to see their flights (Ex: 2025-06-12 2025-06-20), press enter for the cheapest, or type 'done': "
+        else:
+            prompt = "Enter the departure date to see its flights (Ex: 2025-06-12), press enter for the cheapest, or type 'done': "
+
+        answer = input(prompt).strip().lower()
+
+        if answer == "done":
+            return
+
+        if not answer:
+            dates = cheapest_cell
+        elif details.get("trip") == "rt" and len(answer.split()) == 2:
+            dates = tuple(answer.split())
+        else:
+            dates = (answer, None)
+
+        if dates not in cells:
+            print("--> Dates must match one of the cells of the calendar.\n")
+            continue
+
+        flight_offers = API_CALLER.stream_flight_offers(get_cell_details(details, *dates))
+        if flight_offers is not None:
+            format_flight_offers_data(flight_offers, PER_PAGE)
+
+        print()
+
 def specific_flights():
     details = dict()
 
@@ -169,15 +199,28 @@ def specific_flights():
 
     details["return_date"] = return_date
 
+    flexible_days = get_flexible_days()
+    if flexible_days > 0:
+        print("Comparing prices now...\n")
+        calendar = get_price_calendar(details, flexible_days)
+
+        cheapest_cell = format_price_calendar(calendar)
+        if cheapest_cell is not None:
+            show_calendar_flights(details, calendar, cheapest_cell)
+
+        return
+
     print("Searching Flights now...\n")
-    flight_offers_dict = API_CALLER.get_flight_offers(details)
-    if flight_offers_dict:
-        format_flight_offers_data(flight_offers_dict, PER_PAGE)
+    #the offers are shown as they arrive, instead of once the whole response is in
+    flight_offers = API_CALLER.stream_flight_offers(details)
+    if flight_offers is not None:
+        format_flight_offers_data(flight_offers, PER_PAGE)
 
 #---Main---
-print()
+if __name__ == "__main__":
+    print()
 
-specific_flights()
+    specific_flights()
 
 
 
@@ -1,248 +1,221 @@
-import json
 from datetime import datetime
-from ApiCalls import API_CALLER
-from tabulate import tabulate
-
-AIRLINES_DICT = r"file path of the airlines_dict file"
-
-#type_name refers to "destination_country_name" or "destination_city_name" depending on the grouping criteria
-def group_by(type_name, results_list, sorted_list):
-    #if results_list is empty, returns an empty list, since function is always called with sorted_list = [] to start
-    if not results_list:
-        return sorted_list
-
-    first_result = results_list[0]
-    #starting a list of all the results with the same name
-    group = [first_result]
-
-    #base case
-    if len(results_list) == 1:
-        sorted_list.extend(group)
-        return sorted_list
-
-    name = first_result.get(type_name)
-
-    #looping backwards through list to avoid indexing issues when deleting items from the list
-    for i in range(len(results_list) - 1, 0, -1):
-        current_result = results_list[i]
-        current_name = current_result.get(type_name)
-
-        #if current name matches the first name in the list, 
-        #add it to the group and remove it from the original list
-        if current_name == name:                  
-            group.append(current_result)
-            del results_list[i]
-
-    #removing the first result from the original list
-    del results_list[0]
-
-    #filtering out duplicate entries - same city name, same airports, same dates
-    if type_name == "destination_city_name":
-        unique_entries = set()
-        unique_group = []
-
-        #getting relevant data from each entry in the group of identical city names
-        for entry in group:
-            details = (
-                entry.get("destination_airport"),
-                entry.get("origin_airport"),
-                entry.get("departure_date"),
-                entry.get("return_date")
-            )
-
-            #using set to keep track of entries because O(1) time to check for membership
-            #faster than using a list to keep track
-            if details not in unique_entries:
-                unique_entries.add(details)
-                unique_group.append(entry)
-
-        sorted_list.extend(unique_group)
-
-    #type_name == "destination_country_name"
-    else:
-        sorted_list.extend(group)
-    
-    #results_list is now shorter
-    return group_by(type_name, results_list, sorted_list)
+from itertools import islice
+from ApiCalls import API_CALLER, AIRLINE_INDEX
+from FlightModels import FlightOffer, TRAVELER_TYPES
+from Metrics import METRICS
+from PriceCalendar import FAILED, get_cheapest_cell
+
+#groups the results that share the same destination name, keeping the groups in the order their
+#names first appear in. type_name refers to "destination_country_name" or "destination_city_name"
+#depending on the grouping criteria. Takes a single pass over the results, using a dictionary
+#to find each result's group, so it runs in linear time
+def group_by(type_name, results_list):
+    #name -> list of all the results with that name. Dictionaries keep insertion order,
+    #so the groups come out in the order their names were first seen
+    groups = dict()
+
+    for result in results_list:
+        name = result.get(type_name)
+
+        group = groups.get(name)
+        if group is None:
+            groups[name] = [result]
+        else:
+            group.append(result)
+
+    sorted_list = []
+    for group in groups.values():
+        #the first result of each group stays first, followed by the others in reverse order.
+        #This is the order the results have always been displayed in, so it is kept as is
+        ordered_group = group[:1] + group[:0:-1]
+
+        #filtering out duplicate entries - same city name, same airports, same dates
+        if type_name == "destination_city_name":
+            unique_entries = set()
+
+            for entry in ordered_group:
+                details = (
+                    entry.get("destination_airport"),
+                    entry.get("origin_airport"),
+                    entry.get("departure_date"),
+                    entry.get("return_date")
+                )
+
+                #using set to keep track of entries because O(1) time to check for membership
+                #faster than using a list to keep track
+                if details not in unique_entries:
+                    unique_entries.add(details)
+                    sorted_list.append(entry)
+
+        #type_name == "destination_country_name"
+        else:
+            sorted_list.extend(ordered_group)
 
-#must pass time_off and duration_range to filter out the responses that don't match
-#the user's specifications because the api data sometimes returns results that are
-#close enough to the input parameters, but don't strictly respect them
-def format_flight_inspo_data(flight_inspo_data_list, time_off, duration_range):
-    results_list = []
+    return sorted_list
+
+#sorts the results by country, then by city within each country, without duplicates
+def group_results(results_list):
+    sorted_by_country_list = group_by("destination_country_name", results_list)
 
-    for flight_inspo_data in flight_inspo_data_list:
-        results = flight_inspo_data.get("data")
-        for entry in results:
-            entry_dict = dict()
+    return group_by("destination_city_name", sorted_by_country_list)
 
-            earliest, latest = time_off
-            min_duration, max_duration = duration_range
+#the results of the flight inspiration searches, with the city & country of their airports, grouped by
+#country & city. Used by format_flight_inspo_data & the batch search. Must pass time_off and duration_range
+#to filter out the responses that don't match the user's specifications because the api data sometimes
+#returns results that are close enough to the input parameters, but don't strictly respect them
+def get_flight_inspo_results(flight_inspo_data_list, time_off, duration_range):
+    results_list = []
+    #every distinct airport appearing in the results, so their locations can all be fetched at once
+    airport_codes = set()
+
+    #the results that fit the search
+    with METRICS.span("filter", pipeline = "inspiration"):
+        for flight_inspo_data in flight_inspo_data_list:
+            results = flight_inspo_data.get("data")
+            for entry in results:
+                entry_dict = dict()
+
+                earliest, latest = time_off
+                min_duration, max_duration = duration_range
             
-            departure_date = entry.get("departureDate")
-            return_date = entry.get("returnDate")
-            #dt stands for datetime version, as opposed to str version
-            dt_departure_date = datetime.fromisoformat(departure_date)
-            dt_return_date = datetime.fromisoformat(return_date)
-
-            trip_length = dt_return_date - dt_departure_date
-            #trip_length will be a timedelta object so must extract the number of days
-            #+1 because both travel days are included in the trip duration
-            trip_length = trip_length.days + 1
-
-            #if the result is not within the allotted window of time off, 
-            #or does not meet the duration specifications, then don't include it
-            if ((dt_departure_date < earliest or dt_return_date > latest) or
-            trip_length < min_duration or trip_length > max_duration):
-                continue
-
-            entry_dict["departure_date"] = departure_date
-            entry_dict["return_date"] = return_date
-            entry_dict["dt_departure_date"] = dt_departure_date
-            entry_dict["dt_return_date"] = dt_return_date
-
-            origin_airport_code = entry.get("origin")
-            destination_airport_code = entry.get("destination")
-            entry_dict["origin_airport"] = origin_airport_code
-            entry_dict["destination_airport"] = destination_airport_code
+                departure_date = entry.get("departureDate")
+                return_date = entry.get("returnDate")
+                #dt stands for datetime version, as opposed to str version
+                dt_departure_date = datetime.fromisoformat(departure_date)
+                dt_return_date = datetime.fromisoformat(return_date)
+
+                trip_length = dt_return_date - dt_departure_date
+                #trip_length will be a timedelta object so must extract the number of days
+                #+1 because both travel days are included in the trip duration
+                trip_length = trip_length.days + 1
+
+                #if the result is not within the allotted window of time off, 
+                #or does not meet the duration specifications, then don't include it
+                if ((dt_departure_date < earliest or dt_return_date > latest) or
+                trip_length < min_duration or trip_length > max_duration):
+                    continue
+
+                entry_dict["departure_date"] = departure_date
+                entry_dict["return_date"] = return_date
+                entry_dict["dt_departure_date"] = dt_departure_date
+                entry_dict["dt_return_date"] = dt_return_date
+
+                origin_airport_code = entry.get("origin")
+                destination_airport_code = entry.get("destination")
+                entry_dict["origin_airport"] = origin_airport_code
+                entry_dict["destination_airport"] = destination_airport_code
+
+                airport_codes.add(origin_airport_code)
+                airport_codes.add(destination_airport_code)
+    
+                results_list.append(entry_dict)
 
+    #their city & country names
+    with METRICS.span("enrich", pipeline = "inspiration"):
+        #looking up the city & country of every airport in one go, rather than once per result
+        locations = API_CALLER.get_locations(airport_codes)
+
+        for entry_dict in results_list:
             #getting the city & country name associated with the destination airport
-            destination_city_country_dict = API_CALLER.get_location(destination_airport_code)
+            destination_city_country_dict = locations.get(entry_dict.get("destination_airport"))
 
             entry_dict["destination_city_name"] = destination_city_country_dict.get("city_name")
             entry_dict["destination_country_name"] = destination_city_country_dict.get("country_name")
 
             #getting the city & country name associated with the origin airport
-            origin_city_country_dict = API_CALLER.get_location(origin_airport_code)
+            origin_city_country_dict = locations.get(entry_dict.get("origin_airport"))
 
             entry_dict["origin_city_name"] = origin_city_country_dict.get("city_name")
             entry_dict["origin_country_name"] = origin_city_country_dict.get("country_name")
-    
-            results_list.append(entry_dict)
 
     #sorting the results by country & city
-    sorted_by_country_list = group_by("destination_country_name", results_list, [])
-    fully_sorted_list = group_by("destination_city_name", sorted_by_country_list, [])
+    with METRICS.span("group", pipeline = "inspiration"):
+        return group_results(results_list)
 
-    result_num = 1
-    for result in fully_sorted_list:
-        print(f"Flight option {result_num}:")
-        print(f"\tDestination: {result.get("destination_city_name")}, {result.get("destination_country_name")}")
-        print(f"\tAirports: {result.get("origin_airport")} -> {result.get("destination_airport")}")
-        #formatting the departure & return dates into a more readable format
-        print(f"\t{datetime.strftime(result.get('dt_departure_date'), "%b %d, %Y")} - {datetime.strftime(result.get('dt_return_date'), "%b %d, %Y")}")
-        print()
+def format_flight_inspo_data(flight_inspo_data_list, time_off, duration_range):
+    fully_sorted_list = get_flight_inspo_results(flight_inspo_data_list, time_off, duration_range)
+
+    with METRICS.span("render", pipeline = "inspiration"):
+        result_num = 1
+        for result in fully_sorted_list:
+            print(f"Flight option {result_num}:")
+            print(f"\tDestination: {result.get("destination_city_name")}, {result.get("destination_country_name")}")
+            print(f"\tAirports: {result.get("origin_airport")} -> {result.get("destination_airport")}")
+            #formatting the departure & return dates into a more readable format
+            print(f"\t{datetime.strftime(result.get('dt_departure_date'), "%b %d, %Y")} - {datetime.strftime(result.get('dt_return_date'), "%b %d, %Y")}")
+            print()
 
-        result_num += 1
+            result_num += 1
 
     return fully_sorted_list
 
 #---Helper functions for format_flight_offers_data---
 
-#formatting a duration of the form: "PT8H10M"
-def format_duration(duration):
-    # remove "PT"
-    without_PT = duration[2:]
-
-    hours = 0
-    mins = 0
-
-    if 'H' in without_PT:
-        H_index = without_PT.find('H')
-        hours = without_PT[:H_index]
-    if 'M' in without_PT:
-        M_index = without_PT.find('M')
-        # if there was an 'H', take what's after it. Otherwise take from start.
-        if 'H' in without_PT:
-            mins = without_PT[H_index + 1 : M_index]
-        else:
-            mins = without_PT[:M_index]
-
-    return f"{hours} hr {mins} min"
+#abbreviated month names, the same ones strftime's %b gives
+MONTH_ABBREVIATIONS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
 
-def get_leg_info(flight, leg, info_type):
-    if leg not in ("outbound", "return") or info_type not in ("airports", "times", "date", "carrier_code"):
-        raise ValueError('Usage: get_leg_info(flight, "outbound/return", "airports/times/date/carrier_code")')
-    else:
-        if leg == "outbound":
-            index = 0
-        else:
-            index = 1
-        
-        if info_type == "airports":
-            air1 = flight.get("itineraries")[index].get("segments")[0].get("departure").get("iataCode")
-            air2 = flight.get("itineraries")[index].get("segments")[0].get("arrival").get("iataCode")
+#i.e. "Jul 05, 2025". Same as strftime("%b %d, %Y"), which takes a few times longer and adds up over many offers
+def format_date(moment):
+    return f"{MONTH_ABBREVIATIONS[moment.month - 1]} {moment.day:02d}, {moment.year}"
 
-            return air1, air2
+#i.e. "3:05 PM". Same as strftime("%#I:%M %p") without the leading 0 on the hour
+def format_time(moment):
+    hour = moment.hour % 12 or 12
+    am_pm = "AM" if moment.hour < 12 else "PM"
 
-        if info_type == "carrier_code":
-            carrier_code = flight.get("itineraries")[index].get("segments")[0].get("carrierCode")
+    return f"{hour}:{moment.minute:02d} {am_pm}"
 
-            return carrier_code
+#formatting the duration of a leg, i.e. "8 hr 10 min"
+def format_duration(itinerary):
+    return f"{itinerary.duration_hours} hr {itinerary.duration_minutes} min"
 
-        elif info_type in ("times", "date"):
-            #getting departure and arrival times
-            departure_info = flight.get("itineraries")[index].get("segments")[0].get("departure").get("at")
-            arrival_info = flight.get("itineraries")[index].get("segments")[0].get("arrival").get("at")
+#the date, airports, duration and times of a leg of the flight, as displayed in its table.
+#These are the ones of the first segment of the leg
+def format_leg(itinerary):
+    segment = itinerary.segments[0]
 
-            departure_datetime_object = datetime.fromisoformat(departure_info)
-            arrival_datetime_object = datetime.fromisoformat(arrival_info)
+    date = format_date(segment.departure_at)
 
-            if info_type == "times":
-                #%I -> Hour | %M -> Minutes | %p -> AM or PM
-                #lstrip used to get rid of the leading 0 on the hour
-                formatted_departure_time = departure_datetime_object.strftime("%#I:%M %p").lstrip("0")
-                formatted_arrival_time = arrival_datetime_object.strftime("%#I:%M %p").lstrip("0")
+    departure_time = format_time(segment.departure_at)
+    arrival_time = format_time(segment.arrival_at)
 
-                return formatted_departure_time, formatted_arrival_time
-            else:
-                #%b -> abbreviated month (Ex: Jul) | %d -> Day | %Y -> Year (2025)
-                formatted_date = departure_datetime_object.strftime("%b %d, %Y")
-
-                return formatted_date
+    return f"""{date}
+{segment.departure_airport} -> {segment.arrival_airport}
+{format_duration(itinerary)}
+{departure_time} - {arrival_time}"""
 
 def get_airline(carrier_codes):
-    carrier_code_map = dict.fromkeys(carrier_codes)
-
-    #getting the dictionary of known airlines
-    with open(AIRLINES_DICT, "r") as file:
-        airlines_dict = json.load(file)
+    #if there are carrier codes that have yet to be added to the known airlines,
+    #look them all up in a single call and add them to the known airlines
+    to_lookup = AIRLINE_INDEX.missing(carrier_codes)
 
-    #updating the dictionary of known airlines if certain carrier codes are 
-    #not currently mapped to their corresponding airline
-    to_lookup = []
-    for carrier_code in carrier_codes:
-        if carrier_code not in airlines_dict:
-            to_lookup.append(carrier_code)
-
-    #if there are carrier codes that have yet to be added to the known airlines dictionary,
-    #look up their corresponding airlines and add them to the dictionary
     if len(to_lookup) > 0:
         joined_to_lookup = ", ".join(to_lookup)
 
-        airlines_dict = API_CALLER.get_airline_data(joined_to_lookup, airlines_dict)
+        airlines_dict = API_CALLER.get_airline_data(joined_to_lookup, dict())
+        AIRLINE_INDEX.add_many(airlines_dict)
 
-        #Write the updated dictionary of known airlines back to the airlines file
-        with open(AIRLINES_DICT, "w") as file:
-            json.dump(airlines_dict, file, indent = 2)
+        #Write the new airlines to the reference data store, all at once
+        AIRLINE_INDEX.flush()
 
     #returning a dictionary including only the requested carrier code - airline mappings
+    carrier_code_map = dict.fromkeys(carrier_codes)
     for carrier_code in carrier_codes:
-        carrier_code_map[carrier_code] = airlines_dict.get(carrier_code)
+        carrier_code_map[carrier_code] = AIRLINE_INDEX.get(carrier_code)
 
     #the dictionary containing only the mappings of the codes that were passed to be looked up
     return carrier_code_map
 
-def get_travelers(flight):
-    #getting number of travelers
-    travelers_data = flight.get("travelerPricings")
-    travelers_dict = {"ADULT": 0, "CHILD": 0, "SENIOR": 0, "SEATED_INFANT": 0, "HELD_INFANT": 0}
+#the carrier codes of every leg of every flight given, so that all their airlines can be looked up at once
+def get_carrier_codes(flights):
+    carrier_codes = []
 
-    for traveler in travelers_data:
-        traveler_type = traveler.get("travelerType")
-        if traveler_type in ("ADULT", "CHILD", "SENIOR", "SEATED_INFANT", "HELD_INFANT"):
-            travelers_dict[traveler_type] += 1
+    for flight in flights:
+        carrier_codes.extend(flight.get_carrier_codes())
 
+    return carrier_codes
+
+def get_travelers(flight):
     label_map = {
         "ADULT": "Adult",
         "CHILD": "Child",
@@ -253,7 +226,7 @@ def get_travelers(flight):
 
     #building the output string
     travelers = []
-    for traveler_type, count in travelers_dict.items():
+    for traveler_type, count in zip(TRAVELER_TYPES, flight.traveler_counts):
         if count > 0:
             label = label_map.get(traveler_type)
             #Add 's' for pluralization if needed
@@ -264,20 +237,108 @@ def get_travelers(flight):
     formatted_travelers = "\n".join(travelers)
     return formatted_travelers
 
+#the table headers and the table row of a single flight offer (a FlightOffer), or None if the offer
+#has neither one nor two itineraries. carrier_code_dict maps the offer's carrier codes to airline names
+def format_flight_offer(flight, carrier_code_dict):
+    #---Outbound Flight Info---
+    outbound = flight.itineraries[0]
+    outbound_info = format_leg(outbound)
+    outbound_airline = carrier_code_dict.get(outbound.segments[0].carrier_code)
+
+    #---General Trip Info---
 
-def format_flight_offers_data(flight_offers_dict, per_page):
-    flight_count = 0
+    #total price for all travelers for all legs of the trip
+    formatted_price = f"${flight.grand_total} {flight.currency}"
+
+    #getting all travelers info
+    formatted_travelers = get_travelers(flight)
+
+    if len(flight.itineraries) == 2:
+        round_trip = "Yes"
+
+        #---Return Flight Info---
+        return_leg = flight.itineraries[1]
+        return_info = format_leg(return_leg)
+        return_airline = carrier_code_dict.get(return_leg.segments[0].carrier_code)
+
+        if outbound_airline == return_airline:
+            formatted_airlines = f"✈  {outbound_airline}"
+        else:
+            formatted_airlines = f"✈ ->: {outbound_airline}\n<-✈ : {return_airline}"
+
+        #---Table Row---
+
+        #return_info, carryOn_included, formatted_airline
+        flight_info = [round_trip, formatted_travelers, formatted_price, outbound_info, return_info, formatted_airlines]
+        #"Return", "Carry-On Included", "Airline(s)"
+        table_headers = ["Round-trip", "Passengers", "Total Price", "Outbound", "Return", "Airline(s)"]
+        return table_headers, flight_info
+
+    elif len(flight.itineraries) == 1:
+        round_trip = "No"
+
+        #airline name for outbound flight only
+        formatted_airline = f"✈  {outbound_airline}"
+
+        flight_info = [round_trip, formatted_travelers, formatted_price, outbound_info, formatted_airline]
+        table_headers = ["Round-trip", "Passengers", "Total Price", "Leg Info", "Airline"]
+        return table_headers, flight_info
+
+    return None
+
+#splits the offers into pages of per_page offers. The offers of a page are only taken from flight_offers
+#when that page is about to be shown, so with a streamed response, offers that are never shown are
+#never decoded or formatted
+def iter_pages(flight_offers, per_page):
+    flight_offers = iter(flight_offers)
+
+    while True:
+        page = list(islice(flight_offers, per_page))
+        if not page:
+            return
+
+        yield page
+
+#flight_offers is either the response of get_flight_offers, or the offers from stream_flight_offers
+def format_flight_offers_data(flight_offers, per_page):
+    #imported here rather than at the top so that starting the program doesn't wait on it
+    from tabulate import tabulate
+
+    if isinstance(flight_offers, dict):
+        flight_offers = flight_offers.get("data") or []
+
+    #each offer is read into a FlightOffer once, when its page is about to be shown. With a streamed
+    #response, that is also when its offers are received
+    pages = iter_pages(map(FlightOffer, flight_offers), per_page)
+    with METRICS.span("fetch", pipeline = "flight_offers"):
+        page = next(pages, None)
 
     #no flights were found
-    data = flight_offers_dict.get("data")
-    if not data:
+    if page is None:
         print("Sorry, no specific flights match your search criteria. Maybe alter your budget and try again!")
         return None
 
     print("\nFlights: \n")
 
-    for flight in data:
-        if (flight_count != 0) and (flight_count % per_page == 0):
+    while page is not None:
+        #getting the names of all the airlines of the page at once, instead of once per flight
+        with METRICS.span("enrich", pipeline = "flight_offers"):
+            carrier_code_dict = get_airline(get_carrier_codes(page))
+
+        with METRICS.span("render", pipeline = "flight_offers"):
+            for flight in page:
+                formatted_flight = format_flight_offer(flight, carrier_code_dict)
+
+                if formatted_flight is not None:
+                    table_headers, flight_info = formatted_flight
+                    print(tabulate([flight_info], headers = table_headers, tablefmt = "fancy_grid"))
+                    print("\n")
+
+        with METRICS.span("fetch", pipeline = "flight_offers"):
+            page = next(pages, None)
+
+        #there are more flights to show
+        if page is not None:
             answer = "null"
             while answer not in ("y", "n"):
                 answer = input("Would you like to see more offers (y/n)?: ").strip().lower()
@@ -285,98 +346,63 @@ def format_flight_offers_data(flight_offers_dict, per_page):
             if answer == "n":
                 break
 
-        #---Outbound Flight Info---
+#---Price calendar---
 
-        #getting duration of departing flight
-        outbound_duration = flight.get("itineraries")[0].get("duration")
-        formatted_outbound_duration = format_duration(outbound_duration)
+#a cell of the price calendar: the cheapest price, "-" if there are no flights, "?" if the search failed
+def format_calendar_cell(cell, is_cheapest):
+    if cell is None:
+        return "-"
+    if cell == FAILED:
+        return "?"
 
-        #getting outbound airports
-        outbound_air1, outbound_air2 = get_leg_info(flight, "outbound", "airports")
+    price, currency = cell
+    formatted_price = f"${price:.2f}"
 
-        #getting departure date
-        departure_date = get_leg_info(flight, "outbound", "date")
+    #marking the cheapest cell of the whole calendar
+    if is_cheapest:
+        formatted_price = f"*{formatted_price}*"
 
-        #getting departure and arrival times for outbound flight
-        outbound_departure_time, outbound_arrival_time = get_leg_info(flight, "outbound", "times")
+    return formatted_price
 
-        #getting carrier code for outbound flight
-        outbound_carrier_code = get_leg_info(flight, "outbound", "carrier_code")
+#prints the cheapest price of every departure (rows) & return (columns) date of a calendar from
+#get_price_calendar. Returns the dates of the cheapest cell, or None if no cell has flights
+def format_price_calendar(calendar):
+    from tabulate import tabulate
 
-        #formatted string with outbound flight info
-        outbound_info = f"""{departure_date}
-{outbound_air1} -> {outbound_air2}
-{formatted_outbound_duration}
-{outbound_departure_time} - {outbound_arrival_time}"""
+    departure_dates = calendar.get("departure_dates")
+    return_dates = calendar.get("return_dates")
+    cells = calendar.get("cells")
 
-        #---General Trip Info---
+    cheapest_cell = get_cheapest_cell(calendar)
 
-        #getting total price for all travelers for all legs of the trip
-        currency = flight.get("price").get("currency")
-        total_price = flight.get("price").get("grandTotal")
-        formatted_price = f"${total_price} {currency}"
-
-        #getting all travelers info
-        formatted_travelers = get_travelers(flight)
+    if return_dates == [None]:
+        table_headers = ["Departure", "Cheapest Price"]
+    else:
+        table_headers = ["Departure \\ Return"] + return_dates
 
-        if len(flight.get("itineraries")) == 2:
-            round_trip = "Yes"
+    table = []
+    for departure_date in departure_dates:
+        row = [departure_date]
 
-            #---Return Flight Info---
+        for return_date in return_dates:
+            dates = (departure_date, return_date)
 
-            #getting duration of return flight
-            return_duration = flight.get("itineraries")[1].get("duration")
-            formatted_return_duration = format_duration(return_duration)
+            #the return date is before the departure date
+            if dates not in cells:
+                row.append("")
+            else:
+                row.append(format_calendar_cell(cells.get(dates), dates == cheapest_cell))
 
-            #getting return airports
-            return_air1, return_air2 = get_leg_info(flight, "return", "airports")
+        table.append(row)
 
-            #getting return date
-            return_date = get_leg_info(flight, "return", "date")
+    print(tabulate(table, headers = table_headers, tablefmt = "fancy_grid", stralign = "center"))
 
-            #getting departure and arrival times for return flight
-            return_departure_time, return_arrival_time = get_leg_info(flight, "return", "times")
+    if cheapest_cell is None:
+        print("Sorry, no flights were found for any of these dates.")
+    else:
+        currency = cells.get(cheapest_cell)[1]
+        print(f"Prices are in {currency} for all passengers. The cheapest is marked with *, - means no flights, ? means the search failed.")
 
-            #getting carrier code for return flight
-            return_carrier_code = get_leg_info(flight, "return", "carrier_code")
+    print()
 
-            #getting names of departure and return airlines
-            carrier_code_dict = get_airline([outbound_carrier_code, return_carrier_code])
-            outbound_airline = carrier_code_dict.get(outbound_carrier_code)
-            return_airline = carrier_code_dict.get(return_carrier_code)
-        
-            if outbound_airline == return_airline:
-                formatted_airlines = f"✈  {outbound_airline}"
-            else:
-                formatted_airlines = f"✈ ->: {outbound_airline}\n<-✈ : {return_airline}"
-
-            #formatted string with return flight info 
-            return_info = f"""{return_date}
-{return_air1} -> {return_air2}
-{formatted_return_duration}
-{return_departure_time} - {return_arrival_time}"""
-
-            #---Printing Table---
-
-            #return_info, carryOn_included, formatted_airline
-            flight_info = [round_trip, formatted_travelers, formatted_price, outbound_info, return_info, formatted_airlines]
-            #"Return", "Carry-On Included", "Airline(s)"
-            table_headers = ["Round-trip", "Passengers", "Total Price", "Outbound", "Return", "Airline(s)"]
-            print(tabulate([flight_info], headers = table_headers, tablefmt = "fancy_grid"))
-            print("\n")
-
-        
-        elif len(flight.get("itineraries")) == 1:
-            round_trip = "No"
-
-            #getting airline name for outbound flight only
-            outbound_airline = get_airline([outbound_carrier_code]).get(outbound_carrier_code)
-            formatted_airline = f"✈  {outbound_airline}"
-
-            flight_info = [round_trip, formatted_travelers, formatted_price, outbound_info, formatted_airline]
-            table_headers = ["Round-trip", "Passengers", "Total Price", "Leg Info", "Airline"]
-            print(tabulate([flight_info], headers = table_headers, tablefmt = "fancy_grid"))
-            print("\n")
-    
-        #another flight has just been displayed
-        flight_count += 1
+    return cheapest_cell
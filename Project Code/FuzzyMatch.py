@@ -0,0 +1,229 @@
+from collections import Counter
+
+#calculating how many operations it takes to transform one string into another
+#using the levenshtein distance algorithm
+def min_distance(word1, word2):
+    #only the previous row of the matrix is needed to compute the current one. The first row
+    #is the number of insertions it takes to go from an empty string to each prefix of word2
+    previous_row = list(range(len(word2) + 1))
+
+    #performing the algorithm
+    for i in range(1, len(word1) + 1):
+        #first column: number of deletions to go from the first i letters of word1 to an empty string
+        current_row = [i] + [0] * len(word2)
+
+        for j in range(1, len(word2) + 1):
+            #i - 1 and j - 1, since my ranges start at 1 but I want to start at the first letter of each word
+            if word1[i - 1] == word2[j - 1]:
+                current_row[j] = previous_row[j - 1]
+            else:
+                current_row[j] = min(previous_row[j - 1], previous_row[j], current_row[j - 1]) + 1
+
+        previous_row = current_row
+
+    return previous_row[len(word2)]
+
+#same as min_distance, except that it gives up as soon as the distance is known to be more than
+#max_distance, in which case it returns max_distance + 1. Only the cells within max_distance of the
+#matrix's diagonal are computed, since any path through the other cells costs more than that
+def bounded_distance(word1, word2, max_distance):
+    too_far = max_distance + 1
+
+    if abs(len(word1) - len(word2)) > max_distance:
+        return too_far
+
+    previous_row = [j if j <= max_distance else too_far for j in range(len(word2) + 1)]
+
+    for i in range(1, len(word1) + 1):
+        current_row = [too_far] * (len(word2) + 1)
+        if i <= max_distance:
+            current_row[0] = i
+
+        row_min = current_row[0]
+        letter = word1[i - 1]
+
+        for j in range(max(1, i - max_distance), min(len(word2), i + max_distance) + 1):
+            if letter == word2[j - 1]:
+                distance = previous_row[j - 1]
+            else:
+                distance = min(previous_row[j - 1], previous_row[j], current_row[j - 1]) + 1
+                if distance > too_far:
+                    distance = too_far
+
+            current_row[j] = distance
+            if distance < row_min:
+                row_min = distance
+
+        #every path through this row already costs more than max_distance
+        if row_min > max_distance:
+            return too_far
+
+        previous_row = current_row
+
+    return previous_row[len(word2)]
+
+#the bigrams (pairs of consecutive letters) of a word, with a marker added at both ends so the first
+#and last letters count as much as the others. A bigram that appears more than once is numbered,
+#i.e. ("an", 2), so that repeats are matched separately
+def get_bigrams(word):
+    padded_word = "\0" + word + "\0"
+    seen = Counter()
+    bigrams = []
+
+    for i in range(len(padded_word) - 1):
+        bigram = padded_word[i : i + 2]
+        seen[bigram] += 1
+        bigrams.append((bigram, seen[bigram]))
+
+    return bigrams
+
+#turns a list of positions into an integer with those bits set, i.e. [0, 2] -> 0b101
+def to_bitset(positions, num_positions):
+    bitmap = bytearray((num_positions + 7) // 8)
+    for position in positions:
+        bitmap[position >> 3] |= 1 << (position & 7)
+
+    return int.from_bytes(bitmap, "little")
+
+#the positions of the bits that are set in a bitset, from lowest to highest
+def from_bitset(bitset):
+    positions = []
+    while bitset:
+        lowest_bit = bitset & -bitset
+        positions.append(lowest_bit.bit_length() - 1)
+        bitset ^= lowest_bit
+
+    return positions
+
+#finds the names that are similar to a misspelled word, the same way did_you_mean always has:
+#similarity = 1 - (num_edits / length of the longer word) must be at least similarity_ratio.
+#
+#Instead of computing the distance to every name, the names are indexed by their bigrams. Every edit
+#changes at most 2 bigrams of a word, so a name within k edits of the word must share at least
+#(length of the longer word + 1 - 2k) of its bigrams. Only the names that pass that count (and whose
+#length is close enough) have their distance computed, and that computation stops once past k.
+#
+#The index stores, for each bigram, a bitset with one bit per name (bit i is set if name i contains
+#the bigram). That way the shared bigrams of every name can be counted at once, with a handful of
+#bitwise operations on big integers instead of a loop over all the names
+class CityMatcher:
+    def __init__(self, names, similarity_ratio):
+        self.names = list(names)
+        self.similarity_ratio = similarity_ratio
+        self.all_names = (1 << len(self.names)) - 1
+
+        positions_by_bigram = dict()
+        positions_by_length = dict()
+
+        for position, name in enumerate(self.names):
+            for bigram in get_bigrams(name):
+                positions_by_bigram.setdefault(bigram, []).append(position)
+
+            positions_by_length.setdefault(len(name), []).append(position)
+
+        #(bigram, occurrence) -> bitset of the names that contain it
+        self.index = {bigram: to_bitset(positions, len(self.names)) for bigram, positions in positions_by_bigram.items()}
+        #length -> bitset of the names of that length
+        self.by_length = {length: to_bitset(positions, len(self.names)) for length, positions in positions_by_length.items()}
+        #length of the longer word -> max number of edits allowed
+        self.max_edits_cache = dict()
+
+    def __is_similar(self, distance, longest):
+        return 1 - (distance / longest) >= self.similarity_ratio
+
+    #the largest number of edits that still counts as similar, for a given length of the longer word.
+    #Found using the same comparison did_you_mean uses, so that rounding can't change the results
+    def get_max_edits(self, longest):
+        max_edits = self.max_edits_cache.get(longest)
+
+        if max_edits is None:
+            if longest == 0:
+                max_edits = 0
+            else:
+                max_edits = -1
+                while max_edits < longest and self.__is_similar(max_edits + 1, longest):
+                    max_edits += 1
+
+            self.max_edits_cache[longest] = max_edits
+
+        return max_edits
+
+    #counts, for every name at once, how many of the given bitsets it is in. The counts are stored as
+    #binary numbers spread over several bitsets: bit i of count_bits[0] is the lowest bit of name i's
+    #count, bit i of count_bits[1] the next one, and so on. Adding a bitset works like adding 1 to
+    #every count whose bit is set, carrying over to the next level
+    def __count(self, bitsets):
+        count_bits = [0] * max(len(bitsets).bit_length(), 1)
+
+        for carry in bitsets:
+            for level in range(len(count_bits)):
+                if not carry:
+                    break
+
+                count_bits[level], carry = count_bits[level] ^ carry, count_bits[level] & carry
+
+        return count_bits
+
+    #bitset of the names whose count is at least min_count
+    def __at_least(self, count_bits, min_count):
+        if min_count >= 1 << len(count_bits):
+            return 0
+
+        #comparing the counts to min_count one binary digit at a time, starting from the highest
+        greater = 0
+        equal = self.all_names
+
+        for level in range(len(count_bits) - 1, -1, -1):
+            if (min_count >> level) & 1:
+                equal &= count_bits[level]
+            else:
+                greater |= equal & count_bits[level]
+                equal &= ~count_bits[level]
+
+        return greater | equal
+
+    #returns the similar names, in the same order as the names were given
+    def suggestions(self, word):
+        word_length = len(word)
+
+        #lengths that are close enough to the word's, and the number of shared bigrams each one needs
+        min_shared_by_length = dict()
+        #the names of the lengths where the bigram count can't rule anything out, they all get checked
+        candidates = 0
+
+        for length, names_of_length in self.by_length.items():
+            longest = max(word_length, length)
+            max_edits = self.get_max_edits(longest)
+
+            if max_edits < 0 or abs(word_length - length) > max_edits:
+                continue
+
+            min_shared = longest + 1 - 2 * max_edits
+            if min_shared > 0:
+                min_shared_by_length[length] = min_shared
+            else:
+                candidates |= names_of_length
+
+        if min_shared_by_length:
+            count_bits = self.__count([self.index.get(bigram, 0) for bigram in get_bigrams(word)])
+
+            for length, min_shared in min_shared_by_length.items():
+                candidates |= self.by_length[length] & self.__at_least(count_bits, min_shared)
+
+        matches = []
+        for position in from_bitset(candidates):
+            name = self.names[position]
+            longest = max(word_length, len(name))
+
+            #an empty word and an empty name are identical
+            if longest == 0:
+                matches.append(name)
+                continue
+
+            max_edits = self.get_max_edits(longest)
+            distance = bounded_distance(word, name, max_edits)
+
+            if distance <= max_edits and self.__is_similar(distance, longest):
+                matches.append(name)
+
+        return matches
@@ -0,0 +1,107 @@
+import codecs
+import json
+
+#once this many characters of the buffer have been read, they are dropped from it
+COMPACT_AFTER = 64 * 1024
+
+#reads a json document that arrives in chunks (i.e. bytes from a streamed http response) one value
+#at a time, so a value can be used as soon as it has arrived, without waiting for (or keeping in memory)
+#the rest of the document
+class JsonStream:
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        #the bytes are decoded as they come in, even if a character is split between two chunks
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.decoder = json.JSONDecoder()
+
+        self.buffer = ""
+        self.position = 0
+        self.finished = False
+
+    #adds the next chunk to the buffer. Returns False if there are no chunks left
+    def __read_more(self):
+        if self.finished:
+            return False
+
+        if self.position >= COMPACT_AFTER:
+            self.buffer = self.buffer[self.position:]
+            self.position = 0
+
+        for chunk in self.chunks:
+            text = self.text_decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                self.buffer += text
+                return True
+
+        self.buffer += self.text_decoder.decode(b"", final = True)
+        self.finished = True
+        return True
+
+    #returns the next character that isn't whitespace without consuming it, or "" at the end of the document
+    def peek(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+                self.position += 1
+
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+
+            if not self.__read_more():
+                return ""
+
+    def expect(self, character):
+        if self.peek() != character:
+            raise ValueError(f"Expected {character!r} at character {self.position} of the json document")
+
+        self.position += 1
+
+    #decodes the next complete value. Raises json.JSONDecodeError (a ValueError) if the document ends before it does
+    def read_value(self):
+        self.peek()
+
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+
+                #a number at the very end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.finished:
+                    self.position = end
+                    return value
+
+            except json.JSONDecodeError:
+                #the value may just not have fully arrived yet, unless the whole document is in
+                if self.finished:
+                    raise
+
+            self.__read_more()
+
+#yields the items of the array stored under key in the document's top-level object, one at a time, as
+#soon as each one has arrived. The document's other top-level values are decoded and skipped. Yields
+#nothing if the document has no such key. Raises ValueError if the document is cut short, even once all
+#the items have been yielded
+def iter_json_array(chunks, key):
+    stream = JsonStream(chunks)
+    stream.expect("{")
+
+    while stream.peek() not in ("}", ""):
+        name = stream.read_value()
+        stream.expect(":")
+
+        if name != key or stream.peek() != "[":
+            stream.read_value()
+        else:
+            stream.expect("[")
+
+            while stream.peek() != "]":
+                yield stream.read_value()
+
+                if stream.peek() == ",":
+                    stream.expect(",")
+
+            stream.expect("]")
+
+        if stream.peek() == ",":
+            stream.expect(",")
+
+    #a document that ends before its closing brace was cut short
+    stream.expect("}")
@@ -0,0 +1,269 @@
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timedelta
+from MockAmadeus import MockAmadeus, AIRPORTS, start_in_background
+
+#runs many scripted user sessions at the same time against a local MockAmadeus.py server, through the
+#same API_CALLER the programs use (with its caches, connection pool, token sharing & rate limiter), and
+#reports the throughput and the 50th/95th/99th percentile latency of each step and of whole sessions.
+#
+#   - a flight search session does what FlightSearch.py does: streams the flight offers of a search and
+#     looks up the airlines of the first page
+#   - a flight inspiration session does what FlightInspiration.py does: looks up the city codes of 1 to 3
+#     origin cities, searches their cheapest destinations, looks up the locations of the results, then
+#     streams the flight offers of one of the options
+#
+#Usage: python LoadTest.py [--sessions 200] [--concurrency 20] [--mix 0.5] [--latency 0.2] ...
+#
+#The mock is started in this process, unless --url points at one that is already running (or at a search
+#daemon's api, see AMADEUS_BASE_URL in ApiCalls.py). The api calls are still paced by ENDPOINT_RATES, like
+#in the programs, so the throughput reported is what the programs would get, not what the mock can take
+
+SESSIONS = 200
+CONCURRENCY = 20
+#share of the sessions that are flight searches, the rest are flight inspiration searches
+SEARCH_SHARE = 0.5
+#the offers on the first page, whose airlines get looked up (same as FlightSearch.PER_PAGE)
+PER_PAGE = 8
+
+#the percentiles in the report
+PERCENTILES = (50, 95, 99)
+
+#the durations of every step, by step name, from all the sessions
+class Timings:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.durations = dict()
+        self.failures = dict()
+
+    def record(self, name, seconds, failed = False):
+        with self.lock:
+            self.durations.setdefault(name, []).append(seconds)
+            if failed:
+                self.failures[name] = self.failures.get(name, 0) + 1
+
+    #times the with block as the step name. The block marks the step failed with step["failed"] = True
+    @contextmanager
+    def step(self, name):
+        step = {"failed": False}
+        started_at = time.perf_counter()
+
+        try:
+            yield step
+        except Exception:
+            step["failed"] = True
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started_at, step["failed"])
+
+#the nearest-rank percentile of a sorted list
+def percentile(sorted_values, percent):
+    rank = max(math.ceil(len(sorted_values) * percent / 100), 1)
+    return sorted_values[rank - 1]
+
+#---Sessions---
+
+#a date num_days from today, as a YYYY-MM-DD string
+def get_date(num_days):
+    return (datetime.today() + timedelta(days = num_days)).strftime("%Y-%m-%d")
+
+def flight_search_session(rng, timings):
+    from ApiCalls import API_CALLER
+    from FlightModels import FlightOffer
+    from FormattingData import get_airline, get_carrier_codes
+
+    origin_airport, destination_airport = rng.sample(sorted(AIRPORTS), 2)
+    days_ahead = rng.randint(7, 90)
+    trip = rng.choice(["rt", "ow"])
+
+    details = {
+        "origin_airport": origin_airport,
+        "destination_airport": destination_airport,
+        "departure_date": get_date(days_ahead),
+        "return_date": get_date(days_ahead + rng.randint(2, 14)) if trip == "rt" else None,
+        "max_price": rng.choice([None, 1000, 2500]),
+        "trip": trip,
+        "travelers": {"ADULT": rng.randint(1, 2), "SENIOR": 0, "CHILD": rng.randint(0, 2), "HELD_INFANT": 0, "SEATED_INFANT": 0}
+    }
+
+    with timings.step("flight-offers") as step:
+        flight_offers = API_CALLER.stream_flight_offers(details)
+        if flight_offers is None:
+            step["failed"] = True
+            return False
+
+        flights = [FlightOffer(offer_dict) for offer_dict in flight_offers]
+
+    with timings.step("airlines"):
+        get_airline(get_carrier_codes(flights[:PER_PAGE]))
+
+    return True
+
+def flight_inspiration_session(rng, timings):
+    from ApiCalls import API_CALLER, CITY_INDEX
+    from FormattingData import get_flight_inspo_results
+    from FlightInspiration import get_option_search_details
+    from Validation import parse_date, get_latest_departure_date
+
+    city_names = rng.sample(sorted({city_name.lower() for city_name, country_name, city_code in AIRPORTS.values()}), rng.randint(1, 3))
+
+    with timings.step("city-codes") as step:
+        origin_city_codes = [CITY_INDEX.get(city_name) or API_CALLER.get_city_code(city_name) for city_name in city_names]
+        origin_city_codes = [city_code for city_code in origin_city_codes if city_code]
+        if not origin_city_codes:
+            step["failed"] = True
+            return False
+
+    days_ahead = rng.randint(7, 60)
+    earliest = parse_date(get_date(days_ahead))
+    latest = earliest + timedelta(days = rng.randint(10, 20))
+    min_duration = rng.randint(3, 7)
+    max_duration = min_duration + rng.randint(0, 3)
+    budget = rng.choice([600, 1000, 1500])
+
+    latest_departure_date = get_latest_departure_date(earliest, latest, min_duration)
+    details = {
+        "duration": f"{min_duration},{max_duration}",
+        "departure_date_range": ",".join([earliest.strftime("%Y-%m-%d"), latest_departure_date.strftime("%Y-%m-%d")])
+    }
+
+    with timings.step("cheapest-cities") as step:
+        flight_inspo_data_list = API_CALLER.get_cheapest_cities(details, origin_city_codes)
+        if not flight_inspo_data_list:
+            step["failed"] = True
+            return False
+
+    with timings.step("locations"):
+        fully_sorted_list = get_flight_inspo_results(flight_inspo_data_list, (earliest, latest), (min_duration, max_duration))
+
+    #no options fit the search, the user would stop here
+    if not fully_sorted_list:
+        return True
+
+    selected_flight_entry = get_option_search_details(rng.choice(fully_sorted_list), budget)
+
+    with timings.step("flight-offers") as step:
+        flight_offers = API_CALLER.stream_flight_offers(selected_flight_entry)
+        if flight_offers is None:
+            step["failed"] = True
+            return False
+
+        for offer_dict in flight_offers:
+            pass
+
+    return True
+
+SESSION_TYPES = {
+    "flights": flight_search_session,
+    "inspiration": flight_inspiration_session
+}
+
+#runs one session, timing it as a whole under "session <type>"
+def run_session(session_type, seed, timings):
+    rng = random.Random(seed)
+
+    started_at = time.perf_counter()
+    try:
+        completed = SESSION_TYPES[session_type](rng, timings)
+    except Exception as error:
+        print(f"Session failed: {error!r}")
+        completed = False
+
+    timings.record(f"session {session_type}", time.perf_counter() - started_at, not completed)
+
+    return completed
+
+#runs the sessions, concurrency of them at a time. Returns (Timings, seconds taken, completed sessions)
+def run_load(num_sessions, concurrency, search_share, seed):
+    rng = random.Random(seed)
+    sessions = [("flights" if rng.random() < search_share else "inspiration", rng.random()) for x in range(num_sessions)]
+
+    timings = Timings()
+    started_at = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers = concurrency) as executor:
+        results = list(executor.map(lambda session: run_session(*session, timings), sessions))
+
+    return timings, time.perf_counter() - started_at, sum(results)
+
+def print_report(timings, seconds, num_sessions, completed):
+    print(f"{num_sessions} sessions in {seconds:.1f}s: {num_sessions / seconds:.1f} sessions/s ({completed} completed)")
+
+    columns = "".join(f"{f"p{percent}":>10}" for percent in PERCENTILES)
+    print(f"\t{"step":<22}{"count":>7}{"failed":>8}{"per s":>9}{columns}")
+
+    #the sessions last, after their steps
+    names = sorted(timings.durations, key = lambda name: (name.startswith("session"), name))
+    for name in names:
+        durations = sorted(timings.durations[name])
+        failed = timings.failures.get(name, 0)
+        columns = "".join(f"{percentile(durations, percent) * 1000:>8.1f}ms" for percent in PERCENTILES)
+
+        print(f"\t{name:<22}{len(durations):>7}{failed:>8}{len(durations) / seconds:>9.1f}{columns}")
+
+def main():
+    parser = argparse.ArgumentParser(description = "Load tests the api calls of the programs against a local stand-in for the amadeus api.")
+    parser.add_argument("--sessions", type = int, default = SESSIONS, help = f"number of user sessions to run (default: {SESSIONS})")
+    parser.add_argument("--concurrency", type = int, default = CONCURRENCY, help = f"sessions running at the same time (default: {CONCURRENCY})")
+    parser.add_argument("--mix", type = float, default = SEARCH_SHARE, help = f"share of flight search sessions, the rest are flight inspiration (default: {SEARCH_SHARE})")
+    parser.add_argument("--seed", type = int, default = 0, help = "seed of the sessions & the mock's faults")
+    parser.add_argument("--url", help = "address of an already running mock, instead of starting one")
+    parser.add_argument("--latency", type = float, default = 0.2, help = "seconds each mock answer takes (default: 0.2)")
+    parser.add_argument("--latency-jitter", type = float, default = 0.1, help = "up to this many more seconds (default: 0.1)")
+    parser.add_argument("--error-rate", type = float, default = 0, help = "share of mock answers that are 500s")
+    parser.add_argument("--throttle-rate", type = float, default = 0, help = "share of mock answers that are 429s")
+    parser.add_argument("--reference-db", help = "reference data store to use (default: a new, empty one, so every lookup reaches the mock)")
+    args = parser.parse_args()
+
+    if args.sessions <= 0 or args.concurrency <= 0:
+        parser.error("--sessions and --concurrency must be greater than 0")
+
+    mock = None
+    if args.url:
+        url = args.url
+    else:
+        mock = MockAmadeus(args.latency, args.latency_jitter, args.error_rate, args.throttle_rate, seed = args.seed)
+        server, url = start_in_background(mock)
+
+    #read by ApiCalls when it is first imported, which is only done by the sessions
+    os.environ["AMADEUS_BASE_URL"] = url
+    #the calls have to reach the mock, not a search daemon
+    os.environ.pop("SEARCH_DAEMON_URL", None)
+
+    import ApiCalls
+    temp_folder = None
+    if args.reference_db:
+        ApiCalls.REFERENCE_STORE.db_path = args.reference_db
+    else:
+        temp_folder = tempfile.TemporaryDirectory()
+        ApiCalls.REFERENCE_STORE.db_path = os.path.join(temp_folder.name, "reference_data.db")
+        ApiCalls.REFERENCE_STORE.import_files = (None, None, None)
+
+    print(f"Load testing against {url}...", file = sys.stderr)
+
+    #what the api calls print (i.e. error messages) goes to stderr, so the report stays readable
+    with redirect_stdout(sys.stderr):
+        timings, seconds, completed = run_load(args.sessions, args.concurrency, args.mix, args.seed)
+
+    print_report(timings, seconds, args.sessions, completed)
+
+    if mock is not None:
+        print("\tMock answers: " + ", ".join(f"{key}: {count}" for key, count in sorted(mock.stats()["answers"].items())))
+
+    if temp_folder is not None:
+        #the new locations & airlines are written to the store before it is deleted, not when the program exits
+        ApiCalls.AIRPORT_LOCATION_INDEX.flush()
+        ApiCalls.AIRLINE_INDEX.flush()
+        temp_folder.cleanup()
+
+#---Main---
+if __name__ == "__main__":
+    main()
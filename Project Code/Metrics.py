@@ -0,0 +1,281 @@
+import atexit
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from types import MethodType
+
+#metrics of the api calls (latency, status codes, bytes, token refreshes, cache hits) and of the stages
+#of the formatting pipelines (fetch, filter, enrich, group, render), kept in memory by the process.
+#They are off unless the METRICS_ENABLED environment variable is set (to anything but 0), in which case:
+#   - METRICS_FILE=path writes them to path when the program exits (json if it ends in .json, otherwise
+#     the prometheus text format)
+#   - a SearchDaemon.py serves them at GET /metrics (prometheus) and GET /metrics.json
+#When they are off, METRICS is a NullMetrics whose methods do nothing, so the code that records them costs
+#a method call and nothing more
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "") not in ("", "0")
+METRICS_FILE = os.environ.get("METRICS_FILE")
+
+#upper bounds, in seconds, of the buckets of the duration histograms
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+#how many of the most recent spans are kept, to see what a slow search spent its time on
+MAX_SPANS = 1000
+
+#name -> (type, description) of every metric, as shown in the prometheus format
+DESCRIPTIONS = {
+    "api_request_seconds": ("histogram", "Time from sending an api request to receiving its response headers."),
+    "api_responses_total": ("counter", "Api responses, by endpoint and status code."),
+    "api_request_errors_total": ("counter", "Api requests that got no response at all (timeouts, connection errors)."),
+    "api_sent_bytes_total": ("counter", "Bytes of request bodies sent to the api."),
+    "api_received_bytes_total": ("counter", "Bytes of response bodies received from the api."),
+    "token_refreshes_total": ("counter", "Access tokens fetched from the token endpoint, by outcome."),
+    "cache_hits_total": ("counter", "Searches answered from a response cache."),
+    "cache_misses_total": ("counter", "Searches a response cache could not answer."),
+    "cache_hit_ratio": ("gauge", "Share of the searches answered from a response cache."),
+    "pipeline_stage_seconds": ("histogram", "Time spent in each stage of the formatting pipelines.")
+}
+#metrics worked out from two others when exported: name -> (hits, misses), the ratio being hits / (hits + misses)
+#for each set of labels
+RATIOS = {
+    "cache_hit_ratio": ("cache_hits_total", "cache_misses_total")
+}
+
+#the labels of a sample as a hashable, ordered key
+def get_label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+#i.e. {endpoint="/v2/shopping/flight-offers",status="200"}
+def format_labels(label_key):
+    if not label_key:
+        return ""
+
+    return "{" + ",".join(f"{name}=\"{escape_label_value(value)}\"" for name, value in label_key) + "}"
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, num_buckets):
+        #the number of values in each bucket, plus the values above the last bound
+        self.counts = [0] * (num_buckets + 1)
+        self.sum = 0
+        self.count = 0
+
+class Metrics:
+    enabled = True
+
+    def __init__(self, buckets = LATENCY_BUCKETS, max_spans = MAX_SPANS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+
+        #(name, label key) -> value
+        self.counters = dict()
+        #(name, label key) -> Histogram
+        self.histograms = dict()
+        #references to the functions returning samples read when the metrics are exported, see add_collector
+        self.collectors = []
+
+        self.spans = deque(maxlen = max_spans)
+        #the spans open on each thread, innermost last
+        self.local = threading.local()
+
+    def count(self, name, amount = 1, **labels):
+        key = (name, get_label_key(labels))
+
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, get_label_key(labels))
+
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(len(self.buckets))
+
+            histogram.counts[bisect_left(self.buckets, value)] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    #times the with block as a stage of a pipeline, i.e.
+    #   with METRICS.span("group", pipeline = "inspiration"):
+    #       ...
+    #The time goes into the pipeline_stage_seconds histogram, and the span itself into the recent spans,
+    #with the span it was opened in (on the same thread) as its parent
+    @contextmanager
+    def span(self, stage, **labels):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+
+        parent = stack[-1] if stack else None
+        stack.append(stage)
+
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+
+            self.observe("pipeline_stage_seconds", seconds, stage = stage, **labels)
+            with self.lock:
+                self.spans.append({
+                    "stage": stage,
+                    "labels": labels,
+                    "parent": parent,
+                    "thread": threading.current_thread().name,
+                    "started_at": started_at,
+                    "seconds": seconds
+                })
+
+    #collector is called whenever the metrics are exported, and returns a list of (name, labels, value)
+    #samples of counters that are already kept elsewhere (i.e. the hits of a cache). The samples with the
+    #same name & labels from different collectors (i.e. two ApiCallers) are added up. A method is only held
+    #weakly, so registering it doesn't keep its object alive, and it is dropped once the object is gone
+    def add_collector(self, collector):
+        if isinstance(collector, MethodType):
+            reference = weakref.WeakMethod(collector)
+        else:
+            reference = lambda: collector
+
+        with self.lock:
+            self.collectors.append(reference)
+
+    #the samples of the collectors, and the RATIOS worked out from them, as ((name, label key), value) pairs
+    def __collect(self):
+        with self.lock:
+            self.collectors = [reference for reference in self.collectors if reference() is not None]
+            collectors = [reference() for reference in self.collectors]
+
+        samples = dict()
+        for collector in collectors:
+            #the object of a method can be gone by now
+            if collector is None:
+                continue
+
+            for name, labels, value in collector():
+                key = (name, get_label_key(labels))
+                samples[key] = samples.get(key, 0) + value
+
+        for ratio_name, (hits_name, misses_name) in RATIOS.items():
+            for (name, label_key), hits in list(samples.items()):
+                if name == hits_name:
+                    total = hits + samples.get((misses_name, label_key), 0)
+                    samples[(ratio_name, label_key)] = round(hits / total, 4) if total else 0
+
+        return list(samples.items())
+
+    #every metric, and the recent spans, as a dictionary that can be written as json
+    def snapshot(self):
+        collected = self.__collect()
+
+        with self.lock:
+            counters = list(self.counters.items())
+            histograms = [(key, list(histogram.counts), histogram.sum, histogram.count) for key, histogram in self.histograms.items()]
+            spans = list(self.spans)
+
+        metrics = []
+        for (name, label_key), value in counters + collected:
+            metrics.append({"name": name, "type": DESCRIPTIONS.get(name, ("gauge", ""))[0], "labels": dict(label_key), "value": value})
+
+        for (name, label_key), counts, total, count in histograms:
+            metrics.append({
+                "name": name,
+                "type": "histogram",
+                "labels": dict(label_key),
+                "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], counts)),
+                "sum": total,
+                "count": count
+            })
+
+        metrics.sort(key = lambda metric: (metric["name"], sorted(metric["labels"].items())))
+
+        return {"timestamp": time.time(), "metrics": metrics, "spans": spans}
+
+    #every metric in the prometheus text format
+    def to_prometheus(self):
+        lines = []
+        described = set()
+
+        for metric in self.snapshot()["metrics"]:
+            name = metric["name"]
+            label_key = get_label_key(metric["labels"])
+
+            if name not in described:
+                described.add(name)
+                metric_type, description = DESCRIPTIONS.get(name, (metric["type"], ""))
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {metric_type}")
+
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{format_labels(label_key)} {metric["value"]}")
+                continue
+
+            #the buckets of the prometheus format count every value up to their bound, not just their own
+            cumulative = 0
+            for bound, count in metric["buckets"].items():
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(label_key + (("le", bound),))} {cumulative}")
+
+            lines.append(f"{name}_sum{format_labels(label_key)} {metric["sum"]}")
+            lines.append(f"{name}_count{format_labels(label_key)} {metric["count"]}")
+
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent = 4)
+
+    #writes the metrics to path, as json if it ends in .json, otherwise in the prometheus text format
+    def write(self, path):
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+
+        try:
+            with open(path, "w") as file:
+                file.write(text)
+        except OSError as error:
+            print("Could not write the metrics: ", error)
+
+#what METRICS is when the metrics are off: it has the same methods as Metrics, doing nothing
+class NullMetrics:
+    enabled = False
+
+    def count(self, name, amount = 1, **labels):
+        pass
+
+    def observe(self, name, value, **labels):
+        pass
+
+    def span(self, stage, **labels):
+        return NULL_SPAN
+
+    def add_collector(self, collector):
+        pass
+
+    def snapshot(self):
+        return {"timestamp": time.time(), "metrics": [], "spans": []}
+
+    def to_prometheus(self):
+        return ""
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent = 4)
+
+    def write(self, path):
+        pass
+
+#nullcontext can be entered any number of times, so one is shared by every span
+NULL_SPAN = nullcontext()
+
+#the metrics of the whole process
+METRICS = Metrics() if METRICS_ENABLED else NullMetrics()
+
+if METRICS_ENABLED and METRICS_FILE:
+    atexit.register(METRICS.write, METRICS_FILE)
@@ -0,0 +1,451 @@
+import argparse
+import itertools
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from ResponseCache import canonical_key
+
+#a local stand-in for the amadeus api, answering the same endpoints ApiCaller calls with made up (or
+#recorded) data, so the programs can be tried, tested and load tested without api keys or quotas.
+#
+#Start it with:   python MockAmadeus.py [--port 8800] [--latency 0.3] [--error-rate 0.01] ...
+#then set ENV = "local" in ApiCalls.py, or the AMADEUS_BASE_URL environment variable to its address.
+#
+#The made up data is the same every time for the same request. Recorded payloads (--recorded) are
+#answered as is instead, see load_recorded(). GET /mock/stats returns how many requests each endpoint got
+
+MOCK_HOST = "127.0.0.1"
+MOCK_PORT = 8800
+
+TOKEN_ENDPOINT = "/v1/security/oauth2/token"
+LOCATIONS_ENDPOINT = "/v1/reference-data/locations"
+AIRLINES_ENDPOINT = "/v1/reference-data/airlines"
+FLIGHT_OFFERS_ENDPOINT = "/v2/shopping/flight-offers"
+FLIGHT_DESTINATIONS_ENDPOINT = "/v1/shopping/flight-destinations"
+
+#airport code -> (city name, country name, city code)
+AIRPORTS = {
+    "YUL": ("MONTREAL", "CANADA", "YMQ"),
+    "YYZ": ("TORONTO", "CANADA", "YTO"),
+    "YVR": ("VANCOUVER", "CANADA", "YVR"),
+    "JFK": ("NEW YORK", "UNITED STATES OF AMERICA", "NYC"),
+    "LAX": ("LOS ANGELES", "UNITED STATES OF AMERICA", "LAX"),
+    "MIA": ("MIAMI", "UNITED STATES OF AMERICA", "MIA"),
+    "CUN": ("CANCUN", "MEXICO", "CUN"),
+    "LHR": ("LONDON", "UNITED KINGDOM", "LON"),
+    "CDG": ("PARIS", "FRANCE", "PAR"),
+    "NCE": ("NICE", "FRANCE", "NCE"),
+    "MAD": ("MADRID", "SPAIN", "MAD"),
+    "BCN": ("BARCELONA", "SPAIN", "BCN"),
+    "LIS": ("LISBON", "PORTUGAL", "LIS"),
+    "FCO": ("ROME", "ITALY", "ROM"),
+    "AMS": ("AMSTERDAM", "NETHERLANDS", "AMS"),
+    "BER": ("BERLIN", "GERMANY", "BER"),
+    "ATH": ("ATHENS", "GREECE", "ATH"),
+    "DUB": ("DUBLIN", "IRELAND", "DUB"),
+    "KEF": ("REYKJAVIK", "ICELAND", "REK"),
+    "NRT": ("TOKYO", "JAPAN", "TYO")
+}
+
+#city code -> the airport flights to that city land at. Like the programs, the flight-destinations answers
+#name the destinations by these airport codes
+CITY_AIRPORTS = {city_code: airport_code for airport_code, (city, country, city_code) in AIRPORTS.items()}
+
+#carrier code -> airline name. Unknown codes are answered with a made up name
+AIRLINES = {
+    "AC": "AIR CANADA",
+    "TS": "AIR TRANSAT",
+    "WS": "WESTJET",
+    "AF": "AIR FRANCE",
+    "BA": "BRITISH AIRWAYS",
+    "LH": "LUFTHANSA",
+    "KL": "KLM",
+    "IB": "IBERIA",
+    "TP": "TAP PORTUGAL",
+    "FI": "ICELANDAIR",
+    "DL": "DELTA AIR LINES",
+    "UA": "UNITED AIRLINES"
+}
+
+#the most offers a flight-offers search answers with
+MAX_OFFERS = 20
+#what each traveler type pays, as a share of an adult's fare
+FARE_SHARES = {"ADULT": 1, "SENIOR": 0.9, "CHILD": 0.75, "SEATED_INFANT": 0.75, "HELD_INFANT": 0.1}
+
+#a random number generator that gives the same numbers every time for the same request
+def get_rng(*parts):
+    return random.Random(canonical_key(parts))
+
+#an error response in the format of the amadeus api
+def make_error(status, title, detail = ""):
+    return {"errors": [{"status": status, "code": status, "title": title, "detail": detail}]}
+
+#---Made up payloads---
+
+def get_locations_payload(params):
+    sub_type = params.get("subType", "")
+    keyword = params.get("keyword", "").strip().upper()
+
+    data = []
+    for airport_code, (city_name, country_name, city_code) in AIRPORTS.items():
+        if sub_type == "AIRPORT" and airport_code == keyword:
+            matches = True
+        elif sub_type == "CITY" and city_name.startswith(keyword):
+            matches = True
+        else:
+            matches = False
+
+        if matches:
+            data.append({
+                "type": "location",
+                "subType": sub_type,
+                "iataCode": airport_code if sub_type == "AIRPORT" else city_code,
+                "address": {"cityName": city_name, "cityCode": city_code, "countryName": country_name}
+            })
+
+    return {"meta": {"count": len(data)}, "data": data}
+
+def get_airlines_payload(params):
+    carrier_codes = [code.strip().upper() for code in params.get("airlineCodes", "").split(",") if code.strip()]
+
+    data = []
+    for carrier_code in carrier_codes:
+        name = AIRLINES.get(carrier_code, f"{carrier_code} AIRWAYS")
+        data.append({"type": "airline", "iataCode": carrier_code, "businessName": name, "commonName": name})
+
+    return {"meta": {"count": len(data)}, "data": data}
+
+#i.e. 490 -> "PT8H10M"
+def format_duration(minutes):
+    hours, minutes = divmod(minutes, 60)
+
+    if minutes == 0:
+        return f"PT{hours}H"
+    if hours == 0:
+        return f"PT{minutes}M"
+
+    return f"PT{hours}H{minutes}M"
+
+def make_itinerary(origin, destination, date, carrier_code, rng):
+    departure_at = datetime.fromisoformat(date) + timedelta(minutes = rng.randrange(6 * 60, 23 * 60, 5))
+    minutes = rng.randrange(60, 15 * 60, 5)
+    arrival_at = departure_at + timedelta(minutes = minutes)
+
+    return {
+        "duration": format_duration(minutes),
+        "segments": [{
+            "departure": {"iataCode": origin, "at": departure_at.isoformat()},
+            "arrival": {"iataCode": destination, "at": arrival_at.isoformat()},
+            "carrierCode": carrier_code,
+            "number": str(rng.randint(100, 9999)),
+            "duration": format_duration(minutes),
+            "numberOfStops": 0
+        }]
+    }
+
+def get_flight_offers_payload(body):
+    rng = get_rng(body)
+
+    origin_destinations = body.get("originDestinations") or []
+    travelers = body.get("travelers") or []
+    currency = body.get("currencyCode", "CAD")
+    criteria = body.get("searchCriteria") or {}
+    max_price = criteria.get("maxPrice")
+    max_offers = min(criteria.get("maxFlightOffers") or MAX_OFFERS, MAX_OFFERS)
+
+    offers = []
+    for offer_id in range(1, rng.randint(0, max_offers) + 1):
+        carrier_code = rng.choice(list(AIRLINES))
+
+        itineraries = []
+        for origin_destination in origin_destinations:
+            date = origin_destination.get("departureDateTimeRange", {}).get("date")
+            itineraries.append(make_itinerary(
+                origin_destination.get("originLocationCode"),
+                origin_destination.get("destinationLocationCode"),
+                date,
+                carrier_code,
+                rng
+            ))
+
+        adult_fare = rng.uniform(150, 900) * len(itineraries)
+        traveler_pricings = []
+        grand_total = 0
+        for traveler in travelers:
+            fare = round(adult_fare * FARE_SHARES.get(traveler.get("travelerType"), 1), 2)
+            grand_total += fare
+            traveler_pricings.append({
+                "travelerId": traveler.get("id"),
+                "travelerType": traveler.get("travelerType"),
+                "price": {"currency": currency, "total": f"{fare:.2f}"}
+            })
+
+        if max_price is not None and grand_total > max_price:
+            continue
+
+        offers.append({
+            "type": "flight-offer",
+            "id": str(offer_id),
+            "source": "GDS",
+            "itineraries": itineraries,
+            "price": {"currency": currency, "total": f"{grand_total:.2f}", "grandTotal": f"{grand_total:.2f}"},
+            "validatingAirlineCodes": [carrier_code],
+            "travelerPricings": traveler_pricings
+        })
+
+    return {"meta": {"count": len(offers)}, "data": offers}
+
+def get_flight_destinations_payload(params):
+    origin = params.get("origin", "").upper()
+    rng = get_rng(params)
+
+    try:
+        earliest, latest = [datetime.fromisoformat(date) for date in params.get("departureDate", "").split(",")]
+        durations = [int(days) for days in params.get("duration", "").split(",")]
+    except ValueError:
+        return None
+
+    origin_airport = CITY_AIRPORTS.get(origin)
+    if origin_airport is None:
+        return {"data": []}
+
+    min_duration, max_duration = min(durations), max(durations)
+    num_days = (latest - earliest).days
+
+    data = []
+    for destination_airport in rng.sample(sorted(CITY_AIRPORTS.values()), rng.randint(3, 10)):
+        if destination_airport == origin_airport:
+            continue
+
+        departure_date = earliest + timedelta(days = rng.randint(0, max(num_days, 0)))
+        #the programs count both travel days in the duration of a trip
+        return_date = departure_date + timedelta(days = rng.randint(min_duration, max_duration) - 1)
+
+        data.append({
+            "type": "flight-destination",
+            "origin": origin,
+            "destination": destination_airport,
+            "departureDate": departure_date.strftime("%Y-%m-%d"),
+            "returnDate": return_date.strftime("%Y-%m-%d"),
+            "price": {"total": f"{rng.uniform(200, 1500):.2f}"}
+        })
+
+    return {"data": data}
+
+#---Server---
+
+#reads a json file of recorded payloads, mapping endpoints to the payload (or list of payloads, answered
+#in turn) to answer with, i.e. {"/v2/shopping/flight-offers": [{"data": [...]}, {"data": [...]}]}
+def load_recorded(path):
+    with open(path, "r") as file:
+        recorded = json.load(file)
+
+    return {endpoint: itertools.cycle(payloads if isinstance(payloads, list) else [payloads]) for endpoint, payloads in recorded.items()}
+
+#the settings of a mock server and what it has answered so far
+class MockAmadeus:
+    def __init__(self, latency = 0, latency_jitter = 0, error_rate = 0, throttle_rate = 0, rate_limit = 0, token_ttl = 1799, recorded = None, seed = None):
+        #seconds each answer takes, plus up to latency_jitter more
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        #share of the requests answered with a 500, and with a 429
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        #requests per second each endpoint accepts before answering 429s (0 for no limit)
+        self.rate_limit = rate_limit
+        self.token_ttl = token_ttl
+        self.recorded = recorded or dict()
+
+        #for the latency & the faults only, the payloads are the same whatever the seed
+        self.rng = random.Random(seed)
+        self.tokens = set()
+        #endpoint -> (second, requests in that second)
+        self.windows = dict()
+        #"endpoint status" -> number of answers
+        self.counts = dict()
+        self.lock = threading.Lock()
+
+    def __random(self):
+        with self.lock:
+            return self.rng.random()
+
+    def __over_rate_limit(self, endpoint):
+        if not self.rate_limit:
+            return False
+
+        second = int(time.monotonic())
+        with self.lock:
+            window_second, count = self.windows.get(endpoint, (second, 0))
+            if window_second != second:
+                count = 0
+
+            self.windows[endpoint] = (second, count + 1)
+            return count >= self.rate_limit
+
+    def record(self, endpoint, status):
+        with self.lock:
+            key = f"{endpoint} {status}"
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def new_token(self):
+        with self.lock:
+            token = f"mock-token-{len(self.tokens) + 1}"
+            self.tokens.add(token)
+
+        return {"type": "amadeusOAuth2Token", "access_token": token, "token_type": "Bearer", "expires_in": self.token_ttl, "state": "approved"}
+
+    def is_authorized(self, headers):
+        token = headers.get("Authorization", "").removeprefix("Bearer ")
+        with self.lock:
+            return token in self.tokens
+
+    #returns (status, payload, extra headers) for a request to endpoint
+    def answer(self, method, endpoint, params, body, headers):
+        time.sleep(self.latency + self.latency_jitter * self.__random())
+
+        if endpoint == TOKEN_ENDPOINT and method == "POST":
+            return 200, self.new_token(), {}
+
+        handlers = {
+            ("GET", LOCATIONS_ENDPOINT): lambda: get_locations_payload(params),
+            ("GET", AIRLINES_ENDPOINT): lambda: get_airlines_payload(params),
+            ("POST", FLIGHT_OFFERS_ENDPOINT): lambda: get_flight_offers_payload(body),
+            ("GET", FLIGHT_DESTINATIONS_ENDPOINT): lambda: get_flight_destinations_payload(params)
+        }
+
+        handler = handlers.get((method, endpoint))
+        if handler is None:
+            return 404, make_error(404, "RESOURCE NOT FOUND", f"{method} {endpoint}"), {}
+
+        if not self.is_authorized(headers):
+            return 401, make_error(401, "Invalid access token", "The access token provided in the Authorization header is invalid"), {}
+
+        if self.__over_rate_limit(endpoint) or self.__random() < self.throttle_rate:
+            return 429, make_error(429, "Too many requests", "The network rate limit is exceeded, please try again later"), {"Retry-After": "1"}
+
+        if self.__random() < self.error_rate:
+            return 500, make_error(500, "SYSTEM ERROR HAS OCCURRED"), {}
+
+        recorded = self.recorded.get(endpoint)
+        if recorded is not None:
+            with self.lock:
+                return 200, next(recorded), {}
+
+        payload = handler()
+        if payload is None:
+            return 400, make_error(400, "INVALID FORMAT", "Check the format of the query parameters"), {}
+
+        return 200, payload, {}
+
+    def stats(self):
+        with self.lock:
+            return {"tokens_issued": len(self.tokens), "answers": dict(self.counts)}
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def __send_json(self, status, payload, headers):
+        data = json.dumps(payload).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/vnd.amadeus+json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        self.wfile.write(data)
+
+    def __handle(self, method):
+        mock = self.server.mock
+        parts = urlsplit(self.path)
+
+        if parts.path == "/mock/stats":
+            self.__send_json(200, mock.stats(), {})
+            return
+
+        params = {name: values[0] for name, values in parse_qs(parts.query).items()}
+        length = int(self.headers.get("Content-Length", 0))
+        raw_body = self.rfile.read(length) if length else b""
+
+        body = None
+        if raw_body and self.headers.get("Content-Type", "").startswith("application/json"):
+            try:
+                body = json.loads(raw_body)
+            except ValueError:
+                self.__send_json(400, make_error(400, "INVALID FORMAT", "The body is not valid json"), {})
+                return
+
+        status, payload, headers = mock.answer(method, parts.path, params, body, self.headers)
+        mock.record(parts.path, status)
+        self.__send_json(status, payload, headers)
+
+    def do_GET(self):
+        self.__handle("GET")
+
+    def do_POST(self):
+        self.__handle("POST")
+
+    #the default prints a line for every request
+    def log_message(self, format, *args):
+        pass
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, mock):
+        super().__init__(address, MockRequestHandler)
+        self.mock = mock
+
+    #a client closing its connection while it is being answered is expected, not worth a traceback
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+
+        super().handle_error(request, client_address)
+
+#starts a mock server in a background thread (port 0 picks a free port). Returns (server, its address)
+def start_in_background(mock, host = MOCK_HOST, port = 0):
+    server = MockServer((host, port), mock)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description = "A local stand-in for the amadeus api.")
+    parser.add_argument("--host", default = MOCK_HOST)
+    parser.add_argument("--port", type = int, default = MOCK_PORT)
+    parser.add_argument("--latency", type = float, default = 0.2, help = "seconds each answer takes (default: 0.2)")
+    parser.add_argument("--latency-jitter", type = float, default = 0.1, help = "up to this many more seconds (default: 0.1)")
+    parser.add_argument("--error-rate", type = float, default = 0, help = "share of requests answered with a 500")
+    parser.add_argument("--throttle-rate", type = float, default = 0, help = "share of requests answered with a 429")
+    parser.add_argument("--rate-limit", type = int, default = 0, help = "requests per second per endpoint before 429s (0: no limit)")
+    parser.add_argument("--token-ttl", type = int, default = 1799, help = "seconds the tokens are valid for")
+    parser.add_argument("--recorded", help = "json file of recorded payloads to answer with, by endpoint")
+    parser.add_argument("--seed", type = int, help = "seed for the latency & faults")
+    args = parser.parse_args()
+
+    mock = MockAmadeus(
+        args.latency, args.latency_jitter, args.error_rate, args.throttle_rate, args.rate_limit,
+        args.token_ttl, load_recorded(args.recorded) if args.recorded else None, args.seed
+    )
+
+    server = MockServer((args.host, args.port), mock)
+    print(f"Mock amadeus api listening on http://{args.host}:{server.server_address[1]}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+#---Main---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ApiCalls import API_CALLER
+from RateLimiter import PREFETCH
+from ResponseCache import canonical_key
+
+#makes the flight-offers searches a user is likely to make next in the background, while they are still
+#deciding, so that the one they pick is answered from the flight-offers cache right away.
+#   - the prefetches are sent at PREFETCH priority, so the rate limiter lets anything a user is waiting on go first
+#   - at most quota prefetches are made over the life of the prefetcher (cancelled ones don't count)
+#   - once the user picks a search, the prefetches that haven't started are cancelled, and the ones already
+#     running finish at their low priority
+class Prefetcher:
+    def __init__(self, quota, max_in_flight):
+        self.quota = quota
+        self.executor = ThreadPoolExecutor(max_workers = max_in_flight)
+
+        self.lock = threading.Lock()
+        #key of the search -> Future of its prefetch
+        self.prefetches = dict()
+
+        self.used = 0
+        self.cancelled = 0
+        #searches the user picked that had already been prefetched
+        self.hits = 0
+
+    #starts prefetching the searches, in the order given, for as long as the quota allows.
+    #Returns how many were started
+    def prefetch(self, input_dicts):
+        started = 0
+
+        with self.lock:
+            for input_dict in input_dicts:
+                key = canonical_key(input_dict)
+                if key in self.prefetches:
+                    continue
+
+                if self.used >= self.quota:
+                    break
+
+                self.prefetches[key] = self.executor.submit(API_CALLER.get_flight_offers, input_dict, PREFETCH)
+                self.used += 1
+                started += 1
+
+        return started
+
+    #must be called with self.lock held. Returns True if the prefetch hadn't started and is now cancelled
+    def __cancel(self, future):
+        if not future.cancel():
+            return False
+
+        #it never used the api, so it doesn't count against the quota
+        self.used -= 1
+        self.cancelled += 1
+        return True
+
+    #the user picked the search input_dict, so the other prefetches are no longer needed. If input_dict is
+    #being prefetched, waits for it rather than making the same search twice. Returns True if the search
+    #was prefetched (and is now cached)
+    def choose(self, input_dict):
+        key = canonical_key(input_dict)
+
+        with self.lock:
+            chosen = self.prefetches.pop(key, None)
+
+            for future in self.prefetches.values():
+                self.__cancel(future)
+            self.prefetches.clear()
+
+            #it hadn't started yet, the user's own search is made at its usual priority instead
+            if chosen is not None and self.__cancel(chosen):
+                chosen = None
+
+        if chosen is None:
+            return False
+
+        #a failed prefetch is simply made again by the user's own search
+        try:
+            if chosen.result() is None:
+                return False
+        except Exception:
+            return False
+
+        self.hits += 1
+        return True
+
+    #cancels the prefetches that haven't started, without waiting for the running ones
+    def close(self):
+        with self.lock:
+            for future in self.prefetches.values():
+                self.__cancel(future)
+            self.prefetches.clear()
+
+        self.executor.shutdown(wait = False)
+
+    def stats(self):
+        with self.lock:
+            return {"used": self.used, "quota": self.quota, "cancelled": self.cancelled, "hits": self.hits}
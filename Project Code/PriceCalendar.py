@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from ApiCalls import API_CALLER
+
+#max number of flight-offers searches (one per cell of the calendar) that can run at the same time.
+#They are still paced by the api's rate limits, see ENDPOINT_RATES in ApiCalls.py
+CALENDAR_MAX_IN_FLIGHT = 8
+
+#what a cell of the calendar holds when its search failed, as opposed to None when it found no flights
+FAILED = "failed"
+
+#the dates from days before to days after the given date (a YYYY-MM-DD string) that are later than today
+def get_calendar_dates(date, days):
+    center = datetime.strptime(date, "%Y-%m-%d")
+    todays_date = datetime.today()
+
+    dates = []
+    for offset in range(-days, days + 1):
+        date_object = center + timedelta(days = offset)
+
+        if date_object > todays_date:
+            dates.append(date_object.strftime("%Y-%m-%d"))
+
+    return dates
+
+#a copy of the search details, with the dates of a single cell
+def get_cell_details(details, departure_date, return_date):
+    cell_details = dict(details)
+    cell_details["departure_date"] = departure_date
+    cell_details["return_date"] = return_date
+
+    return cell_details
+
+#the price & currency of the cheapest offer of a flight-offers response, or None if there are no offers
+def get_cheapest_price(response_dict):
+    cheapest = None
+
+    for offer in response_dict.get("data") or []:
+        price = offer.get("price")
+        grand_total = float(price.get("grandTotal"))
+
+        if cheapest is None or grand_total < cheapest[0]:
+            cheapest = (grand_total, price.get("currency"))
+
+    return cheapest
+
+#searches every combination of departure date (within days of details["departure_date"]) and return date
+#(within days of details["return_date"], for round-trips) and returns the cheapest price of each one.
+#The searches run concurrently, at most max_in_flight at a time, and each one is cached like any other
+#flight-offers search, so showing the flights of a cell afterwards doesn't call the api again.
+#Returns a dict with:
+#   "departure_dates" & "return_dates": the rows & columns of the calendar ([None] for one-way flights)
+#   "cells": (departure_date, return_date) -> (price, currency), None if no flights, or FAILED
+def get_price_calendar(details, days, max_in_flight = CALENDAR_MAX_IN_FLIGHT):
+    departure_dates = get_calendar_dates(details.get("departure_date"), days)
+
+    if details.get("trip") == "rt":
+        return_dates = get_calendar_dates(details.get("return_date"), days)
+    else:
+        return_dates = [None]
+
+    #a return date before the departure date is not a trip
+    cell_dates = [(departure_date, return_date) for departure_date in departure_dates for return_date in return_dates
+                  if return_date is None or return_date >= departure_date]
+
+    def search(dates):
+        response_dict = API_CALLER.get_flight_offers(get_cell_details(details, *dates))
+        if response_dict is None:
+            return FAILED
+
+        return get_cheapest_price(response_dict)
+
+    cells = dict()
+    if cell_dates:
+        num_workers = min(max_in_flight, len(cell_dates))
+        with ThreadPoolExecutor(max_workers = num_workers) as executor:
+            for dates, cell in zip(cell_dates, executor.map(search, cell_dates)):
+                cells[dates] = cell
+
+    return {
+        "departure_dates": departure_dates,
+        "return_dates": return_dates,
+        "cells": cells
+    }
+
+#the dates of the cell with the lowest price, or None if no cell has any flights
+def get_cheapest_cell(calendar):
+    priced = [(cell[0], dates) for dates, cell in calendar.get("cells").items() if cell not in (None, FAILED)]
+
+    if not priced:
+        return None
+
+    return min(priced)[1]
@@ -0,0 +1,216 @@
+import heapq
+import itertools
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+#request priorities, lower goes first. Interactive requests are the ones a user is waiting on
+INTERACTIVE = 0
+BACKGROUND = 1
+PREFETCH = 2
+
+#the concurrency limit is cut in half on a 429, and by this much when responses get slower
+THROTTLED_DECREASE = 0.5
+LATENCY_DECREASE = 0.8
+#the limit is cut at most once per this many seconds, so one burst of 429s only counts once
+DECREASE_COOLDOWN = 1
+#responses count as slower once the recent latency of an endpoint is this many times its usual latency
+LATENCY_TOLERANCE = 2
+
+#how many seconds the api wants the client to wait before trying again, from the Retry-After header
+#of a 429 response. The header is either a number of seconds or a date
+def get_retry_after(headers, default):
+    retry_after = headers.get("Retry-After")
+    if retry_after is None:
+        return default
+
+    try:
+        return max(float(retry_after), 0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return default
+
+#allows rate requests per second on average, and bursts of up to burst requests at once
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        #no requests until then, i.e. because of a Retry-After
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+        #(priority, arrival number) of the requests waiting in take()
+        self.waiting = []
+        self.arrivals = itertools.count()
+        self.condition = threading.Condition(self.lock)
+
+    #must be called with self.lock held
+    def __refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    #takes a token and returns how many seconds the caller must wait before sending its request.
+    #The token is taken even if the caller has to wait, so callers are served in the order they came in
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            self.__refill(now)
+
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+            return max(wait, self.paused_until - now)
+
+    #waits until a token is available and takes it. Unlike reserve, the token is only taken once the
+    #caller can go, so while requests wait the lowest priority number gets the next token, and a request
+    #that comes in later can still go ahead of the ones with a higher number
+    def take(self, priority):
+        with self.condition:
+            ticket = (priority, next(self.arrivals))
+            heapq.heappush(self.waiting, ticket)
+
+            while True:
+                if self.waiting[0] != ticket:
+                    self.condition.wait()
+                    continue
+
+                now = time.monotonic()
+                self.__refill(now)
+                wait = max((1 - self.tokens) / self.rate if self.tokens < 1 else 0, self.paused_until - now)
+                if wait <= 0:
+                    break
+
+                #woken early if a request with a lower number comes in, which then waits in its place
+                self.condition.wait(wait)
+
+            heapq.heappop(self.waiting)
+            self.tokens -= 1
+
+            #the next request in line waits for the token after this one
+            self.condition.notify_all()
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+#decides when each request to the api can be sent. Three things are enforced:
+#   - each endpoint has its own token bucket, so requests stay within the api's per second quotas,
+#     and after a 429 the endpoint is paused for as long as its Retry-After asks
+#   - the number of requests in flight is limited, and that limit adapts (AIMD): it grows by about 1
+#     every time a full limit's worth of requests succeed, and is cut down on a 429 or when the
+#     responses of an endpoint get much slower than usual
+#   - when requests wait for their endpoint's bucket or for a free slot, the ones with the lowest
+#     priority number go first
+#Usage:
+#   rate_limiter.acquire(endpoint, INTERACTIVE)
+#   ...send the request...
+#   rate_limiter.done(endpoint, latency)   (or throttled(endpoint, retry_after), or failed(endpoint))
+class RateLimiter:
+    def __init__(self, default_rate, endpoint_rates, initial_concurrency, min_concurrency, max_concurrency):
+        #(requests per second, burst) of the endpoints that are not in endpoint_rates
+        self.default_rate = default_rate
+        self.endpoint_rates = dict(endpoint_rates)
+        self.buckets = dict()
+        self.buckets_lock = threading.Lock()
+
+        self.limit = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.last_decrease = 0
+        #endpoint -> (recent latency, usual latency), both moving averages
+        self.latencies = dict()
+
+        self.in_flight = 0
+        #(priority, arrival number) of the requests waiting for a slot
+        self.waiting = []
+        self.arrivals = itertools.count()
+        self.condition = threading.Condition()
+
+        self.throttled_count = 0
+
+    def get_bucket(self, endpoint):
+        with self.buckets_lock:
+            bucket = self.buckets.get(endpoint)
+
+            if bucket is None:
+                rate, burst = self.endpoint_rates.get(endpoint, self.default_rate)
+                bucket = TokenBucket(rate, burst)
+                self.buckets[endpoint] = bucket
+
+            return bucket
+
+    #waits until the request is allowed by its endpoint's bucket, then for a free slot, by priority both times
+    def acquire(self, endpoint, priority):
+        self.get_bucket(endpoint).take(priority)
+
+        with self.condition:
+            ticket = (priority, next(self.arrivals))
+            heapq.heappush(self.waiting, ticket)
+
+            while self.waiting[0] != ticket or self.in_flight >= int(self.limit):
+                self.condition.wait()
+
+            heapq.heappop(self.waiting)
+            self.in_flight += 1
+
+            #the next request in line may be able to go as well
+            self.condition.notify_all()
+
+    def __release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    #the request got a response (other than a 429) after latency seconds
+    def done(self, endpoint, latency):
+        with self.condition:
+            recent, usual = self.latencies.get(endpoint, (latency, latency))
+            recent += 0.3 * (latency - recent)
+            usual += 0.02 * (latency - usual)
+            self.latencies[endpoint] = (recent, usual)
+
+            if recent > LATENCY_TOLERANCE * usual:
+                self.__decrease(LATENCY_DECREASE)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+        self.__release()
+
+    #the api answered 429 (too many requests)
+    def throttled(self, endpoint, retry_after):
+        self.get_bucket(endpoint).pause(retry_after)
+
+        with self.condition:
+            self.throttled_count += 1
+            self.__decrease(THROTTLED_DECREASE)
+
+        self.__release()
+
+    #the request could not be completed at all, which says nothing about the api's limits
+    def failed(self, endpoint):
+        self.__release()
+
+    #must be called with self.condition held
+    def __decrease(self, factor):
+        now = time.monotonic()
+        if now - self.last_decrease < DECREASE_COOLDOWN:
+            return
+
+        self.last_decrease = now
+        self.limit = max(self.min_concurrency, self.limit * factor)
+
+    def stats(self):
+        with self.condition:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "waiting": len(self.waiting),
+                "throttled": self.throttled_count
+            }
@@ -0,0 +1,393 @@
+import atexit
+import json
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+#how many seconds a connection waits for another one to finish writing before giving up
+BUSY_TIMEOUT = 10
+#how many times a write is attempted when the database stays locked for longer than that
+WRITE_ATTEMPTS = 3
+
+#a single sqlite database holding all the reference data that used to live in the three json files:
+#airport code -> city & country, city name -> city code and carrier code -> airline name. Every lookup
+#is a point lookup on an indexed column, so neither opening the store nor looking something up gets
+#slower as the data grows, and new entries are inserted without rewriting the rest of the data.
+#The database uses write-ahead logging (WAL) so that readers never wait on a writer.
+#
+#Several processes can use the same database at once. Every write is a single transaction that takes
+#the write lock up front (BEGIN IMMEDIATE), so writers from different processes take turns instead of
+#overwriting each other's changes, and a reader only ever sees whole transactions. Writes are upserts
+#of the new rows only, so a process never writes back (and undoes) rows another process added
+class ReferenceStore:
+    def __init__(self, db_path, airports_file = None, cities_file = None, airlines_file = None):
+        self.db_path = db_path
+        #json files to import the first time the database is created
+        self.import_files = (airports_file, cities_file, airlines_file)
+
+        #sqlite connections can't be shared between threads, so each thread opens its own
+        self.local = threading.local()
+        self.create_lock = threading.Lock()
+        self.created = False
+
+    #returns this thread's connection to the database, opening it (and creating the tables) if needed
+    def connect(self):
+        connection = getattr(self.local, "connection", None)
+
+        if connection is None:
+            #isolation_level = None: transactions are started explicitly, see transaction()
+            connection = sqlite3.connect(self.db_path, timeout = BUSY_TIMEOUT, isolation_level = None)
+            connection.execute("PRAGMA journal_mode = WAL")
+            #with WAL, NORMAL is still safe against corruption and avoids a disk sync on every commit
+            connection.execute("PRAGMA synchronous = NORMAL")
+
+            #the connection is only kept once the tables exist, so that if creating them (or importing
+            #the json files) fails, the next call tries again instead of using a database with no tables
+            try:
+                with self.create_lock:
+                    if not self.created:
+                        self.__create(connection)
+                        self.created = True
+            except BaseException:
+                connection.close()
+                raise
+
+            self.local.connection = connection
+
+        return connection
+
+    #runs the writes made in the with block as one transaction, i.e.
+    #   with store.transaction() as connection:
+    #       connection.execute(...)
+    #The transaction is rolled back if the block raises
+    @contextmanager
+    def transaction(self, connection = None):
+        connection = connection or self.connect()
+        self.__begin(connection)
+
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        connection.execute("COMMIT")
+
+    #takes the write lock, waiting BUSY_TIMEOUT seconds at a time for other processes to finish writing
+    def __begin(self, connection):
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as error:
+                if "locked" not in str(error) or attempt == WRITE_ATTEMPTS:
+                    raise
+
+    def __create(self, connection):
+        #checked inside the transaction, so that if several processes create the database at
+        #the same time, only the first one imports the json files
+        with self.transaction(connection):
+            is_new = connection.execute("SELECT name FROM sqlite_master WHERE name = 'airports'").fetchone() is None
+
+            connection.execute("""CREATE TABLE IF NOT EXISTS airports (
+                code TEXT PRIMARY KEY,
+                city_name TEXT NOT NULL,
+                country_name TEXT NOT NULL
+            ) WITHOUT ROWID""")
+            #the id keeps the cities in the order they were added in, which is the order did_you_mean suggests them in
+            connection.execute("""CREATE TABLE IF NOT EXISTS cities (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE,
+                code TEXT NOT NULL
+            )""")
+            connection.execute("""CREATE TABLE IF NOT EXISTS airlines (
+                code TEXT PRIMARY KEY,
+                name TEXT
+            ) WITHOUT ROWID""")
+
+            if is_new:
+                self.__import_json(connection, *self.import_files)
+
+    #---Airports---
+
+    def get_location(self, airport_code):
+        row = self.connect().execute("SELECT city_name, country_name FROM airports WHERE code = ?", (airport_code,)).fetchone()
+
+        if row is None:
+            return None
+
+        return {"city_name": row[0], "country_name": row[1]}
+
+    #locations maps airport codes to {"city_name", "country_name"} dictionaries
+    def add_locations(self, locations):
+        rows = [(code, location.get("city_name"), location.get("country_name")) for code, location in locations.items()]
+
+        with self.transaction() as connection:
+            connection.executemany("""INSERT INTO airports (code, city_name, country_name) VALUES (?, ?, ?)
+                ON CONFLICT (code) DO UPDATE SET city_name = excluded.city_name, country_name = excluded.country_name""", rows)
+
+    #---Cities---
+
+    def get_city_code(self, city_name):
+        row = self.connect().execute("SELECT code FROM cities WHERE name = ?", (city_name,)).fetchone()
+
+        return row[0] if row else None
+
+    #all the city names, in the order they were added
+    def get_city_names(self):
+        return [row[0] for row in self.connect().execute("SELECT name FROM cities ORDER BY id")]
+
+    def count_cities(self):
+        return self.connect().execute("SELECT COUNT(*) FROM cities").fetchone()[0]
+
+    #city_codes maps city names to city codes
+    def add_city_codes(self, city_codes):
+        with self.transaction() as connection:
+            #an existing city keeps its place in the order, only its code is updated
+            connection.executemany("""INSERT INTO cities (name, code) VALUES (?, ?)
+                ON CONFLICT (name) DO UPDATE SET code = excluded.code""", list(city_codes.items()))
+
+    #---Airlines---
+
+    def get_airline(self, carrier_code):
+        row = self.connect().execute("SELECT name FROM airlines WHERE code = ?", (carrier_code,)).fetchone()
+
+        return row[0] if row else None
+
+    #the carrier codes, among the ones given, that are in the store
+    def get_known_airlines(self, carrier_codes):
+        carrier_codes = list(carrier_codes)
+        if not carrier_codes:
+            return set()
+
+        placeholders = ", ".join("?" * len(carrier_codes))
+        rows = self.connect().execute(f"SELECT code FROM airlines WHERE code IN ({placeholders})", carrier_codes)
+
+        return {row[0] for row in rows}
+
+    #airlines maps carrier codes to airline names
+    def add_airlines(self, airlines):
+        with self.transaction() as connection:
+            connection.executemany("""INSERT INTO airlines (code, name) VALUES (?, ?)
+                ON CONFLICT (code) DO UPDATE SET name = excluded.name""", list(airlines.items()))
+
+    #---Importing---
+
+    #copies the contents of the old json files into the store. Entries already in the store are kept
+    def import_json(self, airports_file = None, cities_file = None, airlines_file = None):
+        with self.transaction() as connection:
+            self.__import_json(connection, airports_file, cities_file, airlines_file)
+
+    def __import_json(self, connection, airports_file, cities_file, airlines_file):
+        if airports_file:
+            with open(airports_file, "r") as file:
+                airport_locations_dict = json.load(file)
+
+            connection.executemany(
+                "INSERT OR IGNORE INTO airports (code, city_name, country_name) VALUES (?, ?, ?)",
+                [(code, location.get("city_name"), location.get("country_name")) for code, location in airport_locations_dict.items()]
+            )
+
+        if cities_file:
+            with open(cities_file, "r") as file:
+                city_code_dict = json.load(file)
+
+            connection.executemany("INSERT OR IGNORE INTO cities (name, code) VALUES (?, ?)", list(city_code_dict.items()))
+
+        if airlines_file:
+            with open(airlines_file, "r") as file:
+                airlines_dict = json.load(file)
+
+            connection.executemany("INSERT OR IGNORE INTO airlines (code, name) VALUES (?, ?)", list(airlines_dict.items()))
+
+#an in-memory index of airport code -> {"city_name", "country_name"} in front of the reference store,
+#shared by the whole process. Each airport is only read from the store once. Newly learned locations
+#are written to the store in batches (write-behind) instead of on every lookup, and airport codes the
+#api could not resolve are remembered for a while so they aren't looked up over and over
+class LocationIndex:
+    def __init__(self, store, flush_every, flush_interval, unknown_ttl):
+        self.store = store
+        #write to the store once this many new locations are waiting, or once the oldest has waited flush_interval seconds
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        #how many seconds an unresolvable airport code is remembered as unknown
+        self.unknown_ttl = unknown_ttl
+
+        self.locations = dict()
+        #airport code -> time at which it should be looked up again
+        self.unknown = dict()
+        #new locations that haven't been written to the store yet
+        self.pending = dict()
+        self.pending_since = 0
+
+        self.lock = threading.Lock()
+        #only one thread writes to the store at a time
+        self.flush_lock = threading.Lock()
+
+        #writing whatever is still waiting when the program exits
+        atexit.register(self.flush)
+
+    #returns the city & country of the airport, or None if it is not known
+    def get(self, airport_code):
+        with self.lock:
+            city_country_dict = self.locations.get(airport_code)
+
+        if city_country_dict is None:
+            city_country_dict = self.store.get_location(airport_code)
+
+            if city_country_dict is not None:
+                with self.lock:
+                    self.locations[airport_code] = city_country_dict
+
+        return city_country_dict
+
+    #True if the api recently could not resolve this airport code
+    def is_unknown(self, airport_code):
+        with self.lock:
+            expires_at = self.unknown.get(airport_code)
+            if expires_at is None:
+                return False
+
+            if time.monotonic() >= expires_at:
+                del self.unknown[airport_code]
+                return False
+
+            return True
+
+    def add(self, airport_code, city_country_dict):
+        with self.lock:
+            self.locations[airport_code] = city_country_dict
+            self.unknown.pop(airport_code, None)
+
+            if not self.pending:
+                self.pending_since = time.monotonic()
+            self.pending[airport_code] = city_country_dict
+
+            should_flush = len(self.pending) >= self.flush_every or time.monotonic() - self.pending_since >= self.flush_interval
+
+        if should_flush:
+            self.flush()
+
+    def add_unknown(self, airport_code):
+        with self.lock:
+            self.unknown[airport_code] = time.monotonic() + self.unknown_ttl
+
+    #writes the locations learned since the last write to the store, all in one transaction
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                if not self.pending:
+                    return
+
+                pending = self.pending
+                self.pending = dict()
+
+            try:
+                self.store.add_locations(pending)
+            except sqlite3.Error as error:
+                #keeping the locations so the next flush tries again
+                print("Could not save the airport locations: ", error)
+                with self.lock:
+                    for airport_code, city_country_dict in pending.items():
+                        self.pending.setdefault(airport_code, city_country_dict)
+                    self.pending_since = time.monotonic()
+
+#the city names & codes of the reference store. Looks up a single city name like a dictionary would,
+#i.e. city_index.get("london"), and only reads all the names when they are iterated over
+class CityIndex:
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, city_name):
+        return self.store.get_city_code(city_name)
+
+    def add(self, city_name, city_code):
+        self.store.add_city_codes({city_name: city_code})
+
+    def __iter__(self):
+        return iter(self.store.get_city_names())
+
+    def __len__(self):
+        return self.store.count_cities()
+
+#an in-memory index of carrier code -> airline name in front of the reference store, shared by the
+#whole process. Newly learned airlines are only written to the store when flush() is called, so a
+#whole search can be written in a single transaction
+class AirlineIndex:
+    def __init__(self, store):
+        self.store = store
+
+        self.airlines = dict()
+        self.pending = dict()
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+
+        atexit.register(self.flush)
+
+    def get(self, carrier_code):
+        with self.lock:
+            airline = self.airlines.get(carrier_code)
+            if airline is not None:
+                return airline
+
+        airline = self.store.get_airline(carrier_code)
+
+        #unknown airlines aren't remembered, since another process may add them to the store later
+        if airline is not None:
+            with self.lock:
+                self.airlines[carrier_code] = airline
+
+        return airline
+
+    #the distinct carrier codes, in the order given, that are not known yet
+    def missing(self, carrier_codes):
+        with self.lock:
+            not_in_memory = [carrier_code for carrier_code in dict.fromkeys(carrier_codes) if self.airlines.get(carrier_code) is None]
+
+        in_store = self.store.get_known_airlines(not_in_memory)
+
+        return [carrier_code for carrier_code in not_in_memory if carrier_code not in in_store]
+
+    #airlines_dict maps carrier codes to airline names
+    def add_many(self, airlines_dict):
+        with self.lock:
+            for carrier_code, airline in airlines_dict.items():
+                if self.airlines.get(carrier_code) != airline:
+                    self.airlines[carrier_code] = airline
+                    self.pending[carrier_code] = airline
+
+    #writes the airlines learned since the last write to the store, all in one transaction
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                if not self.pending:
+                    return
+
+                pending = self.pending
+                self.pending = dict()
+
+            try:
+                self.store.add_airlines(pending)
+            except sqlite3.Error as error:
+                #keeping the airlines so the next flush tries again
+                print("Could not save the airlines: ", error)
+                with self.lock:
+                    for carrier_code, airline in pending.items():
+                        self.pending.setdefault(carrier_code, airline)
+
+#---Main---
+#One-shot import of the old json files into a reference store:
+#python ReferenceData.py <database file> <airport_locations file> <city_codes file> <airlines_dict file>
+if __name__ == "__main__":
+    if len(sys.argv) != 5:
+        print("Usage: python ReferenceData.py <database file> <airport_locations file> <city_codes file> <airlines_dict file>")
+        sys.exit(1)
+
+    db_path, airports_file, cities_file, airlines_file = sys.argv[1:]
+
+    store = ReferenceStore(db_path)
+    store.import_json(airports_file, cities_file, airlines_file)
+
+    print(f"Imported into {db_path}: {store.count_cities()} cities")
@@ -0,0 +1,204 @@
+import json
+import threading
+import time
+from collections import OrderedDict, Counter
+
+#turns a request body into a string that is identical for any two equal bodies, no matter
+#the order their keys were added in, so it can be used as a cache key
+def canonical_key(body):
+    return json.dumps(body, sort_keys = True, separators = (",", ":"))
+
+#an in-memory cache of api responses. Entries expire ttl seconds after being stored, and once
+#the cache holds more than max_entries entries or max_bytes bytes, the least recently used
+#entries are evicted. Cached responses are shared, so callers must not modify them
+class ResponseCache:
+    def __init__(self, ttl, max_entries, max_bytes):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        #key -> (expires_at, size in bytes, response). Ordered from least to most recently used
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __remove(self, key):
+        expires_at, size, value = self.entries.pop(key)
+        self.total_bytes -= size
+
+    #returns the cached response, or None if there is no fresh entry for key
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, size, value = entry
+            if time.monotonic() >= expires_at:
+                self.__remove(key)
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, size):
+        #a response bigger than the whole cache would only push everything else out
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                self.__remove(key)
+
+            self.entries[key] = (time.monotonic() + self.ttl, size, value)
+            self.total_bytes += size
+
+            #evicting the least recently used entries until the cache is within its limits again
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                oldest_key = next(iter(self.entries))
+                self.__remove(oldest_key)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+#the states an entry of a StaleWhileRevalidateCache can be in
+FRESH = "fresh"
+STALE = "stale"
+MISSING = "missing"
+
+#a cache for responses that change slowly. An entry younger than fresh_for seconds is fresh and served
+#as is. An entry younger than max_age seconds is stale: it is still served right away, but the caller
+#should refresh it in the background. Older entries are treated as missing and must be fetched again.
+#Both thresholds can be overridden per origin through origin_ages, i.e. {"LON": (3600, 43200)}.
+#Entries stored ahead of time by a cache warmer are marked as warmed, and the times each of them is
+#served are counted, so the warmer can tell which of its entries were worth it
+class StaleWhileRevalidateCache:
+    def __init__(self, fresh_for, max_age, max_entries, origin_ages = None):
+        self.fresh_for = fresh_for
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.origin_ages = dict(origin_ages or {})
+
+        #key -> (stored_at, response, warmed). Ordered from least to most recently used
+        self.entries = OrderedDict()
+        #keys that are currently being refreshed, so that each one is only refreshed once at a time
+        self.refreshing = set()
+        self.lock = threading.Lock()
+
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        #key -> number of times it was served while it held a warmed entry, until taken by take_warmed_served
+        self.warmed_served = Counter()
+        self.warmed_hits = 0
+
+    def get_ages(self, origin):
+        return self.origin_ages.get(origin, (self.fresh_for, self.max_age))
+
+    #returns (state, response), where response is None if state is MISSING
+    def lookup(self, key, origin):
+        fresh_for, max_age = self.get_ages(origin)
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return MISSING, None
+
+            stored_at, value, warmed = entry
+            age = time.monotonic() - stored_at
+
+            if age >= max_age:
+                del self.entries[key]
+                self.misses += 1
+                return MISSING, None
+
+            self.entries.move_to_end(key)
+
+            if warmed:
+                self.warmed_served[key] += 1
+                self.warmed_hits += 1
+
+            if age < fresh_for:
+                self.fresh_hits += 1
+                return FRESH, value
+
+            self.stale_hits += 1
+            return STALE, value
+
+    #returns True if the caller should go ahead and refresh key, or False if it is already being refreshed.
+    #A caller that gets True must call end_refresh(key) once done, whether the refresh worked or not
+    def begin_refresh(self, key):
+        with self.lock:
+            if key in self.refreshing:
+                return False
+
+            self.refreshing.add(key)
+            self.refreshes += 1
+            return True
+
+    def end_refresh(self, key):
+        with self.lock:
+            self.refreshing.discard(key)
+
+    #how many seconds ago key was stored, or None if it isn't cached. Unlike lookup, this doesn't count
+    #as a hit or a miss, nor as a use of the entry
+    def get_age(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            return time.monotonic() - entry[0]
+
+    #how many times key was served while it held a warmed entry, since the last time this was called for it
+    def take_warmed_served(self, key):
+        with self.lock:
+            return self.warmed_served.pop(key, 0)
+
+    def put(self, key, value, warmed = False):
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value, warmed)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_entries:
+                oldest_key = next(iter(self.entries))
+                del self.entries[oldest_key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "fresh_hits": self.fresh_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "warmed_hits": self.warmed_hits
+            }
@@ -0,0 +1,187 @@
+import http.client
+import json
+import threading
+from urllib.parse import urlsplit
+from JsonStream import iter_json_array
+
+#size in bytes of the pieces a streamed answer is read in
+STREAM_CHUNK_SIZE = 16 * 1024
+
+#raised when the daemon can't be reached at all
+class DaemonUnavailable(Exception):
+    pass
+
+#sends the searches of a program to a running SearchDaemon.py instead of calling the api itself, so the
+#program never has to fetch a token or open connections to the api, and gets the daemon's warm caches.
+#It has the same methods as ApiCaller that the programs use, and is used in its place when SEARCH_DAEMON_URL
+#is set (see ApiCalls.py). If the daemon can't be reached, the searches are made by an ApiCaller
+#(created by make_fallback) instead, for as long as the program runs
+class SearchClient:
+    def __init__(self, url, timeout, make_fallback):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+
+        #each thread keeps one connection to the daemon open
+        self.local = threading.local()
+
+        self.make_fallback = make_fallback
+        self.fallback = None
+        self.fallback_lock = threading.Lock()
+
+    def __get_fallback(self):
+        with self.fallback_lock:
+            if self.fallback is None:
+                print(f"The search daemon at {self.host}:{self.port} can't be reached, searching directly instead.")
+                self.fallback = self.make_fallback()
+
+            return self.fallback
+
+    def __close_connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+
+    #sends the request and returns the (unread) response. A kept-alive connection the daemon has since
+    #closed fails right away, so the request is sent once more over a new connection in that case
+    def __post(self, path, body):
+        data = json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+
+        for attempt in range(2):
+            connection = getattr(self.local, "connection", None)
+            is_new = connection is None
+
+            if is_new:
+                connection = http.client.HTTPConnection(self.host, self.port, timeout = self.timeout)
+                self.local.connection = connection
+
+            try:
+                connection.request("POST", path, body = data, headers = headers)
+                return connection.getresponse()
+
+            except (OSError, http.client.HTTPException) as error:
+                self.__close_connection()
+
+                if is_new:
+                    raise DaemonUnavailable(error)
+
+        raise DaemonUnavailable(f"No answer from {self.host}:{self.port}")
+
+    #returns the decoded answer of the daemon, or None if the api call failed on its side
+    def __call(self, path, body):
+        response = self.__post(path, body)
+
+        try:
+            answer = json.loads(response.read())
+        except (OSError, http.client.HTTPException, ValueError) as error:
+            self.__close_connection()
+            raise DaemonUnavailable(error)
+
+        if response.status != 200:
+            print("API call failed: ", answer.get("error"))
+            return None
+
+        return answer
+
+    #---The ApiCaller methods---
+
+    def get_flight_offers(self, input_dict, priority = None):
+        if self.fallback is None:
+            try:
+                return self.__call("/flight-offers", {"input_dict": input_dict, "priority": priority})
+            except DaemonUnavailable:
+                pass
+
+        return self.__get_fallback().get_flight_offers(input_dict, priority)
+
+    #the offers are decoded as the daemon's answer comes in, like ApiCaller.stream_flight_offers does
+    def stream_flight_offers(self, input_dict):
+        if self.fallback is None:
+            try:
+                response = self.__post("/flight-offers", {"input_dict": input_dict})
+
+                if response.status == 200:
+                    return self.__iter_flight_offers(response)
+
+                print("API call failed: ", json.loads(response.read()).get("error"))
+                return None
+
+            except (DaemonUnavailable, OSError, http.client.HTTPException, ValueError):
+                self.__close_connection()
+
+        return self.__get_fallback().stream_flight_offers(input_dict)
+
+    def __iter_flight_offers(self, response):
+        def chunks():
+            while True:
+                chunk = response.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+        try:
+            yield from iter_json_array(chunks(), "data")
+
+        except (ValueError, OSError, http.client.HTTPException) as error:
+            print("Could not read the flight offers: ", error)
+
+        finally:
+            #the connection can only be reused once the whole answer has been read
+            if not response.isclosed():
+                self.__close_connection()
+
+    def get_cheapest_cities(self, input_dict, origin_city_codes):
+        if self.fallback is None:
+            try:
+                response_dict_list = self.__call("/cheapest-cities", {"input_dict": input_dict, "origin_city_codes": origin_city_codes})
+                return response_dict_list or []
+            except DaemonUnavailable:
+                pass
+
+        return self.__get_fallback().get_cheapest_cities(input_dict, origin_city_codes)
+
+    def get_city_code(self, city_name):
+        if self.fallback is None:
+            try:
+                city_code = self.__call("/city-code", {"city_name": city_name})
+                if not city_code:
+                    print(f"Sorry, no matches found for {city_name}")
+
+                return city_code
+            except DaemonUnavailable:
+                pass
+
+        return self.__get_fallback().get_city_code(city_name)
+
+    def get_location(self, airport_code):
+        return self.get_locations([airport_code]).get(airport_code)
+
+    #like ApiCaller.get_locations, every airport code gets a location, which is unknown if the call failed
+    def get_locations(self, airport_codes):
+        if self.fallback is None:
+            try:
+                locations = self.__call("/locations", {"airport_codes": sorted(set(airport_codes))})
+            except DaemonUnavailable:
+                pass
+            else:
+                #imported here since ApiCalls imports this module
+                from ApiCalls import UNKNOWN_LOCATION
+
+                locations = locations or dict()
+                return {airport_code: locations.get(airport_code) or dict(UNKNOWN_LOCATION) for airport_code in airport_codes}
+
+        return self.__get_fallback().get_locations(airport_codes)
+
+    def get_airline_data(self, joined_to_lookup, airlines_dict):
+        if self.fallback is None:
+            try:
+                found = self.__call("/airlines", {"joined_to_lookup": joined_to_lookup})
+                airlines_dict.update(found or dict())
+                return airlines_dict
+            except DaemonUnavailable:
+                pass
+
+        return self.__get_fallback().get_airline_data(joined_to_lookup, airlines_dict)
@@ -0,0 +1,262 @@
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from ApiCalls import ApiCaller, REFERENCE_STORE
+from CacheWarmer import CacheWarmer, WARM_ORIGINS, WARM_DURATIONS, WARM_WINDOWS, WARM_INTERVAL, WARM_JITTER, WARM_RATE
+from Metrics import METRICS
+from ResponseCache import canonical_key
+
+#a long running process that makes the api calls for the programs. Everything that makes the first search
+#of a program slow (fetching a token, opening the connections to the api, opening the reference data) is
+#done once when the daemon starts, and the caches stay warm between searches and between programs.
+#
+#Start it with:   python SearchDaemon.py [--host 127.0.0.1] [--port 8765]
+#then set the SEARCH_DAEMON_URL environment variable (i.e. to http://127.0.0.1:8765) before starting
+#FlightSearch.py, FlightInspiration.py or BatchSearch.py, and they send their searches here (see SearchClient.py).
+#
+#Every request is a POST with a json body, answered with the json of what the matching ApiCaller method
+#returned, or a 502 if the api call failed. GET /stats returns how the daemon is doing, and GET /warmer
+#what the cache warmer (see CacheWarmer.py, only started if WARM_ORIGINS is set) has achieved. With
+#METRICS_ENABLED set, GET /metrics returns the metrics of the api calls in the prometheus text format, and
+#GET /metrics.json the same as json (see Metrics.py)
+
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+
+#the X-Search-Ms header of every answer is the time the search took inside the daemon
+SEARCH_TIME_HEADER = "X-Search-Ms"
+#the paths where a result of None is an answer (no city matched), not a failed api call
+NONE_IS_RESULT = ("/city-code",)
+
+#runs identical requests that arrive while one is already running only once: the later ones wait for
+#the first and get its result. Requests that arrive after it finished are run again (and are usually
+#answered by the ApiCaller's caches)
+class Coalescer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        #key -> Future of the request with that key that is running
+        self.running = dict()
+
+        self.calls = 0
+        self.coalesced = 0
+
+    def run(self, key, function):
+        with self.lock:
+            future = self.running.get(key)
+            is_first = future is None
+
+            if is_first:
+                future = Future()
+                self.running[key] = future
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not is_first:
+            return future.result()
+
+        try:
+            result = function()
+            future.set_result(result)
+            return result
+
+        #BaseException too (i.e. a KeyboardInterrupt), otherwise the requests waiting on this one would wait forever
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+
+        finally:
+            with self.lock:
+                del self.running[key]
+
+    def stats(self):
+        with self.lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "running": len(self.running)}
+
+class SearchDaemon:
+    def __init__(self, api_caller, cache_warmer = None):
+        self.api_caller = api_caller
+        self.cache_warmer = cache_warmer
+        self.coalescer = Coalescer()
+        self.started_at = time.time()
+
+        #path -> (number of requests, total milliseconds spent on them)
+        self.timings = dict()
+        self.timings_lock = threading.Lock()
+
+        #path -> function taking the request body and returning the result. A result of None means
+        #the api call failed, except for the paths in NONE_IS_RESULT
+        self.routes = {
+            "/flight-offers": lambda body: self.api_caller.get_flight_offers(body.get("input_dict"), body.get("priority")),
+            "/cheapest-cities": lambda body: self.api_caller.get_cheapest_cities(body.get("input_dict"), body.get("origin_city_codes")),
+            "/city-code": lambda body: self.api_caller.get_city_code(body.get("city_name")),
+            "/locations": lambda body: self.api_caller.get_locations(body.get("airport_codes")),
+            "/airlines": lambda body: self.api_caller.get_airline_data(body.get("joined_to_lookup"), dict())
+        }
+
+    #makes the slow parts of the first search happen now instead
+    def warm_up(self):
+        REFERENCE_STORE.connect()
+        self.api_caller.warm_up()
+
+    #returns (http status, answer) for a request to path with the given (decoded) body
+    def handle(self, path, body):
+        route = self.routes.get(path)
+        if route is None:
+            return 404, {"error": f"Unknown path: {path}"}
+
+        #the priority is left out of the key, so a search a user is waiting on joins the same search
+        #already running as a prefetch instead of making a second call
+        key = canonical_key([path, {name: value for name, value in body.items() if name != "priority"}])
+
+        start = time.perf_counter()
+        result = self.coalescer.run(key, lambda: route(body))
+        self.__record(path, time.perf_counter() - start)
+
+        if result is None and path not in NONE_IS_RESULT:
+            return 502, {"error": "The api call failed"}
+
+        return 200, result
+
+    def __record(self, path, seconds):
+        with self.timings_lock:
+            count, total_ms = self.timings.get(path, (0, 0))
+            self.timings[path] = (count + 1, total_ms + seconds * 1000)
+
+    def stats(self):
+        with self.timings_lock:
+            requests = {path: {"count": count, "average_ms": round(total_ms / count, 1)} for path, (count, total_ms) in self.timings.items()}
+
+        api_caller = self.api_caller
+        transport = api_caller.transport
+
+        return {
+            "uptime_s": round(time.time() - self.started_at),
+            "requests": requests,
+            "coalescing": self.coalescer.stats(),
+            "flight_offers_cache": api_caller.flight_offers_cache.stats(),
+            "flight_destinations_cache": api_caller.flight_destinations_cache.stats(),
+            "rate_limiter": api_caller.rate_limiter.stats(),
+            "token_fetches": api_caller.token_manager.fetches,
+            "connections": transport.stats.snapshot() if transport is not None else None
+        }
+
+#keep-alive, so a program sends all its searches over one connection
+class SearchRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def __send_json(self, status, answer, search_ms = None):
+        data = json.dumps(answer).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if search_ms is not None:
+            self.send_header(SEARCH_TIME_HEADER, f"{search_ms:.1f}")
+        self.end_headers()
+
+        self.wfile.write(data)
+
+    #the metrics in the prometheus text format
+    def __send_metrics(self):
+        data = METRICS.to_prometheus().encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+
+        self.wfile.write(data)
+
+    def do_GET(self):
+        search_daemon = self.server.search_daemon
+
+        if self.path == "/stats":
+            self.__send_json(200, search_daemon.stats())
+        elif self.path == "/warmer" and search_daemon.cache_warmer is not None:
+            self.__send_json(200, search_daemon.cache_warmer.report())
+        elif self.path == "/metrics" and METRICS.enabled:
+            self.__send_metrics()
+        elif self.path == "/metrics.json" and METRICS.enabled:
+            self.__send_json(200, METRICS.snapshot())
+        else:
+            self.__send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        start = time.perf_counter()
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("not an object")
+        except ValueError:
+            self.__send_json(400, {"error": "The body must be a json object"})
+            return
+
+        try:
+            status, answer = self.server.search_daemon.handle(self.path, body)
+        except Exception as error:
+            status, answer = 500, {"error": f"{type(error).__name__}: {error}"}
+
+        self.__send_json(status, answer, (time.perf_counter() - start) * 1000)
+
+    #the default prints a line for every request
+    def log_message(self, format, *args):
+        pass
+
+class SearchServer(ThreadingHTTPServer):
+    daemon_threads = True
+    #the default of 5 makes connections wait (about a second) when many programs connect at once
+    request_queue_size = 128
+
+    def __init__(self, address, search_daemon):
+        super().__init__(address, SearchRequestHandler)
+        self.search_daemon = search_daemon
+
+def serve(host, port):
+    api_caller = ApiCaller()
+
+    cache_warmer = None
+    if WARM_ORIGINS:
+        cache_warmer = CacheWarmer(api_caller, WARM_ORIGINS, WARM_DURATIONS, WARM_WINDOWS, WARM_INTERVAL, WARM_JITTER, WARM_RATE)
+
+    search_daemon = SearchDaemon(api_caller, cache_warmer)
+
+    print("Warming up...")
+    start = time.perf_counter()
+    search_daemon.warm_up()
+
+    #the first warming run starts now, in the background
+    if cache_warmer is not None:
+        cache_warmer.start()
+    print(f"Ready in {time.perf_counter() - start:.2f}s")
+
+    server = SearchServer((host, port), search_daemon)
+
+    print(f"Search daemon listening on http://{host}:{server.server_address[1]}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+        if cache_warmer is not None:
+            cache_warmer.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description = "Keeps the api client warm and runs the programs' searches.")
+    parser.add_argument("--host", default = DAEMON_HOST, help = f"address to listen on (default: {DAEMON_HOST})")
+    parser.add_argument("--port", type = int, default = DAEMON_PORT, help = f"port to listen on (default: {DAEMON_PORT})")
+    args = parser.parse_args()
+
+    serve(args.host, args.port)
+
+#---Main---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+#fcntl (file locking) only exists on unix-like systems. Without it the shared token file is still
+#written atomically, several processes may just end up fetching a token at the same time
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+#how many seconds after a failed token request no new one is made. The threads that were waiting on the
+#failed request, and the callers in the meantime, get no token instead of each making their own request
+FAILED_FETCH_BACKOFF = 5
+
+#keeps the access token of one api client. Thread safe: however many threads need a token at once,
+#only one of them fetches it (single-flight) and the others wait for it and reuse it.
+#
+#A token is treated as expired expiry_buffer seconds before it actually expires. Once it is within
+#refresh_ahead seconds of that, the next caller still gets it right away, but a new one is fetched
+#in the background, so that in normal use no caller ever has to wait on the token endpoint.
+#When a token request fails, no other one is made for failure_backoff seconds.
+#
+#If shared_file is given, the token is also saved in that file, so that all the processes on this
+#machine that use the same file share one token instead of each fetching their own. The file is
+#locked while a process fetches a new token, so the others wait for it and read it instead
+class TokenManager:
+    def __init__(self, expiry_buffer, refresh_ahead, shared_file = None, key = "", failure_backoff = FAILED_FETCH_BACKOFF):
+        self.expiry_buffer = expiry_buffer
+        self.refresh_ahead = refresh_ahead
+        self.failure_backoff = failure_backoff
+        self.shared_file = shared_file
+        #tokens saved in the shared file by a client with a different key (i.e. the test api) are ignored
+        self.key = key
+
+        self.token = ""
+        #time.time() after which the token must not be used anymore (the buffer is already taken off)
+        self.expires_at = 0
+        #time.monotonic() until which no token is fetched, after a failed fetch
+        self.failed_until = 0
+
+        #held while a token is being fetched, by whichever thread is fetching it
+        self.lock = threading.Lock()
+
+        #how many tokens this process fetched from the token endpoint
+        self.fetches = 0
+
+    def is_expired(self):
+        return time.time() > self.expires_at
+
+    #True once the token should be replaced, which is a bit before it expires
+    def is_due(self):
+        return time.time() > self.expires_at - self.refresh_ahead
+
+    #True while a token request failed less than failure_backoff seconds ago
+    def is_backing_off(self):
+        return time.monotonic() < self.failed_until
+
+    def record_failure(self):
+        self.failed_until = time.monotonic() + self.failure_backoff
+
+    #the token, or None if there is no token that can still be used
+    def get_valid_token(self):
+        if self.is_expired():
+            return None
+
+        return self.token
+
+    #returns a valid token, or None if none could be fetched. fetch_token makes the token request and
+    #returns the response (a dict with access_token & expires_in), or None if the request failed
+    def get_token(self, fetch_token):
+        if self.is_expired():
+            if self.is_backing_off():
+                return None
+
+            with self.lock:
+                #checking again, since another thread may have fetched it while this one waited. If that
+                #thread's request failed instead, its failure is shared rather than making another request
+                if self.is_expired() and not self.is_backing_off():
+                    self.__refresh(fetch_token, self.is_expired)
+
+        elif self.is_due() and not self.is_backing_off():
+            self.__refresh_in_background(fetch_token)
+
+        return self.get_valid_token()
+
+    #saving the token from the response of a token request
+    def store(self, response_dict):
+        token = response_dict.get("access_token")
+        expires_at = time.time() + response_dict.get("expires_in") - self.expiry_buffer
+
+        self.token, self.expires_at = token, expires_at
+        self.failed_until = 0
+        self.__write_shared(token, expires_at)
+
+    #fetches a new token, unless another process already saved one that makes needs_refresh() False.
+    #Must be called with self.lock held
+    def __refresh(self, fetch_token, needs_refresh):
+        with self.__shared_lock():
+            self.load_shared()
+            if not needs_refresh():
+                return
+
+            response_dict = fetch_token()
+            self.fetches += 1
+
+            if response_dict:
+                self.store(response_dict)
+            else:
+                self.record_failure()
+
+    def __refresh_in_background(self, fetch_token):
+        #a token is already being fetched, by another thread or in the background
+        if not self.lock.acquire(blocking = False):
+            return
+
+        def refresh():
+            try:
+                self.__refresh(fetch_token, self.is_due)
+            finally:
+                self.lock.release()
+
+        threading.Thread(target = refresh, daemon = True).start()
+
+    #---Shared file---
+
+    #locks the shared file's lock file for as long as the with block runs
+    @contextmanager
+    def __shared_lock(self):
+        if not self.shared_file or fcntl is None:
+            yield
+            return
+
+        with open(self.shared_file + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    #uses the token in the shared file if it is newer than this process's. Returns True if it did
+    def load_shared(self):
+        if not self.shared_file:
+            return False
+
+        try:
+            with open(self.shared_file, "r") as file:
+                saved = json.load(file)
+        except (OSError, ValueError):
+            return False
+
+        if saved.get("key") != self.key or saved.get("expires_at", 0) <= self.expires_at:
+            return False
+
+        self.token, self.expires_at = saved.get("access_token"), saved.get("expires_at")
+        return True
+
+    #the file is replaced in one step (written to a temporary file first, then renamed), so other
+    #processes never read a half written token. The temporary file is only readable by this user
+    def __write_shared(self, token, expires_at):
+        if not self.shared_file:
+            return
+
+        folder = os.path.dirname(os.path.abspath(self.shared_file))
+
+        try:
+            file_descriptor, temp_path = tempfile.mkstemp(dir = folder, suffix = ".tmp")
+            with os.fdopen(file_descriptor, "w") as file:
+                json.dump({"key": self.key, "access_token": token, "expires_at": expires_at}, file)
+
+            os.replace(temp_path, self.shared_file)
+        except OSError as error:
+            print("Could not save the token to the shared token file: ", error)
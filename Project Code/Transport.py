@@ -0,0 +1,90 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+#keeps track of how many requests were sent and how many of them had to open a brand new
+#connection (TCP + TLS handshake) instead of reusing a kept-alive one from the pool
+class ConnectionStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def record_new_connection(self):
+        with self.lock:
+            self.new_connections += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                #every request that did not need a new connection went over a pooled one
+                "reused_connections": max(self.requests - self.new_connections, 0)
+            }
+
+#builds a subclass of the given urllib3 pool class that reports every new connection it opens
+def counting_pool_class(pool_class, stats):
+    class CountingPool(pool_class):
+        def _new_conn(self):
+            stats.record_new_connection()
+            return super()._new_conn()
+
+    return CountingPool
+
+#an adapter whose connection pools report to a ConnectionStats object
+class CountingAdapter(HTTPAdapter):
+    def __init__(self, stats, **kwargs):
+        #must be set before calling the parent constructor, since it calls init_poolmanager()
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+
+        pool_classes = self.poolmanager.pool_classes_by_scheme
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: counting_pool_class(pool_class, self.stats) for scheme, pool_class in pool_classes.items()
+        }
+
+#a pooled, keep-alive http transport for a single api host. Connections are reused across
+#requests instead of doing a fresh handshake for every call, and every request gets a
+#(connect, read) timeout based on the endpoint it is sent to
+class Transport:
+    #raised by request() when a request can't be completed at all, i.e. it timed out or the connection failed
+    RequestException = requests.RequestException
+
+    def __init__(self, base_url, pool_size, default_timeout, endpoint_timeouts):
+        self.base_url = base_url
+        self.default_timeout = default_timeout
+        self.endpoint_timeouts = dict(endpoint_timeouts)
+        self.stats = ConnectionStats()
+
+        adapter = CountingAdapter(self.stats, pool_connections = 1, pool_maxsize = pool_size)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    #timeouts are looked up by endpoint path, i.e. "/v2/shopping/flight-offers"
+    def get_timeout(self, endpoint):
+        return self.endpoint_timeouts.get(endpoint, self.default_timeout)
+
+    def request(self, method, endpoint, **kwargs):
+        kwargs.setdefault("timeout", self.get_timeout(endpoint))
+
+        self.stats.record_request()
+        return self.session.request(method, self.base_url + endpoint, **kwargs)
+
+    def get(self, endpoint, **kwargs):
+        return self.request("GET", endpoint, **kwargs)
+
+    def post(self, endpoint, **kwargs):
+        return self.request("POST", endpoint, **kwargs)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+
+#the rules the search details must follow, shared by the interactive programs and the batch search.
+#Each function raises a ValueError holding the message to show the user when the value breaks a rule
+
+#the flight inspiration search api cannot accept trips longer than 15 days
+MAX_TRIP_DAYS = 15
+
+#how many days before & after the chosen dates the price calendar can search. A round-trip searches
+#(2 * days + 1)² date combinations, so this keeps it to at most 49 searches
+MAX_FLEXIBLE_DAYS = 3
+
+#the traveler types in the order the travelers go in the body of a flight offers request. Not the same
+#order as FlightModels.TRAVELER_TYPES, which is the order the travelers of an offer are displayed in
+BODY_TRAVELER_ORDER = ("ADULT", "SENIOR", "CHILD", "HELD_INFANT", "SEATED_INFANT")
+
+#"rt" for a round-trip, "ow" for a one-way flight
+def validate_trip(trip):
+    trip = str(trip).strip().lower()
+
+    if trip not in ("rt", "ow"):
+        raise ValueError("--> Must type 'rt' or 'ow' <--")
+
+    return trip
+
+#a date entered as YYYY-MM-DD, which must be later than today's date
+def parse_date(input_date):
+    try:
+        date_object = datetime.strptime(str(input_date).strip(), "%Y-%m-%d")
+    #if the date that was entered cannot be parsed into the proper format (YYYY-MM-DD)
+    except ValueError:
+        raise ValueError("Date must be entered in the following format -> YYYY-MM-DD")
+
+    if date_object <= datetime.today():
+        raise ValueError("Please enter a date later than today's date")
+
+    return date_object
+
+#the budget, rounded to a whole number of dollars
+def parse_budget(budget):
+    try:
+        #ensuring a valid float value was entered, then rounding it to an int
+        budget = round(float(budget))
+    except (TypeError, ValueError):
+        raise ValueError("Please enter a number (Ex: 1200)")
+
+    if budget <= 0:
+        raise ValueError("Please enter a number greater than 0 (Ex: 600)")
+
+    return budget
+
+#a trip duration in days (Ex: "8"), or a range of them (Ex: "8,10"). Returns (duration, min_duration, max_duration),
+#duration being the formatted string to send to the api, min_duration & max_duration the bounds of the range
+def parse_duration(duration_input):
+    try:
+        nums = [int(num) for num in str(duration_input).strip().split(",")]
+    except ValueError:
+        raise ValueError("Please enter valid number(s).")
+
+    if len(nums) not in (1, 2):
+        raise ValueError("Please enter valid number(s).")
+
+    if any(num <= 0 or num > MAX_TRIP_DAYS for num in nums):
+        raise ValueError(f"Trip must be between 1 and {MAX_TRIP_DAYS} days.")
+
+    min_duration = min(nums)
+    max_duration = max(nums)
+
+    #a single number, or a range of the same number, i.e. 8,8
+    if min_duration == max_duration:
+        duration = str(min_duration)
+    else:
+        duration = f"{min_duration},{max_duration}"
+
+    return duration, min_duration, max_duration
+
+#how many days before & after the chosen dates to search, 0 (or nothing entered) for the exact dates only
+def parse_flexible_days(days):
+    if days is None or str(days).strip() == "":
+        return 0
+
+    try:
+        days = int(str(days).strip())
+    except ValueError:
+        raise ValueError("Must enter a number (Ex: 2)")
+
+    if days < 0 or days > MAX_FLEXIBLE_DAYS:
+        raise ValueError(f"Please enter a number between 0 and {MAX_FLEXIBLE_DAYS}")
+
+    return days
+
+#the window of time off, as (earliest, latest) datetimes
+def validate_time_off(earliest, latest):
+    if earliest > latest:
+        raise ValueError("Range must be in ascending order...")
+
+    return earliest, latest
+
+#the latest departure date that still lets a trip of min_duration days end within the time off. This
+#reduces the number of results where the return dates will exceed the window of time off, but won't
+#exclude any trip possibilities
+def get_latest_departure_date(earliest, latest, min_duration):
+    #latest possible return date - minimum duration of trip + 1 because both travel days included
+    latest_departure_date = latest - timedelta(days = (min_duration - 1))
+
+    if latest_departure_date < earliest:
+        raise ValueError("The duration of your trip cannot be longer than your window of time off.")
+
+    return latest_departure_date
+
+#the number of travelers of each type, i.e. {"ADULT": 2, "CHILD": 1}. Returns all the types, in the
+#order format_flight_offers_body expects them in (held infants are matched to the adults & seniors before them)
+def validate_travelers(traveler_counts):
+    counts = dict.fromkeys(BODY_TRAVELER_ORDER, 0)
+
+    for traveler_type, count in traveler_counts.items():
+        if traveler_type not in counts:
+            raise ValueError(f"Unknown traveler type: {traveler_type}")
+
+        if not isinstance(count, int) or count < 0:
+            raise ValueError("Please enter a number >= 0")
+
+        counts[traveler_type] = count
+
+    #0 passengers
+    if sum(counts.values()) == 0:
+        raise ValueError("You cannot enter 0 for all passenger types. Please re-enter your info.")
+
+    #there are more held infants than adults
+    if counts["ADULT"] < counts["HELD_INFANT"]:
+        raise ValueError("The number of held infants must match the number of adults. Please re-enter your info.")
+
+    #there are infants, but no adults or seniors
+    if (counts["ADULT"] == 0 and counts["SENIOR"] == 0) and (counts["SEATED_INFANT"] + counts["HELD_INFANT"]) > 0:
+        raise ValueError("You must have at least one adult/senior to accompany infants. Please re-enter your info.")
+
+    return counts
+
+#a 3 letter airport code, i.e. "YUL"
+def validate_airport(airport_code):
+    airport_code = str(airport_code).strip().upper()
+
+    if len(airport_code) != 3 or not airport_code.isalpha():
+        raise ValueError(f"Not an airport code: {airport_code!r} (Ex: YUL)")
+
+    return airport_code
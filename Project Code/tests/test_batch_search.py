@@ -0,0 +1,142 @@
+import json
+import os
+import sys
+import time
+import unittest
+from io import StringIO
+from unittest import mock
+
+#the modules of the project are in the folder above this one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import BatchSearch
+import FormattingData
+
+#how long the stub takes to answer a flight offers search
+SEARCH_SECONDS = 0.05
+
+FLIGHT_SEARCH = {
+    "id": "yul-lhr", "type": "flights", "trip": "ow", "travelers": {"ADULT": 1, "SENIOR": 1, "HELD_INFANT": 1},
+    "origin_airport": "YUL", "destination_airport": "LHR", "departure_date": "2030-06-12"
+}
+INSPIRATION_SEARCH = {
+    "id": "summer", "type": "inspiration", "budget": 600, "time_off": ["2030-08-12", "2030-08-24"],
+    "duration": "8,10", "origin_cities": ["montreal"]
+}
+
+OFFER = {
+    "itineraries": [{
+        "duration": "PT7H",
+        "segments": [{
+            "departure": {"iataCode": "YUL", "at": "2030-06-12T18:00:00"},
+            "arrival": {"iataCode": "LHR", "at": "2030-06-13T06:00:00"},
+            "carrierCode": "AC"
+        }]
+    }],
+    "price": {"currency": "CAD", "grandTotal": "1500.00"},
+    "travelerPricings": [{"travelerType": "ADULT"}, {"travelerType": "SENIOR"}, {"travelerType": "HELD_INFANT"}]
+}
+
+#stands in for API_CALLER, answering from the data above without any calls
+class StubApiCaller:
+    def __init__(self):
+        self.searches = []
+
+    def get_flight_offers(self, input_dict, priority = None):
+        self.searches.append(input_dict)
+        time.sleep(SEARCH_SECONDS)
+        return {"data": [OFFER]}
+
+    def get_cheapest_cities(self, input_dict, origin_city_codes):
+        return [{"data": [
+            {"origin": "YUL", "destination": "LHR", "departureDate": "2030-08-13", "returnDate": "2030-08-21"},
+            #ends after the time off
+            {"origin": "YUL", "destination": "CDG", "departureDate": "2030-08-20", "returnDate": "2030-08-28"}
+        ]}]
+
+    def get_locations(self, airport_codes):
+        locations = {
+            "YUL": {"city_name": "montreal", "country_name": "canada"},
+            "LHR": {"city_name": "london", "country_name": "united kingdom"}
+        }
+
+        return {airport_code: locations[airport_code] for airport_code in airport_codes}
+
+class BatchSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.api_caller = StubApiCaller()
+
+        patchers = [
+            mock.patch.object(BatchSearch, "API_CALLER", self.api_caller),
+            mock.patch.object(FormattingData, "API_CALLER", self.api_caller),
+            mock.patch.object(BatchSearch, "CITY_INDEX", {"montreal": "YMQ"}),
+            mock.patch.object(BatchSearch, "get_airline", lambda carrier_codes: {"AC": "AIR CANADA"})
+        ]
+
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_two_line_file(self):
+        lines = [json.dumps(FLIGHT_SEARCH) + "\n", "\n", json.dumps(INSPIRATION_SEARCH) + "\n"]
+        output = StringIO()
+
+        #one worker, so the second search waits for the first
+        counts = BatchSearch.run_batch(lines, output, workers = 1)
+
+        self.assertEqual(counts, {"ok": 2, "invalid": 0, "failed": 0})
+
+        #the results are written as the searches finish, so they are put back in the order of the lines
+        flight_result, inspiration_result = sorted((json.loads(line) for line in output.getvalue().splitlines()), key = lambda result: result["line"])
+
+        self.assertEqual((flight_result["line"], flight_result["id"], flight_result["status"]), (1, "yul-lhr", "ok"))
+        self.assertEqual(flight_result["results"], [{
+            "price": 1500.0,
+            "currency": "CAD",
+            "round_trip": False,
+            "travelers": {"ADULT": 1, "SENIOR": 1, "HELD_INFANT": 1},
+            "legs": [{
+                "origin_airport": "YUL",
+                "destination_airport": "LHR",
+                "departure": "2030-06-12T18:00:00",
+                "arrival": "2030-06-13T06:00:00",
+                "duration_minutes": 420,
+                "airline": "AIR CANADA"
+            }]
+        }])
+
+        self.assertEqual((inspiration_result["line"], inspiration_result["id"], inspiration_result["status"]), (3, "summer", "ok"))
+        self.assertEqual(inspiration_result["results"], [{
+            "departure_date": "2030-08-13",
+            "return_date": "2030-08-21",
+            "origin_airport": "YUL",
+            "destination_airport": "LHR",
+            "destination_city_name": "london",
+            "destination_country_name": "united kingdom",
+            "origin_city_name": "montreal",
+            "origin_country_name": "canada",
+            "budget": 600
+        }])
+
+        #the search was made with the travelers in the order of a request body
+        self.assertEqual(list(self.api_caller.searches[0]["travelers"].items()), [("ADULT", 1), ("SENIOR", 1), ("CHILD", 0), ("HELD_INFANT", 1), ("SEATED_INFANT", 0)])
+
+        self.assertGreaterEqual(flight_result["run_ms"], SEARCH_SECONDS * 1000)
+        self.assertGreaterEqual(inspiration_result["queued_ms"], SEARCH_SECONDS * 1000)
+        self.assertGreaterEqual(flight_result["queued_ms"], 0)
+        self.assertGreaterEqual(inspiration_result["run_ms"], 0)
+
+    def test_invalid_lines(self):
+        lines = ["not json\n", json.dumps(dict(FLIGHT_SEARCH, trip = "both")) + "\n"]
+        output = StringIO()
+
+        counts = BatchSearch.run_batch(lines, output, workers = 2)
+
+        self.assertEqual(counts, {"ok": 0, "invalid": 2, "failed": 0})
+
+        results = sorted((json.loads(line) for line in output.getvalue().splitlines()), key = lambda result: result["line"])
+        self.assertEqual([(result["line"], result["id"], result["status"]) for result in results], [(1, None, "invalid"), (2, "yul-lhr", "invalid")])
+        self.assertTrue(all("queued_ms" in result and "run_ms" in result for result in results))
+
+if __name__ == "__main__":
+    unittest.main()
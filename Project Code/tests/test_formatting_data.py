@@ -0,0 +1,94 @@
+import os
+import random
+import sys
+import unittest
+
+#the modules of the project are in the folder above this one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FormattingData import group_by, group_results
+
+#the recursive group_by that group_by replaced, kept here as the reference for the order of the results
+def recursive_group_by(type_name, results_list, sorted_list):
+    if not results_list:
+        return sorted_list
+
+    first_result = results_list[0]
+    group = [first_result]
+
+    if len(results_list) == 1:
+        sorted_list.extend(group)
+        return sorted_list
+
+    name = first_result.get(type_name)
+
+    for i in range(len(results_list) - 1, 0, -1):
+        if results_list[i].get(type_name) == name:
+            group.append(results_list[i])
+            del results_list[i]
+
+    del results_list[0]
+
+    if type_name == "destination_city_name":
+        unique_entries = set()
+
+        for entry in group:
+            details = (entry.get("destination_airport"), entry.get("origin_airport"), entry.get("departure_date"), entry.get("return_date"))
+
+            if details not in unique_entries:
+                unique_entries.add(details)
+                sorted_list.append(entry)
+    else:
+        sorted_list.extend(group)
+
+    return recursive_group_by(type_name, results_list, sorted_list)
+
+def make_results(rng, num_results):
+    results = []
+
+    for i in range(num_results):
+        country = rng.choice(["france", "japan", "peru", "canada"])
+        results.append({
+            "destination_country_name": country,
+            "destination_city_name": country + str(rng.randint(1, 3)),
+            "destination_airport": rng.choice(["AAA", "BBB"]),
+            "origin_airport": rng.choice(["YUL", "LHR"]),
+            "departure_date": rng.choice(["2030-01-01", "2030-01-02"]),
+            "return_date": "2030-01-09",
+            #tells apart results that are otherwise equal, so the test sees which one was kept
+            "id": i
+        })
+
+    return results
+
+class GroupByTest(unittest.TestCase):
+    def test_same_order_as_recursive_version(self):
+        rng = random.Random(0)
+
+        for num_results in list(range(6)) + [20, 100]:
+            for attempt in range(20):
+                results = make_results(rng, num_results)
+
+                for type_name in ("destination_country_name", "destination_city_name"):
+                    expected = recursive_group_by(type_name, list(results), [])
+                    self.assertEqual(group_by(type_name, results), expected)
+
+    def test_group_results(self):
+        rng = random.Random(1)
+        results = make_results(rng, 50)
+
+        by_country = recursive_group_by("destination_country_name", list(results), [])
+        expected = recursive_group_by("destination_city_name", by_country, [])
+
+        self.assertEqual(group_results(results), expected)
+
+    def test_does_not_modify_the_results(self):
+        results = make_results(random.Random(2), 30)
+        copy = list(results)
+
+        group_by("destination_city_name", results)
+
+        self.assertEqual(results, copy)
+
+if __name__ == "__main__":
+    unittest.main()
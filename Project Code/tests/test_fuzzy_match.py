@@ -0,0 +1,88 @@
+import os
+import random
+import string
+import sys
+import unittest
+
+#the modules of the project are in the folder above this one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FuzzyMatch import CityMatcher, min_distance, bounded_distance
+
+SIMILARITY_RATIO = 0.65
+
+#the did_you_mean that CityMatcher replaced, computing the distance to every name
+def brute_force_did_you_mean(input_city, names, similarity_ratio):
+    suggestions = []
+
+    for city in names:
+        longest = max(len(input_city), len(city))
+        if longest == 0:
+            suggestions.append(city)
+            continue
+
+        if 1 - (min_distance(input_city, city) / longest) >= similarity_ratio:
+            suggestions.append(city)
+
+    return suggestions
+
+#a copy of word with up to num_edits random insertions, deletions & substitutions
+def misspell(rng, word, num_edits, letters):
+    word = list(word)
+
+    for i in range(num_edits):
+        edit = rng.choice(["insert", "delete", "substitute"])
+        position = rng.randint(0, len(word))
+
+        if edit == "insert" or not word:
+            word.insert(position, rng.choice(letters))
+        elif edit == "delete":
+            del word[min(position, len(word) - 1)]
+        else:
+            word[min(position, len(word) - 1)] = rng.choice(letters)
+
+    return "".join(word)
+
+class CityMatcherTest(unittest.TestCase):
+    def test_same_suggestions_as_brute_force(self):
+        rng = random.Random(0)
+        #a small alphabet so that many names share bigrams & are close to each other
+        letters = "abcde "
+        names = list(dict.fromkeys("".join(rng.choice(letters) for x in range(rng.randint(1, 12))) for i in range(200)))
+        matcher = CityMatcher(names, SIMILARITY_RATIO)
+
+        words = [misspell(rng, rng.choice(names), rng.randint(0, 4), letters) for i in range(150)] + ["", "a", "zzzz"]
+        for word in words:
+            self.assertEqual(matcher.suggestions(word), brute_force_did_you_mean(word, names, SIMILARITY_RATIO), word)
+
+    def test_real_city_names(self):
+        names = ["london", "paris", "new york", "los angeles", "lisbon", "lyon", "londonderry", "parma", "porto", "boston"]
+        matcher = CityMatcher(names, SIMILARITY_RATIO)
+
+        for word in ["londn", "pari", "new yrok", "lisbn", "bostn", "lodnon", "x"]:
+            self.assertEqual(matcher.suggestions(word), brute_force_did_you_mean(word, names, SIMILARITY_RATIO), word)
+
+    def test_other_ratios(self):
+        rng = random.Random(1)
+        names = list(dict.fromkeys("".join(rng.choice(string.ascii_lowercase[:6]) for x in range(rng.randint(1, 9))) for i in range(200)))
+
+        for similarity_ratio in (0, 0.3, 0.5, 0.8, 1):
+            matcher = CityMatcher(names, similarity_ratio)
+
+            for word in names[:20]:
+                self.assertEqual(matcher.suggestions(word), brute_force_did_you_mean(word, names, similarity_ratio))
+
+class BoundedDistanceTest(unittest.TestCase):
+    def test_matches_min_distance(self):
+        rng = random.Random(2)
+
+        for i in range(500):
+            word1 = "".join(rng.choice("abc") for x in range(rng.randint(0, 8)))
+            word2 = "".join(rng.choice("abc") for x in range(rng.randint(0, 8)))
+            distance = min_distance(word1, word2)
+
+            for max_distance in range(0, 9):
+                self.assertEqual(bounded_distance(word1, word2, max_distance), min(distance, max_distance + 1))
+
+if __name__ == "__main__":
+    unittest.main()
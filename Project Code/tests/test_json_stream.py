@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+import unittest
+
+#the modules of the project are in the folder above this one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from JsonStream import iter_json_array
+
+#numbers, escapes & characters of several bytes, so the chunks get split inside all of them
+DOCUMENT = {
+    "meta": {"count": 4, "links": {"self": "https://example.com/?a=[1]&b={2}"}},
+    "data": [
+        {"id": "1", "price": {"total": "123.45"}, "city": "Zürich", "tags": ["a", "b"]},
+        {"id": "2", "price": {"total": 1e3}, "city": "東京", "quote": "say \"hi\"\n"},
+        12345678,
+        [[], {}, None, True, False, -0.5]
+    ],
+    "dictionaries": {"carriers": {"AC": "AIR CANADA"}}
+}
+
+def to_chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+class IterJsonArrayTest(unittest.TestCase):
+    def setUp(self):
+        self.text = json.dumps(DOCUMENT, ensure_ascii = False, indent = 1)
+        self.data = self.text.encode("utf-8")
+
+    def test_every_chunk_size(self):
+        for size in range(1, len(self.data) + 1):
+            self.assertEqual(list(iter_json_array(to_chunks(self.data, size), "data")), DOCUMENT["data"], size)
+
+    def test_every_split_point(self):
+        for i in range(len(self.data) + 1):
+            chunks = [self.data[:i], self.data[i:]]
+            self.assertEqual(list(iter_json_array(chunks, "data")), DOCUMENT["data"], i)
+
+    def test_text_chunks(self):
+        self.assertEqual(list(iter_json_array(to_chunks(self.text, 7), "data")), DOCUMENT["data"])
+
+    def test_missing_key(self):
+        self.assertEqual(list(iter_json_array([self.data], "errors")), [])
+        self.assertEqual(list(iter_json_array([b"{}"], "data")), [])
+        self.assertEqual(list(iter_json_array([b'{"data": 5}'], "data")), [])
+
+    def test_truncated(self):
+        text = json.dumps(DOCUMENT, separators = (",", ":"))
+
+        for i in range(len(text)):
+            with self.assertRaises(ValueError, msg = text[:i]):
+                list(iter_json_array([text[:i]], "data"))
+
+    def test_cut_off_mid_value(self):
+        for text in ['{"data": [1, 2', '{"data": [{"city": "Zür', '{"data": [{"price": {"total": 12', '{"data": [tr']:
+            for size in (1, 3, len(text)):
+                with self.assertRaises(json.JSONDecodeError, msg = text):
+                    list(iter_json_array(to_chunks(text, size), "data"))
+
+    def test_not_an_object(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b"[1, 2]"], "data"))
+
+if __name__ == "__main__":
+    unittest.main()
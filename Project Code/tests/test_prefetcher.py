@@ -0,0 +1,114 @@
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+#the modules of the project are in the folder above this one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Prefetcher
+from RateLimiter import PREFETCH
+from ResponseCache import canonical_key
+
+#stands in for API_CALLER. Caches its answers like ApiCaller does, and counts the searches that would have
+#reached the api. The searches only finish once release is set
+class StubApiCaller:
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.calls = []
+        self.priorities = []
+        self.cache = dict()
+
+    def get_flight_offers(self, input_dict, priority = None):
+        key = canonical_key(input_dict)
+        if key in self.cache:
+            return self.cache[key]
+
+        with self.lock:
+            self.calls.append(input_dict["destination_airport"])
+            self.priorities.append(priority)
+
+        self.release.wait(5)
+
+        response_dict = {"data": [{"destination": input_dict["destination_airport"]}]}
+        self.cache[key] = response_dict
+        return response_dict
+
+def get_search(destination_airport):
+    return {"origin_airport": "YUL", "destination_airport": destination_airport, "departure_date": "2030-01-01"}
+
+class PrefetcherTest(unittest.TestCase):
+    def setUp(self):
+        self.api_caller = StubApiCaller()
+
+        patcher = mock.patch.object(Prefetcher, "API_CALLER", self.api_caller)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_prefetcher(self, quota, max_in_flight):
+        prefetcher = Prefetcher.Prefetcher(quota, max_in_flight)
+        #the searches are let through at the end of the test, so the workers can finish
+        self.addCleanup(prefetcher.executor.shutdown)
+        self.addCleanup(self.api_caller.release.set)
+
+        return prefetcher
+
+    def test_at_most_quota_searches(self):
+        prefetcher = self.make_prefetcher(quota = 3, max_in_flight = 2)
+
+        self.assertEqual(prefetcher.prefetch([get_search(code) for code in ("LHR", "CDG", "LHR", "NRT", "FCO", "MAD")]), 3)
+        self.assertEqual(prefetcher.prefetch([get_search("BCN")]), 0)
+
+        futures = list(prefetcher.prefetches.values())
+        self.api_caller.release.set()
+        for future in futures:
+            future.result(5)
+
+        self.assertEqual(sorted(self.api_caller.calls), ["CDG", "LHR", "NRT"])
+        self.assertEqual(self.api_caller.priorities, [PREFETCH] * 3)
+        self.assertEqual(prefetcher.stats()["used"], 3)
+
+    def test_choose_uses_the_prefetched_search(self):
+        prefetcher = self.make_prefetcher(quota = 5, max_in_flight = 2)
+        prefetcher.prefetch([get_search("LHR"), get_search("CDG")])
+
+        #the user picks a search that is still running, choose waits for it
+        threading.Timer(0.05, self.api_caller.release.set).start()
+        self.assertTrue(prefetcher.choose(get_search("LHR")))
+
+        #the user's own search is then answered without another call
+        self.assertEqual(Prefetcher.API_CALLER.get_flight_offers(get_search("LHR")), {"data": [{"destination": "LHR"}]})
+        self.assertEqual(self.api_caller.calls.count("LHR"), 1)
+        self.assertEqual(prefetcher.stats()["hits"], 1)
+
+    def test_choose_cancels_the_other_searches(self):
+        prefetcher = self.make_prefetcher(quota = 5, max_in_flight = 1)
+        prefetcher.prefetch([get_search("LHR"), get_search("CDG"), get_search("NRT")])
+
+        #NRT hadn't started, so the user's own search makes it instead
+        self.assertFalse(prefetcher.choose(get_search("NRT")))
+
+        self.api_caller.release.set()
+        prefetcher.executor.shutdown(wait = True)
+
+        self.assertEqual(self.api_caller.calls, ["LHR"])
+        self.assertEqual(prefetcher.stats(), {"used": 1, "quota": 5, "cancelled": 2, "hits": 0})
+
+    def test_close_cancels_pending_searches(self):
+        prefetcher = self.make_prefetcher(quota = 5, max_in_flight = 1)
+        prefetcher.prefetch([get_search("LHR"), get_search("CDG"), get_search("NRT")])
+        futures = list(prefetcher.prefetches.values())
+
+        prefetcher.close()
+
+        self.assertEqual([future.cancelled() for future in futures], [False, True, True])
+        self.assertEqual(prefetcher.stats()["cancelled"], 2)
+
+        self.api_caller.release.set()
+        futures[0].result(5)
+        self.assertEqual(self.api_caller.calls, ["LHR"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+#the modules of the project are in the folder above this one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PriceCalendar
+from FormattingData import format_price_calendar
+from PriceCalendar import FAILED, get_cheapest_cell, get_price_calendar
+
+#stands in for API_CALLER, the search of the failing departure date fails (None), like a timed out call
+class StubApiCaller:
+    def __init__(self, prices, failing_date):
+        self.prices = prices
+        self.failing_date = failing_date
+        self.calls = []
+
+    def get_flight_offers(self, input_dict, priority = None):
+        departure_date = input_dict["departure_date"]
+        self.calls.append(departure_date)
+
+        if departure_date == self.failing_date:
+            return None
+
+        return {"data": [{"price": {"grandTotal": str(price), "currency": "CAD"}} for price in self.prices.get(departure_date, [])]}
+
+class PriceCalendarTest(unittest.TestCase):
+    def setUp(self):
+        #one day is cheap, one has no flights and one fails
+        self.api_caller = StubApiCaller({
+            "2030-01-01": [410.5, 380.25],
+            "2030-01-02": [299.99],
+            "2030-01-04": [455]
+        }, "2030-01-03")
+
+        patcher = mock.patch.object(PriceCalendar, "API_CALLER", self.api_caller)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.details = {"origin_airport": "YUL", "destination_airport": "CDG", "departure_date": "2030-01-03", "trip": "ow"}
+
+    def test_failed_day_keeps_the_other_prices(self):
+        calendar = get_price_calendar(self.details, 2)
+
+        self.assertEqual(sorted(self.api_caller.calls), ["2030-01-01", "2030-01-02", "2030-01-03", "2030-01-04", "2030-01-05"])
+        self.assertEqual(calendar["return_dates"], [None])
+        self.assertEqual(calendar["cells"], {
+            ("2030-01-01", None): (380.25, "CAD"),
+            ("2030-01-02", None): (299.99, "CAD"),
+            ("2030-01-03", None): FAILED,
+            ("2030-01-04", None): (455.0, "CAD"),
+            ("2030-01-05", None): None
+        })
+        self.assertEqual(get_cheapest_cell(calendar), ("2030-01-02", None))
+
+    def test_failed_day_renders_as_failed(self):
+        calendar = get_price_calendar(self.details, 2)
+
+        output = StringIO()
+        with redirect_stdout(output):
+            cheapest_cell = format_price_calendar(calendar)
+
+        self.assertEqual(cheapest_cell, ("2030-01-02", None))
+
+        rows = dict()
+        for line in output.getvalue().splitlines():
+            columns = [column.strip() for column in line.strip("│").split("│")]
+            if len(columns) == 2:
+                rows[columns[0]] = columns[1]
+
+        self.assertEqual(rows, {
+            "Departure": "Cheapest Price",
+            "2030-01-01": "$380.25",
+            "2030-01-02": "*$299.99*",
+            "2030-01-03": "?",
+            "2030-01-04": "$455.00",
+            "2030-01-05": "-"
+        })
+        self.assertIn("? means the search failed", output.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+#the modules of the project are in the folder above this one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from RateLimiter import RateLimiter, TokenBucket, INTERACTIVE, BACKGROUND, PREFETCH, get_retry_after
+
+#starts a thread per priority, in order, each one waiting until the previous one is queued. Returns the
+#threads & the list the priorities are added to as the requests get through
+def queue_requests(rate_limiter, priorities, queued_count, on_acquired):
+    order = []
+    threads = []
+
+    def request(priority):
+        rate_limiter.acquire("/endpoint", priority)
+        order.append(priority)
+        on_acquired()
+
+    for priority in priorities:
+        thread = threading.Thread(target = request, args = (priority,))
+        thread.start()
+        threads.append(thread)
+
+        #waiting until the request is queued, so they queue up in the given order
+        deadline = time.monotonic() + 5
+        while queued_count() < len(threads) and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    return threads, order
+
+class RateLimiterTest(unittest.TestCase):
+    def test_priority_order_for_slots(self):
+        #one request at a time, and no limit from the bucket
+        rate_limiter = RateLimiter((1000, 1000), {}, 1, 1, 1)
+        rate_limiter.acquire("/endpoint", INTERACTIVE)
+
+        threads, order = queue_requests(
+            rate_limiter,
+            [PREFETCH, BACKGROUND, PREFETCH, INTERACTIVE, BACKGROUND, INTERACTIVE],
+            lambda: len(rate_limiter.waiting),
+            lambda: rate_limiter.done("/endpoint", 0.01)
+        )
+
+        #letting the queued requests through, one at a time
+        rate_limiter.done("/endpoint", 0.01)
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(order, [INTERACTIVE, INTERACTIVE, BACKGROUND, BACKGROUND, PREFETCH, PREFETCH])
+
+    def test_priority_order_for_bucket_tokens(self):
+        #plenty of slots, but only one request every 0.1 seconds. The requests are all queued well
+        #before the first one gets its token
+        rate_limiter = RateLimiter((10, 1), {}, 50, 50, 50)
+        bucket = rate_limiter.get_bucket("/endpoint")
+        rate_limiter.acquire("/endpoint", INTERACTIVE)
+        rate_limiter.done("/endpoint", 0.01)
+
+        threads, order = queue_requests(
+            rate_limiter,
+            [PREFETCH, PREFETCH, BACKGROUND, INTERACTIVE, INTERACTIVE],
+            lambda: len(bucket.waiting),
+            lambda: rate_limiter.done("/endpoint", 0.01)
+        )
+
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(order, [INTERACTIVE, INTERACTIVE, BACKGROUND, PREFETCH, PREFETCH])
+
+    def test_limit_is_cut_on_throttling(self):
+        rate_limiter = RateLimiter((1000, 1000), {}, 10, 1, 10)
+        rate_limiter.acquire("/endpoint", INTERACTIVE)
+        rate_limiter.throttled("/endpoint", 0)
+
+        self.assertEqual(rate_limiter.stats()["limit"], 5)
+        self.assertEqual(rate_limiter.stats()["in_flight"], 0)
+
+class TokenBucketTest(unittest.TestCase):
+    def test_reserve(self):
+        bucket = TokenBucket(10, 2)
+
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1, delta = 0.01)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, delta = 0.01)
+
+    def test_take_waits_for_pause(self):
+        bucket = TokenBucket(1000, 10)
+        bucket.pause(0.1)
+
+        start = time.monotonic()
+        bucket.take(INTERACTIVE)
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+class RetryAfterTest(unittest.TestCase):
+    def test_retry_after(self):
+        self.assertEqual(get_retry_after({"Retry-After": "3"}, 1), 3)
+        self.assertEqual(get_retry_after({"Retry-After": "-3"}, 1), 0)
+        self.assertEqual(get_retry_after({}, 1), 1)
+        self.assertEqual(get_retry_after({"Retry-After": "soon"}, 1), 1)
+        self.assertEqual(get_retry_after({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}, 1), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+#the modules of the project are in the folder above this one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ReferenceData import ReferenceStore, LocationIndex
+
+class ReferenceStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def write_json(self, name, contents):
+        path = os.path.join(self.folder.name, name)
+        with open(path, "w") as file:
+            file.write(contents if isinstance(contents, str) else json.dumps(contents))
+
+        return path
+
+    def make_store(self, *import_files):
+        store = ReferenceStore(os.path.join(self.folder.name, "reference_data.db"), *import_files)
+        self.addCleanup(lambda: store.connect().close())
+
+        return store
+
+    def test_imports_the_json_files(self):
+        airports_file = self.write_json("airports.json", {"LHR": {"city_name": "london", "country_name": "united kingdom"}})
+        cities_file = self.write_json("cities.json", {"london": "LON", "paris": "PAR"})
+        airlines_file = self.write_json("airlines.json", {"AC": "AIR CANADA"})
+        store = self.make_store(airports_file, cities_file, airlines_file)
+
+        self.assertEqual(store.get_location("LHR"), {"city_name": "london", "country_name": "united kingdom"})
+        self.assertIsNone(store.get_location("CDG"))
+        self.assertEqual(store.get_city_code("paris"), "PAR")
+        self.assertEqual(store.get_city_names(), ["london", "paris"])
+        self.assertEqual(store.get_airline("AC"), "AIR CANADA")
+        self.assertEqual(store.get_known_airlines(["AC", "BA"]), {"AC"})
+
+    def test_create_is_retried_after_a_failed_import(self):
+        store = self.make_store(self.write_json("airports.json", "{not json"))
+
+        with self.assertRaises(ValueError):
+            store.get_location("LHR")
+
+        store.import_files = (self.write_json("fixed.json", {"LHR": {"city_name": "london", "country_name": "united kingdom"}}), None, None)
+        self.assertEqual(store.get_location("LHR"), {"city_name": "london", "country_name": "united kingdom"})
+
+    def test_writes_are_seen_by_other_connections(self):
+        store = self.make_store()
+        store.add_locations({"CDG": {"city_name": "paris", "country_name": "france"}})
+        store.add_city_codes({"paris": "PAR"})
+
+        #a second store on the same database, as another process would have
+        other = self.make_store()
+        self.assertEqual(other.get_location("CDG"), {"city_name": "paris", "country_name": "france"})
+        self.assertEqual(other.get_city_code("paris"), "PAR")
+
+    def test_each_thread_has_its_own_connection(self):
+        store = self.make_store()
+        store.add_airlines({"AC": "AIR CANADA"})
+        found = []
+
+        thread = threading.Thread(target = lambda: found.append(store.get_airline("AC")))
+        thread.start()
+        thread.join(5)
+
+        self.assertEqual(found, ["AIR CANADA"])
+
+class LocationIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.store = ReferenceStore(os.path.join(self.folder.name, "reference_data.db"))
+
+    def test_writes_in_batches(self):
+        index = LocationIndex(self.store, flush_every = 3, flush_interval = 60, unknown_ttl = 60)
+
+        index.add("LHR", {"city_name": "london", "country_name": "united kingdom"})
+        index.add("CDG", {"city_name": "paris", "country_name": "france"})
+        self.assertIsNone(self.store.get_location("LHR"))
+        self.assertEqual(index.get("LHR"), {"city_name": "london", "country_name": "united kingdom"})
+
+        index.add("NRT", {"city_name": "tokyo", "country_name": "japan"})
+        self.assertEqual(self.store.get_location("LHR"), {"city_name": "london", "country_name": "united kingdom"})
+        self.assertEqual(self.store.get_location("NRT"), {"city_name": "tokyo", "country_name": "japan"})
+
+    def test_unknown_airports_are_remembered_for_a_while(self):
+        index = LocationIndex(self.store, flush_every = 3, flush_interval = 60, unknown_ttl = 0.1)
+        index.add_unknown("ZZZ")
+
+        self.assertTrue(index.is_unknown("ZZZ"))
+        time.sleep(0.1)
+        self.assertFalse(index.is_unknown("ZZZ"))
+
+if __name__ == "__main__":
+    unittest.main()
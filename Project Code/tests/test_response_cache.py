@@ -0,0 +1,165 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+#the modules of the project are in the folder above this one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ResponseCache
+from ResponseCache import ResponseCache as Cache, StaleWhileRevalidateCache, canonical_key, FRESH, STALE, MISSING
+
+#stands in for the time module of ResponseCache, so the tests decide what time it is
+class FakeClock:
+    def __init__(self):
+        self.now = 1000
+
+    def monotonic(self):
+        return self.now
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(ResponseCache, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_expires_after_ttl(self):
+        cache = Cache(ttl = 60, max_entries = 10, max_bytes = 1000)
+        cache.put("a", "response", 10)
+
+        self.clock.now += 59.9
+        self.assertEqual(cache.get("a"), "response")
+
+        self.clock.now += 0.1
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertEqual(cache.stats()["bytes"], 0)
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = Cache(ttl = 60, max_entries = 2, max_bytes = 1000)
+        cache.put("a", "A", 10)
+        cache.put("b", "B", 10)
+
+        #a is now more recently used than b
+        cache.get("a")
+        cache.put("c", "C", 10)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "A")
+        self.assertEqual(cache.get("c"), "C")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_evicts_until_within_max_bytes(self):
+        cache = Cache(ttl = 60, max_entries = 10, max_bytes = 100)
+        cache.put("a", "A", 40)
+        cache.put("b", "B", 40)
+        cache.put("c", "C", 70)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "C")
+        self.assertEqual(cache.stats()["bytes"], 70)
+
+    def test_replacing_an_entry(self):
+        cache = Cache(ttl = 60, max_entries = 10, max_bytes = 100)
+        cache.put("a", "old", 60)
+        self.clock.now += 50
+        cache.put("a", "new", 30)
+
+        #the new entry has its own ttl & size
+        self.clock.now += 50
+        self.assertEqual(cache.get("a"), "new")
+        self.assertEqual(cache.stats()["bytes"], 30)
+
+    def test_too_big_to_cache(self):
+        cache = Cache(ttl = 60, max_entries = 10, max_bytes = 100)
+        cache.put("a", "A", 10)
+        cache.put("big", "B", 101)
+
+        self.assertIsNone(cache.get("big"))
+        self.assertEqual(cache.get("a"), "A")
+
+    def test_hits_and_misses(self):
+        cache = Cache(ttl = 60, max_entries = 10, max_bytes = 100)
+        cache.get("a")
+        cache.put("a", "A", 1)
+        cache.get("a")
+        cache.get("a")
+
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (2, 1))
+
+class StaleWhileRevalidateCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(ResponseCache, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fresh_then_stale_then_missing(self):
+        cache = StaleWhileRevalidateCache(fresh_for = 60, max_age = 600, max_entries = 10)
+        cache.put("a", "response")
+
+        self.clock.now += 59
+        self.assertEqual(cache.lookup("a", "LON"), (FRESH, "response"))
+
+        self.clock.now += 1
+        self.assertEqual(cache.lookup("a", "LON"), (STALE, "response"))
+
+        self.clock.now += 539
+        self.assertEqual(cache.lookup("a", "LON"), (STALE, "response"))
+
+        self.clock.now += 1
+        self.assertEqual(cache.lookup("a", "LON"), (MISSING, None))
+
+        stats = cache.stats()
+        self.assertEqual((stats["fresh_hits"], stats["stale_hits"], stats["misses"]), (1, 2, 1))
+
+    def test_refreshed_entry_is_fresh_again(self):
+        cache = StaleWhileRevalidateCache(fresh_for = 60, max_age = 600, max_entries = 10)
+        cache.put("a", "old")
+        self.clock.now += 100
+        self.assertEqual(cache.lookup("a", "LON"), (STALE, "old"))
+
+        cache.put("a", "new")
+        self.assertEqual(cache.lookup("a", "LON"), (FRESH, "new"))
+
+    def test_origin_ages(self):
+        cache = StaleWhileRevalidateCache(fresh_for = 60, max_age = 600, max_entries = 10, origin_ages = {"PAR": (10, 20)})
+        cache.put("paris", "P")
+        cache.put("london", "L")
+
+        self.clock.now += 15
+        self.assertEqual(cache.lookup("paris", "PAR"), (STALE, "P"))
+        self.assertEqual(cache.lookup("london", "LON"), (FRESH, "L"))
+
+        self.clock.now += 5
+        self.assertEqual(cache.lookup("paris", "PAR"), (MISSING, None))
+        self.assertEqual(cache.lookup("london", "LON"), (FRESH, "L"))
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = StaleWhileRevalidateCache(fresh_for = 60, max_age = 600, max_entries = 2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.lookup("a", "LON")
+        cache.put("c", "C")
+
+        self.assertEqual(cache.lookup("b", "LON"), (MISSING, None))
+        self.assertEqual(cache.lookup("a", "LON"), (FRESH, "A"))
+
+    def test_one_refresh_at_a_time(self):
+        cache = StaleWhileRevalidateCache(fresh_for = 60, max_age = 600, max_entries = 10)
+
+        self.assertTrue(cache.begin_refresh("a"))
+        self.assertFalse(cache.begin_refresh("a"))
+        cache.end_refresh("a")
+        self.assertTrue(cache.begin_refresh("a"))
+        self.assertEqual(cache.stats()["refreshes"], 2)
+
+class CanonicalKeyTest(unittest.TestCase):
+    def test_key_order_does_not_matter(self):
+        self.assertEqual(canonical_key({"a": 1, "b": {"c": 2, "d": 3}}), canonical_key({"b": {"d": 3, "c": 2}, "a": 1}))
+        self.assertNotEqual(canonical_key({"a": [1, 2]}), canonical_key({"a": [2, 1]}))
+
+if __name__ == "__main__":
+    unittest.main()
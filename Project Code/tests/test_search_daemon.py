@@ -0,0 +1,94 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+#the modules of the project are in the folder above this one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SearchDaemon import Coalescer
+
+NUM_THREADS = 10
+
+#raised by a request that is interrupted, like a KeyboardInterrupt would be
+class Interrupted(BaseException):
+    pass
+
+#runs NUM_THREADS requests with the same key at once, the first one only finishing once all the others
+#wait on it. Returns what each thread got, the result or the exception raised
+def run_together(coalescer, function):
+    release = threading.Event()
+    outcomes = []
+    outcomes_lock = threading.Lock()
+
+    def blocked_function():
+        release.wait(5)
+        return function()
+
+    def request():
+        try:
+            outcome = coalescer.run("key", blocked_function)
+        except BaseException as error:
+            outcome = error
+
+        with outcomes_lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target = request) for i in range(NUM_THREADS)]
+    for thread in threads:
+        thread.start()
+
+    deadline = time.monotonic() + 5
+    while coalescer.stats()["coalesced"] < NUM_THREADS - 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    return outcomes
+
+class CoalescerTest(unittest.TestCase):
+    def test_identical_requests_run_once(self):
+        coalescer = Coalescer()
+        calls = []
+
+        outcomes = run_together(coalescer, lambda: calls.append(1) or "result")
+
+        self.assertEqual(outcomes, ["result"] * NUM_THREADS)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(coalescer.stats(), {"calls": 1, "coalesced": NUM_THREADS - 1, "running": 0})
+
+    def test_exception_reaches_every_waiter(self):
+        coalescer = Coalescer()
+
+        def fail():
+            raise ValueError("api call failed")
+
+        outcomes = run_together(coalescer, fail)
+
+        self.assertEqual(len(outcomes), NUM_THREADS)
+        self.assertTrue(all(isinstance(outcome, ValueError) for outcome in outcomes))
+        self.assertEqual(coalescer.stats()["running"], 0)
+
+    def test_interruption_reaches_every_waiter(self):
+        coalescer = Coalescer()
+
+        def interrupt():
+            raise Interrupted()
+
+        outcomes = run_together(coalescer, interrupt)
+
+        self.assertEqual(len(outcomes), NUM_THREADS)
+        self.assertTrue(all(isinstance(outcome, Interrupted) for outcome in outcomes))
+
+    def test_later_requests_run_again(self):
+        coalescer = Coalescer()
+
+        self.assertEqual(coalescer.run("key", lambda: 1), 1)
+        self.assertEqual(coalescer.run("key", lambda: 2), 2)
+        self.assertEqual(coalescer.stats()["calls"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
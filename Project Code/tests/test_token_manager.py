@@ -0,0 +1,136 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+#the modules of the project are in the folder above this one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ApiCalls
+from TokenManager import TokenManager
+
+#a fetch_token that counts its calls, takes a little while, and returns response (None if it failed)
+class FakeTokenEndpoint:
+    def __init__(self, response, seconds = 0.1):
+        self.response = response
+        self.seconds = seconds
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.seconds)
+        return self.response
+
+def get_tokens(token_manager, fetch_token, num_threads):
+    tokens = []
+    threads = [threading.Thread(target = lambda: tokens.append(token_manager.get_token(fetch_token))) for i in range(num_threads)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    return tokens
+
+class TokenManagerTest(unittest.TestCase):
+    def test_single_fetch_for_many_threads(self):
+        token_manager = TokenManager(120, 300)
+        fetch_token = FakeTokenEndpoint({"access_token": "token", "expires_in": 1799})
+
+        self.assertEqual(get_tokens(token_manager, fetch_token, 20), ["token"] * 20)
+        self.assertEqual(fetch_token.calls, 1)
+
+    def test_failure_is_shared_with_waiting_threads(self):
+        token_manager = TokenManager(120, 300, failure_backoff = 0.3)
+        fetch_token = FakeTokenEndpoint(None)
+
+        self.assertEqual(get_tokens(token_manager, fetch_token, 20), [None] * 20)
+        self.assertEqual(fetch_token.calls, 1)
+
+        #no new request until the backoff is over
+        self.assertIsNone(token_manager.get_token(fetch_token))
+        self.assertEqual(fetch_token.calls, 1)
+
+        time.sleep(0.3)
+        working = FakeTokenEndpoint({"access_token": "token", "expires_in": 1799}, 0)
+        self.assertEqual(token_manager.get_token(working), "token")
+        self.assertFalse(token_manager.is_backing_off())
+
+    def test_expired_token_is_not_returned(self):
+        token_manager = TokenManager(120, 300, failure_backoff = 60)
+        token_manager.store({"access_token": "old", "expires_in": 60})
+
+        self.assertIsNone(token_manager.get_token(FakeTokenEndpoint(None, 0)))
+
+    def test_refreshed_in_background_when_due(self):
+        token_manager = TokenManager(120, 300)
+        token_manager.store({"access_token": "old", "expires_in": 120 + 200})
+        fetch_token = FakeTokenEndpoint({"access_token": "new", "expires_in": 1799})
+
+        #the caller gets the current token right away, the new one is fetched meanwhile
+        self.assertEqual(token_manager.get_token(fetch_token), "old")
+
+        deadline = time.monotonic() + 5
+        while token_manager.token != "new" and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(token_manager.token, "new")
+        self.assertEqual(fetch_token.calls, 1)
+
+    def test_shared_file(self):
+        with tempfile.TemporaryDirectory() as folder:
+            shared_file = os.path.join(folder, "token.json")
+            first = TokenManager(120, 300, shared_file, "key")
+            second = TokenManager(120, 300, shared_file, "key")
+            other_key = TokenManager(120, 300, shared_file, "other key")
+
+            fetch_token = FakeTokenEndpoint({"access_token": "token", "expires_in": 1799}, 0)
+            first.get_token(fetch_token)
+
+            self.assertEqual(second.get_token(fetch_token), "token")
+            self.assertEqual(fetch_token.calls, 1)
+
+            other_key.get_token(fetch_token)
+            self.assertEqual(fetch_token.calls, 2)
+
+#stands in for the transport of an ApiCaller, counting the requests that reach it
+class FakeTransport:
+    RequestException = OSError
+
+    def __init__(self):
+        self.requests = []
+
+    def request(self, method, endpoint, **kwargs):
+        self.requests.append(endpoint)
+        raise OSError("no api in the tests")
+
+class NoTokenTest(unittest.TestCase):
+    def test_no_request_is_sent_without_a_token(self):
+        api_caller = ApiCalls.ApiCaller()
+        api_caller.transport = FakeTransport()
+        api_caller.token_manager = TokenManager(120, 300)
+        #as if the last token request had just failed
+        api_caller.token_manager.record_failure()
+
+        details = {
+            "origin_airport": "YUL",
+            "destination_airport": "LHR",
+            "departure_date": "2030-01-01",
+            "return_date": None,
+            "max_price": None,
+            "trip": "ow",
+            "travelers": {"ADULT": 1, "SENIOR": 0, "CHILD": 0, "HELD_INFANT": 0, "SEATED_INFANT": 0}
+        }
+
+        with redirect_stdout(StringIO()):
+            self.assertIsNone(api_caller.get_flight_offers(details))
+            self.assertIsNone(api_caller.stream_flight_offers(details))
+            self.assertEqual(api_caller.get_airline_data("AC", {}), {})
+        self.assertEqual(api_caller.transport.requests, [])
+
+if __name__ == "__main__":
+    unittest.main()